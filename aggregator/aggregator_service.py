@@ -5,12 +5,16 @@ Connects Vision → Backend → ESP32 Gate Control
 import json
 import time
 import logging
+import threading
 import yaml
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 import paho.mqtt.client as mqtt
 from typing import Dict
 
+from gate_dispatcher import GateDispatcher
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -27,10 +31,34 @@ class AggregatorService:
         self.mqtt_config = self.config.get('mqtt', {})
         self.backend_url = self.config.get('backend_url', 'http://localhost:8000')
         
-        # State tracking
+        # State tracking; counters are updated on each slot transition
         self.slot_states = {}
+        self.slot_cameras = {}
+        self.total_slots = 0
+        self.free_slots = 0
+        self.camera_counts: Dict[str, Dict[str, int]] = {}
         self.any_slot_available = False
         
+        # Global status is coalesced: at most max_per_second publishes, latest state wins
+        status_config = self.config.get('global_status', {})
+        self.status_min_interval = 1.0 / max(status_config.get('max_per_second', 2), 0.01)
+        self.status_lock = threading.Lock()
+        self.last_status_publish = 0.0
+        self.status_timer = None
+        self.status_published = 0
+        self.status_coalesced = 0
+        
+        # Gate requests run off the MQTT thread: serial per gate, parallel across gates
+        gate_config = self.config.get('gate_requests', {})
+        self.request_timeout = gate_config.get('timeout', 5)
+        self.stats_interval = gate_config.get('stats_interval', 60)
+        self.session = self.setup_session(gate_config.get('max_workers', 8))
+        self.dispatcher = GateDispatcher(
+            max_workers=gate_config.get('max_workers', 8),
+            max_pending_per_gate=gate_config.get('max_pending_per_gate', 20)
+        )
+        self.stats_timer = None
+        
         # MQTT client
         self.mqtt_client = self.setup_mqtt()
         
@@ -53,6 +81,14 @@ class AggregatorService:
                 'backend_url': 'http://localhost:8000'
             }
     
+    def setup_session(self, max_workers: int) -> requests.Session:
+        """Keep-alive HTTP session with one pooled connection per worker"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_workers))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
     def setup_mqtt(self) -> mqtt.Client:
         """Setup MQTT client with subscriptions"""
         client_id = f"aggregator_{int(time.time())}"
@@ -123,35 +159,67 @@ class AggregatorService:
     def handle_slot_update(self, payload: Dict):
         """Handle slot occupancy update"""
         slot_id = payload.get('slot_id')
-        is_occupied = payload.get('occupied')
+        is_occupied = bool(payload.get('occupied'))
         camera_id = payload.get('camera_id')
         
-        # Update local state
-        self.slot_states[slot_id] = is_occupied
+        with self.status_lock:
+            was_available = self.any_slot_available
+            self.apply_slot_state(slot_id, is_occupied, camera_id)
+            self.any_slot_available = self.free_slots > 0
+            free_slots = self.free_slots
         
-        # Calculate if any slot is available
-        free_slots = sum(1 for occupied in self.slot_states.values() if not occupied)
-        self.any_slot_available = free_slots > 0
+        logger.debug(f"Slot {slot_id}: {'OCCUPIED' if is_occupied else 'FREE'} | Free slots: {free_slots}")
         
-        logger.info(f"Slot {slot_id}: {'OCCUPIED' if is_occupied else 'FREE'} | Free slots: {free_slots}")
+        # Publish global availability (immediately when it flips)
+        self.publish_global_status(force=self.any_slot_available != was_available)
+    
+    def apply_slot_state(self, slot_id: str, is_occupied: bool, camera_id: str = None):
+        """Update slot state and the free/total counters for one transition"""
+        previous = self.slot_states.get(slot_id)
+        previous_camera = self.slot_cameras.get(slot_id)
+        camera_id = camera_id or previous_camera
+        
+        # Remove the slot's previous contribution
+        if previous is not None:
+            self.total_slots -= 1
+            self.free_slots -= not previous
+            if previous_camera is not None:
+                counts = self.camera_counts[previous_camera]
+                counts['total'] -= 1
+                counts['free'] -= not previous
         
-        # Publish global availability
-        self.publish_global_status()
+        # Add its new contribution
+        self.slot_states[slot_id] = is_occupied
+        self.total_slots += 1
+        self.free_slots += not is_occupied
+        if camera_id is not None:
+            self.slot_cameras[slot_id] = camera_id
+            counts = self.camera_counts.setdefault(camera_id, {'total': 0, 'free': 0})
+            counts['total'] += 1
+            counts['free'] += not is_occupied
     
     def handle_rfid_scan(self, payload: Dict):
         """Handle RFID tag scan"""
         rfid_id = payload.get('rfid_id')
         location = payload.get('location', 'unknown')
+        # Gates that do not send an id are told apart by location
+        gate_id = payload.get('gate_id') or location
         
-        logger.info(f"RFID scanned: {rfid_id} at {location}")
+        logger.info(f"RFID scanned: {rfid_id} at {location} (gate {gate_id})")
         
         # Determine if entry or exit
         if location == 'gate' or location == 'entry':
-            self.handle_entry_request(rfid_id)
+            handler = self.handle_entry_request
         elif location == 'exit':
-            self.handle_exit_request(rfid_id)
+            handler = self.handle_exit_request
+        else:
+            return
+        
+        if not self.dispatcher.submit(gate_id, handler, rfid_id, gate_id):
+            logger.warning(f"Gate {gate_id} backlog full, dropping scan for {rfid_id}")
+            self.send_gate_command("deny", "Gate busy, please scan again", gate_id)
     
-    def handle_entry_request(self, rfid_id: str):
+    def handle_entry_request(self, rfid_id: str, gate_id: str = None):
         """Process entry request"""
         logger.info(f"Processing entry for RFID: {rfid_id}")
         
@@ -159,17 +227,17 @@ class AggregatorService:
             # Check if slot is available
             if not self.any_slot_available:
                 logger.warning(f"Entry denied for {rfid_id}: No slots available")
-                self.send_gate_command("deny", f"No parking slots available")
+                self.send_gate_command("deny", f"No parking slots available", gate_id)
                 return
             
             # Call backend API to record entry
-            response = requests.post(
+            response = self.session.post(
                 f"{self.backend_url}/api/entry",
                 json={
                     'rfid_id': rfid_id,
                     'camera_id': 'GATE_CAM'
                 },
-                timeout=5
+                timeout=self.request_timeout
             )
             
             if response.status_code == 200:
@@ -177,29 +245,29 @@ class AggregatorService:
                 logger.info(f"Entry recorded: {data}")
                 
                 # Open gate
-                self.send_gate_command("open", f"Entry granted for {rfid_id}")
+                self.send_gate_command("open", f"Entry granted for {rfid_id}", gate_id)
             else:
                 error = response.json().get('detail', 'Unknown error')
                 logger.error(f"Entry failed: {error}")
-                self.send_gate_command("deny", error)
+                self.send_gate_command("deny", error, gate_id)
         
         except Exception as e:
             logger.error(f"Error processing entry: {e}")
-            self.send_gate_command("deny", "System error")
+            self.send_gate_command("deny", "System error", gate_id)
     
-    def handle_exit_request(self, rfid_id: str):
+    def handle_exit_request(self, rfid_id: str, gate_id: str = None):
         """Process exit request"""
         logger.info(f"Processing exit for RFID: {rfid_id}")
         
         try:
             # Call backend API to record exit
-            response = requests.post(
+            response = self.session.post(
                 f"{self.backend_url}/api/exit",
                 json={
                     'rfid_id': rfid_id,
                     'camera_id': 'GATE_CAM'
                 },
-                timeout=5
+                timeout=self.request_timeout
             )
             
             if response.status_code == 200:
@@ -208,27 +276,28 @@ class AggregatorService:
                 logger.info(f"Receipt: {receipt['session_id']}")
                 
                 # Open gate
-                self.send_gate_command("open", f"Exit granted. Charged: ₹{receipt['amount_charged']}")
+                self.send_gate_command("open", f"Exit granted. Charged: ₹{receipt['amount_charged']}", gate_id)
             elif response.status_code == 402:
                 # Insufficient balance
                 error = response.json().get('detail', 'Insufficient balance')
                 logger.error(f"Exit denied: {error}")
-                self.send_gate_command("deny", error)
+                self.send_gate_command("deny", error, gate_id)
             else:
                 error = response.json().get('detail', 'Unknown error')
                 logger.error(f"Exit failed: {error}")
-                self.send_gate_command("deny", error)
+                self.send_gate_command("deny", error, gate_id)
         
         except Exception as e:
             logger.error(f"Error processing exit: {e}")
-            self.send_gate_command("deny", "System error")
+            self.send_gate_command("deny", "System error", gate_id)
     
-    def send_gate_command(self, action: str, reason: str = ""):
+    def send_gate_command(self, action: str, reason: str = "", gate_id: str = None):
         """Send command to ESP32 gate controller"""
         topic = "parking/gate/control"
         payload = {
             'action': action,
             'reason': reason,
+            'gate_id': gate_id,
             'timestamp': time.time()
         }
         
@@ -241,17 +310,42 @@ class AggregatorService:
     def handle_gate_status(self, payload: Dict):
         """Handle gate status updates"""
         status = payload.get('gate_status')
-        logger.debug(f"Gate status: {status}")
+        logger.debug(f"Gate {payload.get('gate_id', 'unknown')} status: {status}")
     
-    def publish_global_status(self):
-        """Publish global system status"""
+    def publish_global_status(self, force: bool = False):
+        """
+        Publish global system status, rate-limited
+        
+        Within status_min_interval of the last publish, a single timer is
+        armed instead and publishes whatever the state is when it fires.
+        """
+        with self.status_lock:
+            wait = self.last_status_publish + self.status_min_interval - time.monotonic()
+            if wait > 0 and not force:
+                if self.status_timer is None:
+                    self.status_timer = threading.Timer(wait, self.send_global_status)
+                    self.status_timer.daemon = True
+                    self.status_timer.start()
+                else:
+                    self.status_coalesced += 1
+                return
+        self.send_global_status()
+    
+    def send_global_status(self):
         topic = "parking/global/any_slot"
-        payload = {
-            'any_slot_available': self.any_slot_available,
-            'free_slots': sum(1 for occupied in self.slot_states.values() if not occupied),
-            'total_slots': len(self.slot_states),
-            'timestamp': time.time()
-        }
+        with self.status_lock:
+            if self.status_timer is not None:
+                self.status_timer.cancel()
+                self.status_timer = None
+            self.last_status_publish = time.monotonic()
+            self.status_published += 1
+            payload = {
+                'any_slot_available': self.any_slot_available,
+                'free_slots': self.free_slots,
+                'total_slots': self.total_slots,
+                'cameras': {camera_id: dict(counts) for camera_id, counts in self.camera_counts.items()},
+                'timestamp': time.time()
+            }
         
         try:
             self.mqtt_client.publish(topic, json.dumps(payload), qos=1)
@@ -266,14 +360,40 @@ class AggregatorService:
         logger.info("Connecting components: Vision ↔ Backend ↔ ESP32")
         logger.info("=" * 60)
         
+        self.schedule_stats()
         try:
             self.mqtt_client.loop_forever()
         except KeyboardInterrupt:
             logger.info("Shutting down aggregator...")
             self.stop()
     
+    def schedule_stats(self):
+        """Log gate decision latency percentiles every stats_interval seconds"""
+        if not self.stats_interval:
+            return
+        self.stats_timer = threading.Timer(self.stats_interval, self.report_stats)
+        self.stats_timer.daemon = True
+        self.stats_timer.start()
+    
+    def report_stats(self):
+        stats = self.dispatcher.get_stats()
+        for gate_id, latency in stats["gates"].items():
+            logger.info(f"Gate {gate_id}: {latency['count']} decisions, p50 {latency['p50_ms']}ms, "
+                        f"p95 {latency['p95_ms']}ms, p99 {latency['p99_ms']}ms")
+        if stats["rejected"] or stats["failed"]:
+            logger.warning(f"Gate requests rejected: {stats['rejected']}, failed: {stats['failed']}")
+        logger.info(f"Slots: {self.free_slots}/{self.total_slots} free | global status published "
+                    f"{self.status_published}, coalesced {self.status_coalesced}")
+        self.schedule_stats()
+    
     def stop(self):
         """Stop the service"""
+        if self.stats_timer:
+            self.stats_timer.cancel()
+        if self.status_timer:
+            self.status_timer.cancel()
+        self.dispatcher.stop()
+        self.session.close()
         self.mqtt_client.loop_stop()
         self.mqtt_client.disconnect()
         logger.info("Aggregator stopped")
@@ -0,0 +1,127 @@
+"""
+Gate Request Dispatcher
+Runs RFID gate requests on a thread pool, one at a time per gate and
+concurrently across gates, and tracks gate decision latency
+"""
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class GateDispatcher:
+    """Per-gate serial queues drained by a shared thread pool"""
+
+    def __init__(self, max_workers: int = 8, max_pending_per_gate: int = 20, latency_window: int = 1000):
+        """
+        Args:
+            max_workers: Worker threads; 0 runs requests inline on the caller's thread
+            max_pending_per_gate: Queued requests per gate before new ones are rejected
+            latency_window: Recent decisions per gate kept for percentiles
+        """
+        self.max_workers = max_workers
+        self.max_pending_per_gate = max(1, max_pending_per_gate)
+        self.latency_window = latency_window
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="gate") if max_workers > 0 else None
+
+        self.lock = threading.Lock()
+        self.queues: Dict[str, deque] = {}
+        self.draining = set()
+        self.latencies: Dict[str, deque] = {}
+
+        # Statistics
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def submit(self, gate_id: str, handler: Callable, *args) -> bool:
+        """
+        Queue handler(*args) behind earlier requests from the same gate
+
+        Returns:
+            False if the gate's queue is full and the request was dropped
+        """
+        item = (time.perf_counter(), handler, args)
+        with self.lock:
+            queue = self.queues.setdefault(gate_id, deque())
+            if len(queue) >= self.max_pending_per_gate:
+                self.rejected += 1
+                return False
+            queue.append(item)
+            self.submitted += 1
+            start_drain = gate_id not in self.draining
+            if start_drain:
+                self.draining.add(gate_id)
+
+        if start_drain:
+            if self.executor is None:
+                self.drain(gate_id)
+            else:
+                try:
+                    self.executor.submit(self.drain, gate_id)
+                except RuntimeError:
+                    # Shutting down
+                    with self.lock:
+                        self.queues[gate_id].clear()
+                        self.draining.discard(gate_id)
+                    return False
+        return True
+
+    def drain(self, gate_id: str):
+        """Run a gate's queued requests in order until its queue is empty"""
+        while True:
+            with self.lock:
+                queue = self.queues[gate_id]
+                if not queue:
+                    self.draining.discard(gate_id)
+                    return
+                received, handler, args = queue.popleft()
+
+            failed = False
+            try:
+                handler(*args)
+            except Exception as e:
+                failed = True
+                logger.error(f"Gate {gate_id} request failed: {e}")
+
+            latency_ms = (time.perf_counter() - received) * 1000
+            with self.lock:
+                self.completed += 1
+                self.failed += failed
+                self.latencies.setdefault(gate_id, deque(maxlen=self.latency_window)).append(latency_ms)
+
+    def stop(self, wait: bool = True):
+        """Stop accepting work; optionally finish what is queued"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    @staticmethod
+    def percentiles(samples) -> Dict:
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 1),
+            "p95_ms": round(ordered[int(len(ordered) * 0.95)], 1),
+            "p99_ms": round(ordered[int(len(ordered) * 0.99)], 1),
+            "max_ms": round(ordered[-1], 1)
+        }
+
+    def get_stats(self) -> Dict:
+        """Get dispatcher statistics with decision latency percentiles per gate"""
+        with self.lock:
+            latencies = {gate_id: list(samples) for gate_id, samples in self.latencies.items() if samples}
+            stats = {
+                "workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "pending": {gate_id: len(queue) for gate_id, queue in self.queues.items() if queue}
+            }
+        stats["gates"] = {gate_id: self.percentiles(samples) for gate_id, samples in latencies.items()}
+        return stats
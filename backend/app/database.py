@@ -3,11 +3,121 @@ MongoDB Database Connection and Configuration
 """
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import ReadPreference, monitoring
+from pymongo.errors import CollectionInvalid, OperationFailure
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Optional
+import importlib.util
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Wire compressors and the Python package each one needs
+COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy"}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST
+}
+
+# IndexOptionsConflict / IndexKeySpecsConflict
+INDEX_CONFLICT_CODES = {85, 86}
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Connection pool metrics from driver events
+    
+    Driver events fire on Motor's worker threads, so counters are guarded by
+    a lock; checkout wait is measured from checkout start to checked out.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: Recent checkout waits kept for percentiles
+        """
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.waits_ms = deque(maxlen=window)
+        self.open_connections = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self.lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self.lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_check_out_started(self, event):
+        self.local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self.local, "started", None)
+        with self.lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            if started is not None:
+                self.waits_ms.append((time.perf_counter() - started) * 1000)
+        self.local.started = None
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        with self.lock:
+            waits = sorted(self.waits_ms)
+            stats = {
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears
+            }
+        if waits:
+            stats["checkout_wait_ms"] = {
+                "p50": round(waits[len(waits) // 2], 3),
+                "p95": round(waits[int(len(waits) * 0.95)], 3),
+                "max": round(waits[-1], 3)
+            }
+        return stats
+
 
 class Database:
     """MongoDB Database Manager"""
@@ -17,27 +127,68 @@ class Database:
     def __init__(self):
         self.client = None
         self.database = None
+        self.analytics_database = None
+        self.supports_transactions = False
+        self.supports_change_streams = False
+        # True once the partial unique index on active sessions is in place
+        self.active_session_index = False
+        self.retention = {}
+        self.pool_monitor = PoolMonitor()
 
-    async def connect_to_database(self, connection_string: str, database_name: str):
+    async def connect_to_database(self, connection_string: str, database_name: str,
+                                  transaction_mode: str = "auto", retention: Optional[Dict] = None,
+                                  options: Optional[Dict] = None, analytics_read_preference: Optional[str] = None):
         """
         Connect to MongoDB database
         
         Args:
             connection_string: MongoDB connection URI
             database_name: Name of the database
+            transaction_mode: "auto" to use multi-document transactions when the
+                server is a replica set or sharded cluster, "off" to never use them
+            retention: Days to keep system logs and occupancy events
+            options: MongoClient options (pool sizing, timeouts, compressors);
+                defaults to the options in config/database.yaml
+            analytics_read_preference: Read preference mode for analytics and
+                listing queries (e.g. "secondaryPreferred")
         """
         try:
-            logger.info(f"Connecting to MongoDB at {connection_string}")
-            self.client = AsyncIOMotorClient(connection_string)
+            options = get_client_options() if options is None else options
+            logger.info(f"Connecting to MongoDB at {connection_string} with options {options}")
+            self.client = AsyncIOMotorClient(
+                connection_string, event_listeners=[self.pool_monitor], **options
+            )
             self.database = self.client[database_name]
             
+            # Reads that tolerate replication lag can be served by secondaries
+            mode = analytics_read_preference or get_analytics_read_preference()
+            if mode not in READ_PREFERENCES:
+                raise ValueError(f"Unknown read preference '{mode}', expected one of {list(READ_PREFERENCES)}")
+            self.analytics_database = self.client.get_database(
+                database_name, read_preference=READ_PREFERENCES[mode]
+            )
+            
             # Test connection
             await self.client.admin.command('ping')
             logger.info(f"Successfully connected to MongoDB database: {database_name}")
             
-            # Create indexes
+            # Transactions and change streams need a replica set (setName) or mongos (isdbgrid)
+            hello = await self.client.admin.command('hello')
+            self.supports_change_streams = "setName" in hello or hello.get("msg") == "isdbgrid"
+            self.supports_transactions = self.supports_change_streams and transaction_mode != "off"
+            logger.info(f"Multi-document transactions {'enabled' if self.supports_transactions else 'disabled'}")
+            
+            # Create collections and indexes
+            self.retention = retention or get_retention_config()
+            await self.create_occupancy_events_collection()
             await self.create_indexes()
             
+            # Entry falls back to checking for an active session itself without it
+            self.active_session_index = await self.has_active_session_index()
+            if not self.active_session_index:
+                logger.error("Partial unique index on active sessions is missing; close duplicate "
+                             "active sessions and restart. Entry checks for active sessions until then")
+            
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
@@ -57,22 +208,30 @@ class Database:
             
             # Sessions collection indexes
             await self.database.sessions.create_index("session_id", unique=True)
-            await self.database.sessions.create_index("rfid_id")
-            await self.database.sessions.create_index("status")
+            await self.create_active_session_index()
+            # Active session listing: {status} sorted by (entry_time, _id) desc
+            await self.database.sessions.create_index([("status", 1), ("entry_time", -1), ("_id", -1)])
+            await self.drop_index_if_exists(self.database.sessions, "status_1")
             await self.database.sessions.create_index([("entry_time", -1)])
             
             # Slots collection indexes
             await self.database.slots.create_index("slot_id", unique=True)
             await self.database.slots.create_index("camera_id")
             await self.database.slots.create_index("is_occupied")
+            # Status counts: {is_active} and {is_active, is_occupied}
+            await self.database.slots.create_index([("is_active", 1), ("is_occupied", 1)])
             
             # Transactions collection indexes
             await self.database.transactions.create_index("transaction_id", unique=True)
             await self.database.transactions.create_index("rfid_id")
             await self.database.transactions.create_index([("timestamp", -1)])
+            await self.database.transactions.create_index([("rfid_id", 1), ("timestamp", -1), ("_id", -1)])
             
-            # System logs collection indexes
-            await self.database.system_logs.create_index([("timestamp", -1)])
+            # System logs collection indexes (old entries expire)
+            await self.ensure_ttl_index(
+                self.database.system_logs, "timestamp",
+                int(self.retention.get("system_logs_days", 30) * 86400)
+            )
             await self.database.system_logs.create_index("component")
             await self.database.system_logs.create_index("log_level")
             
@@ -81,6 +240,81 @@ class Database:
         except Exception as e:
             logger.warning(f"Error creating indexes: {e}")
 
+    async def create_active_session_index(self):
+        """
+        Partial unique index on rfid_id for active sessions
+        
+        Serves the {rfid_id, status: "active"} lookups on entry/exit and
+        rejects a second active session for the same tag.
+        """
+        sessions = self.database.sessions
+        for attempt in range(2):
+            try:
+                await sessions.create_index(
+                    "rfid_id",
+                    name="rfid_id_active_unique",
+                    unique=True,
+                    partialFilterExpression={"status": "active"}
+                )
+                break
+            except OperationFailure as e:
+                # Servers before 5.0 refuse a second index on the same key pattern
+                if attempt == 0 and e.code in INDEX_CONFLICT_CODES \
+                        and "rfid_id_1" in await sessions.index_information():
+                    await sessions.drop_index("rfid_id_1")
+                    continue
+                # Usually duplicate active sessions; keep a plain index for entry's own check
+                logger.error(f"Could not enforce one active session per RFID: {e}")
+                await sessions.create_index("rfid_id")
+                return
+        
+        # The plain rfid_id index only served the same lookup
+        await self.drop_index_if_exists(sessions, "rfid_id_1")
+
+    async def has_active_session_index(self) -> bool:
+        """Whether the partial unique index on active sessions exists"""
+        index = (await self.database.sessions.index_information()).get("rfid_id_active_unique")
+        return bool(index and index.get("unique") and index.get("partialFilterExpression"))
+
+    async def drop_index_if_exists(self, collection, name: str):
+        """Drop an index superseded by a compound one"""
+        if name in await collection.index_information():
+            await collection.drop_index(name)
+            logger.info(f"Dropped redundant index {collection.name}.{name}")
+
+    async def ensure_ttl_index(self, collection, field: str, expire_seconds: int):
+        """Create a descending TTL index on field, replacing a non-TTL one"""
+        name = f"{field}_-1"
+        existing = (await collection.index_information()).get(name)
+        if existing and existing.get("expireAfterSeconds") != expire_seconds:
+            await collection.drop_index(name)
+        await collection.create_index([(field, -1)], expireAfterSeconds=expire_seconds)
+
+    async def create_occupancy_events_collection(self):
+        """
+        Create the occupancy_events time-series collection
+        
+        One document per slot state change, bucketed by slot and camera (meta),
+        replacing the unbounded occupancy_history array on slot documents.
+        """
+        try:
+            await self.database.create_collection(
+                "occupancy_events",
+                timeseries={
+                    "timeField": "timestamp",
+                    "metaField": "meta",
+                    "granularity": "seconds"
+                },
+                expireAfterSeconds=int(self.retention.get("occupancy_events_days", 365) * 86400)
+            )
+            logger.info("Created occupancy_events time-series collection")
+        except CollectionInvalid:
+            pass  # already exists
+        except OperationFailure as e:
+            # Time-series collections need MongoDB 5.0+; fall back to a plain collection
+            logger.warning(f"Could not create time-series collection ({e}), using a regular collection")
+            await self.database.occupancy_events.create_index([("meta.slot_id", 1), ("timestamp", -1)])
+
     def get_collection(self, collection_name: str):
         """Get a collection from the database"""
         if not self.database:
@@ -99,18 +333,16 @@ async def get_database():
     return db_instance.database
 
 
-def get_connection_string() -> str:
-    """
-    Get MongoDB connection string from environment or config
-    Priority: ENV variable > config file > default
-    """
-    # Try environment variable first
-    connection_string = os.getenv("MONGODB_URI")
-    
-    if connection_string:
-        return connection_string
-    
-    # Try loading from config file
+async def get_analytics_database():
+    """Dependency to get the database handle for lag-tolerant reads"""
+    if db_instance.analytics_database is None:
+        raise Exception("Database not initialized")
+    return db_instance.analytics_database
+
+
+@lru_cache(maxsize=1)
+def load_database_config() -> Dict:
+    """Read the mongodb section of config/database.yaml (once per process)"""
     try:
         import yaml
         config_path = os.path.join(
@@ -120,34 +352,74 @@ def get_connection_string() -> str:
         )
         if os.path.exists(config_path):
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                return config.get("mongodb", {}).get("uri", "mongodb://localhost:27017")
+                return (yaml.safe_load(f) or {}).get("mongodb") or {}
     except Exception as e:
         logger.warning(f"Could not load config file: {e}")
     
-    # Default to localhost
-    return "mongodb://localhost:27017"
+    return {}
+
+
+def get_connection_string() -> str:
+    """
+    Get MongoDB connection string from environment or config
+    Priority: ENV variable > config file > default
+    """
+    return os.getenv("MONGODB_URI") or load_database_config().get("uri", "mongodb://localhost:27017")
 
 
 def get_database_name() -> str:
     """Get database name from environment or config"""
-    db_name = os.getenv("MONGODB_DATABASE")
+    return os.getenv("MONGODB_DATABASE") or load_database_config().get("database", "smart_parking")
+
+
+def get_transaction_mode() -> str:
+    """Get transaction mode ("auto" or "off") from environment or config"""
+    mode = os.getenv("MONGODB_TRANSACTIONS") or load_database_config().get("transactions", "auto")
+    # YAML reads a bare `off` as False
+    return "off" if str(mode).lower() in ("off", "false", "no", "0") else "auto"
+
+
+def get_retention_config() -> Dict:
+    """Get data retention settings (days) from config"""
+    return load_database_config().get("retention") or {}
+
+
+def get_user_cache_config() -> Dict:
+    """Get RFID user cache settings from config, with USER_CACHE_ENABLED as an override"""
+    config = dict(load_database_config().get("user_cache") or {})
     
-    if db_name:
-        return db_name
+    enabled = os.getenv("USER_CACHE_ENABLED")
+    if enabled:
+        config["enabled"] = enabled.lower() not in ("off", "false", "no", "0")
     
-    try:
-        import yaml
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "config",
-            "database.yaml"
-        )
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                return config.get("mongodb", {}).get("database", "smart_parking")
-    except Exception:
-        pass
+    return config
+
+
+def get_client_options() -> Dict:
+    """
+    Get MongoClient keyword options (pool sizing, timeouts, compression) from config
     
-    return "smart_parking"
+    Compressors whose Python package is missing are left out so the driver
+    does not warn on every connection; the server picks the first one it
+    also supports.
+    """
+    options = dict(load_database_config().get("options") or {})
+    
+    compressors = options.pop("compressors", None)
+    if compressors:
+        if isinstance(compressors, str):
+            compressors = [name.strip() for name in compressors.split(",")]
+        available = [name for name in compressors
+                     if name not in COMPRESSOR_PACKAGES or importlib.util.find_spec(COMPRESSOR_PACKAGES[name])]
+        if available:
+            options["compressors"] = ",".join(available)
+        skipped = set(compressors) - set(available)
+        if skipped:
+            logger.info(f"MongoDB compressors {sorted(skipped)} unavailable (package not installed)")
+    
+    return options
+
+
+def get_analytics_read_preference() -> str:
+    """Get the read preference mode used by analytics and listing queries"""
+    return (load_database_config().get("read_preference") or {}).get("analytics", "secondaryPreferred")
@@ -2,15 +2,23 @@
 RFID Smart Parking System - FastAPI Backend
 Main Application Entry Point
 """
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
+import asyncio
 import uuid
 import logging
 
-from .database import db_instance, get_database, get_connection_string, get_database_name
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from .database import (
+    db_instance, get_database, get_analytics_database, get_connection_string, get_database_name, get_transaction_mode,
+    get_user_cache_config
+)
 from .models import (
     User, UserCreate, UserUpdate,
     ParkingSession, SessionEntry, SessionExit, SessionReceipt,
@@ -18,7 +26,15 @@ from .models import (
     WalletTransaction, WalletTopup, WalletBalance,
     SystemLog, SystemStatus
 )
+from .pagination import (
+    DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER, page_size, decode_cursor, descending_after, next_cursor
+)
 from .services.billing import billing_service
+from .services.log_sink import log_sink, occupancy_event_sink
+from .services.occupancy_cache import occupancy_cache, SLOT_PROJECTION
+from .services.rollups import occupancy_rollups, GRANULARITIES
+from .services.slot_events import slot_events
+from .services.user_cache import user_cache
 
 # Configure logging
 logging.basicConfig(
@@ -35,13 +51,38 @@ async def lifespan(app: FastAPI):
     logger.info("Starting RFID Smart Parking System Backend")
     connection_string = get_connection_string()
     database_name = get_database_name()
-    await db_instance.connect_to_database(connection_string, database_name)
+    await db_instance.connect_to_database(connection_string, database_name, get_transaction_mode())
+    user_cache_config = get_user_cache_config()
+    user_cache.configure(
+        enabled=user_cache_config.get("enabled"),
+        max_size=user_cache_config.get("max_size"),
+        ttl=user_cache_config.get("ttl_seconds")
+    )
+    await log_sink.start(db_instance.database.system_logs)
+    await occupancy_event_sink.start(db_instance.database.occupancy_events)
+    try:
+        # Other worker processes' slot writes arrive through a change stream where
+        # the server supports one; otherwise only through the periodic drift check
+        await occupancy_cache.start(get_database, watch=db_instance.supports_change_streams)
+    except Exception as e:
+        logger.error(f"Failed to load occupancy cache, reading slots from database: {e}")
+    if not db_instance.supports_change_streams:
+        logger.warning(f"MongoDB has no change streams (standalone server): with several backend workers, "
+                       f"cached slot state and analytics rollups can lag other workers' writes by up to "
+                       f"{occupancy_cache.verify_interval:.0f}s")
+    await occupancy_rollups.start(db_instance.database.occupancy_rollups, list(occupancy_cache.slots.values()),
+                                  db_instance.analytics_database.occupancy_rollups,
+                                  slot_lookup=lambda slot_id: occupancy_cache.slots.get(slot_id))
     logger.info("Backend started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down backend")
+    await occupancy_cache.stop()
+    await occupancy_rollups.stop()
+    await log_sink.stop()
+    await occupancy_event_sink.stop()
     await db_instance.close_database_connection()
     logger.info("Backend shut down complete")
 
@@ -61,6 +102,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -68,6 +110,28 @@ app.add_middleware(
 # UTILITY FUNCTIONS
 # ============================================
 
+def build_log_entry(
+    log_level: str,
+    component: str,
+    event_type: str,
+    message: str,
+    details: Dict = None,
+    rfid_id: str = None,
+    session_id: str = None
+) -> Dict:
+    """Build a system_logs document"""
+    return {
+        "timestamp": datetime.utcnow(),
+        "log_level": log_level,
+        "component": component,
+        "event_type": event_type,
+        "message": message,
+        "details": details,
+        "rfid_id": rfid_id,
+        "session_id": session_id
+    }
+
+
 async def log_event(
     log_level: str,
     component: str,
@@ -77,22 +141,15 @@ async def log_event(
     rfid_id: str = None,
     session_id: str = None
 ):
-    """Log system event to database"""
-    try:
-        db = await get_database()
-        log_entry = {
-            "timestamp": datetime.utcnow(),
-            "log_level": log_level,
-            "component": component,
-            "event_type": event_type,
-            "message": message,
-            "details": details,
-            "rfid_id": rfid_id,
-            "session_id": session_id
-        }
-        await db.system_logs.insert_one(log_entry)
-    except Exception as e:
-        logger.error(f"Failed to log event: {e}")
+    """Queue system event for the background log writer"""
+    log_sink.enqueue(build_log_entry(log_level, component, event_type, message,
+                                     details, rfid_id, session_id))
+
+
+async def log_events(log_entries: List[Dict]):
+    """Queue several system events for the background log writer"""
+    for log_entry in log_entries:
+        log_sink.enqueue(log_entry)
 
 
 def generate_session_id() -> str:
@@ -138,6 +195,8 @@ async def health_check():
     return {
         "status": "healthy" if db_connected else "degraded",
         "database_connected": db_connected,
+        "occupancy_cache": occupancy_cache.get_stats(),
+        "event_stream": slot_events.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -153,7 +212,7 @@ async def create_user(user: UserCreate):
         db = await get_database()
         
         # Check if RFID already exists
-        existing_user = await db.users.find_one({"rfid_id": user.rfid_id})
+        existing_user = await user_cache.fetch(db, user.rfid_id)
         if existing_user:
             raise HTTPException(status_code=400, detail="RFID tag already registered")
         
@@ -171,6 +230,7 @@ async def create_user(user: UserCreate):
         }
         
         result = await db.users.insert_one(user_doc)
+        user_cache.put(user_doc)
         
         await log_event("INFO", "backend", "user_created", 
                        f"New user created: {user.rfid_id}", rfid_id=user.rfid_id)
@@ -193,7 +253,7 @@ async def get_user(rfid_id: str):
     """Get user details by RFID"""
     try:
         db = await get_database()
-        user = await db.users.find_one({"rfid_id": rfid_id})
+        user = await user_cache.fetch(db, rfid_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -212,6 +272,259 @@ async def get_user(rfid_id: str):
 # ENTRY/EXIT ENDPOINTS
 # ============================================
 
+def build_occupancy_event(slot_id: str, occupied: bool, timestamp: datetime, source: str,
+                          camera_id: str = None, session_id: str = None) -> Dict:
+    """Build an occupancy_events time-series document"""
+    if camera_id is None:
+        camera_id = occupancy_cache.slots.get(slot_id, {}).get("camera_id")
+    return {
+        "timestamp": timestamp,
+        "meta": {"slot_id": slot_id, "camera_id": camera_id},
+        "occupied": occupied,
+        "source": source,
+        "session_id": session_id
+    }
+
+
+async def get_slot_camera(db, slot_id: Optional[str]) -> Optional[str]:
+    """Camera watching a slot, from the occupancy cache or the slot document"""
+    if not slot_id:
+        return None
+    slot = occupancy_cache.slots.get(slot_id)
+    if slot is None:
+        slot = await db.slots.find_one({"slot_id": slot_id}, {"_id": 0, "camera_id": 1}) or {}
+    return slot.get("camera_id")
+
+
+def record_occupancy_event(event: Dict):
+    """Queue an occupancy event for storage and apply it to the analytics rollups"""
+    occupancy_event_sink.enqueue(event)
+    occupancy_rollups.record_occupancy(
+        event["meta"]["slot_id"], event["meta"]["camera_id"], event["occupied"], event["timestamp"]
+    )
+
+
+async def run_writes(writes: List, txn=None) -> List:
+    """
+    Await independent write coroutines
+    
+    Operations inside a transaction share one session and must not overlap,
+    so they run in sequence and the first failure is raised. Otherwise they
+    run concurrently and all of them finish before returning; failures come
+    back as exceptions in the result list so the caller knows which writes
+    were applied.
+    
+    Returns:
+        One result (or exception) per write, in order
+    """
+    if txn is not None:
+        return [await write for write in writes]
+    return await asyncio.gather(*writes, return_exceptions=True)
+
+
+def raise_first_error(results: List):
+    """Raise the first exception returned by run_writes, if any"""
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def open_session(db, session_doc: Dict, txn=None):
+    """
+    Insert a parking session and occupy its slot
+    
+    The insert goes first so that the partial unique index on active sessions
+    rejects a second active session (DuplicateKeyError) before the slot is touched.
+    """
+    await db.sessions.insert_one(session_doc, session=txn)
+    
+    # Update slot if specified
+    if session_doc["entry_slot_id"]:
+        await db.slots.update_one(
+            {"slot_id": session_doc["entry_slot_id"]},
+            {
+                "$set": {
+                    "is_occupied": True,
+                    "last_occupied_time": session_doc["entry_time"]
+                }
+            },
+            session=txn
+        )
+
+
+async def undo_exit(db, session: Dict, rfid_id: str, amount_debited: float = 0.0,
+                    transaction_id: Optional[str] = None, slot_freed: bool = False):
+    """
+    Roll back a partly applied exit outside a transaction
+    
+    Reopens the session, and undoes only the later steps that were applied:
+    re-occupies a freed slot, refunds a debit and removes a transaction
+    record that was written, so the driver can retry.
+    """
+    writes = [
+        db.sessions.update_one(
+            {"session_id": session["session_id"]},
+            {
+                "$set": {"status": "active", "exit_time": None},
+                "$unset": {
+                    "exit_camera_id": "",
+                    "duration_minutes": "",
+                    "amount_charged": "",
+                    "wallet_balance_after": ""
+                }
+            }
+        )
+    ]
+    if slot_freed:
+        writes.append(db.slots.update_one(
+            {"slot_id": session["entry_slot_id"]},
+            {"$set": {"is_occupied": True}}
+        ))
+    if amount_debited:
+        writes.append(db.users.update_one(
+            {"rfid_id": rfid_id},
+            {"$inc": {"wallet_balance": amount_debited}, "$set": {"updated_at": datetime.utcnow()}}
+        ))
+    if transaction_id:
+        writes.append(db.transactions.delete_one({"transaction_id": transaction_id}))
+    raise_first_error(await run_writes(writes))
+
+
+async def settle_exit(db, exit_data: SessionExit, txn=None) -> Dict:
+    """
+    Close the active session, charge the wallet and record the transaction
+    
+    With `txn` all writes commit or abort together; without it the session
+    claim and wallet debit are conditional atomic updates and any failure
+    after the claim is undone by undo_exit().
+    
+    Returns:
+        Settlement details for the receipt
+    """
+    # Close the active session in one step; a concurrent exit finds nothing
+    exit_time = datetime.utcnow()
+    session = await db.sessions.find_one_and_update(
+        {"rfid_id": exit_data.rfid_id, "status": "active"},
+        {
+            "$set": {
+                "exit_time": exit_time,
+                "exit_camera_id": exit_data.camera_id,
+                "status": "completed"
+            }
+        },
+        session=txn
+    )
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="No active parking session found")
+    
+    amount_debited = 0.0
+    transaction_id = None
+    transaction_written = False
+    slot_freed = False
+    try:
+        # Calculate fee
+        fee_details = billing_service.calculate_fee(session["entry_time"], exit_time)
+        amount_charged = fee_details["amount"]
+        duration_minutes = fee_details["duration_minutes"]
+        
+        # Deduct from wallet only if the balance covers the fee
+        user = await db.users.find_one_and_update(
+            {"rfid_id": exit_data.rfid_id, "wallet_balance": {"$gte": amount_charged}},
+            {
+                "$inc": {"wallet_balance": -amount_charged},
+                "$set": {"updated_at": exit_time}
+            },
+            return_document=ReturnDocument.AFTER,
+            session=txn
+        )
+        
+        if not user:
+            user = await db.users.find_one({"rfid_id": exit_data.rfid_id}, {"wallet_balance": 1}, session=txn)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            raise HTTPException(
+                status_code=402,
+                detail=f"Insufficient balance. Required: ₹{amount_charged}, Available: ₹{user['wallet_balance']}"
+            )
+        amount_debited = amount_charged
+        
+        new_balance = user["wallet_balance"]
+        wallet_balance = new_balance + amount_charged
+        
+        # Generate transaction
+        transaction_id = generate_transaction_id()
+        transaction_doc = {
+            "transaction_id": transaction_id,
+            "rfid_id": exit_data.rfid_id,
+            "amount": -amount_charged,
+            "transaction_type": "deduction",
+            "balance_before": wallet_balance,
+            "balance_after": new_balance,
+            "timestamp": exit_time,
+            "session_id": session["session_id"],
+            "payment_method": "wallet",
+            "status": "completed"
+        }
+        
+        # The remaining writes are independent of each other
+        writes = [
+            db.transactions.insert_one(transaction_doc, session=txn),
+            db.sessions.update_one(
+                {"session_id": session["session_id"]},
+                {
+                    "$set": {
+                        "duration_minutes": duration_minutes,
+                        "amount_charged": amount_charged,
+                        "wallet_balance_after": new_balance
+                    }
+                },
+                session=txn
+            )
+        ]
+        
+        # Update slot if specified
+        if session.get("entry_slot_id"):
+            writes.append(db.slots.update_one(
+                {"slot_id": session["entry_slot_id"]},
+                {
+                    "$set": {
+                        "is_occupied": False,
+                        "last_freed_time": exit_time
+                    }
+                },
+                session=txn
+            ))
+        
+        # Outside a transaction every write has finished here, failed or not
+        results = await run_writes(writes, txn)
+        transaction_written = not isinstance(results[0], BaseException)
+        slot_freed = len(results) > 2 and not isinstance(results[2], BaseException)
+        raise_first_error(results)
+    except Exception:
+        # A transaction just aborts; otherwise undo what was applied so the driver can retry
+        if txn is None:
+            try:
+                await undo_exit(db, session, exit_data.rfid_id, amount_debited,
+                                transaction_id if transaction_written else None, slot_freed)
+            except Exception as e:
+                logger.error(f"Failed to roll back exit for session {session['session_id']}: {e}")
+        # The cached wallet balance may no longer match the database
+        user_cache.invalidate(exit_data.rfid_id)
+        raise
+    
+    return {
+        "session": session,
+        "exit_time": exit_time,
+        "amount_charged": amount_charged,
+        "duration_minutes": duration_minutes,
+        "wallet_balance_before": wallet_balance,
+        "wallet_balance_after": new_balance,
+        "transaction_id": transaction_id,
+        "user": user
+    }
+
+
 @app.post("/api/entry", response_model=Dict, tags=["Entry/Exit"])
 async def record_entry(entry: SessionEntry):
     """Record vehicle entry and start parking session"""
@@ -219,18 +532,19 @@ async def record_entry(entry: SessionEntry):
         db = await get_database()
         
         # Get user details
-        user = await db.users.find_one({"rfid_id": entry.rfid_id})
+        user = await user_cache.fetch(db, entry.rfid_id)
         if not user:
             raise HTTPException(status_code=404, detail="RFID not registered. Please register first.")
         
-        # Check for active session
-        active_session = await db.sessions.find_one({
-            "rfid_id": entry.rfid_id,
-            "status": "active"
-        })
-        
-        if active_session:
-            raise HTTPException(status_code=400, detail="User already has an active parking session")
+        # The partial unique index rejects a second active session; without it, check first
+        if not db_instance.active_session_index:
+            active_session = await db.sessions.find_one({
+                "rfid_id": entry.rfid_id,
+                "status": "active"
+            })
+            
+            if active_session:
+                raise HTTPException(status_code=400, detail="User already has an active parking session")
         
         # Check slot availability
         if entry.slot_id:
@@ -258,26 +572,23 @@ async def record_entry(entry: SessionEntry):
             "notes": None
         }
         
-        await db.sessions.insert_one(session_doc)
+        # One active session per RFID is enforced by the partial unique index when present
+        try:
+            if db_instance.supports_transactions:
+                async with await db_instance.client.start_session() as txn:
+                    await txn.with_transaction(lambda session: open_session(db, session_doc, session))
+            else:
+                await open_session(db, session_doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="User already has an active parking session")
         
-        # Update slot if specified
+        # Time-series collections cannot be written inside a transaction
+        occupancy_cache.session_started()
         if entry.slot_id:
-            await db.slots.update_one(
-                {"slot_id": entry.slot_id},
-                {
-                    "$set": {
-                        "is_occupied": True,
-                        "last_occupied_time": entry_time
-                    },
-                    "$push": {
-                        "occupancy_history": {
-                            "timestamp": entry_time,
-                            "occupied": True,
-                            "session_id": session_id
-                        }
-                    }
-                }
-            )
+            occupancy_cache.set_occupied(entry.slot_id, True, entry_time)
+            record_occupancy_event(build_occupancy_event(
+                entry.slot_id, True, entry_time, source="entry", session_id=session_id
+            ))
         
         await log_event("INFO", "backend", "entry_recorded",
                        f"Entry recorded for {entry.rfid_id}",
@@ -308,96 +619,38 @@ async def record_exit(exit_data: SessionExit):
     try:
         db = await get_database()
         
-        # Find active session
-        session = await db.sessions.find_one({
-            "rfid_id": exit_data.rfid_id,
-            "status": "active"
-        })
-        
-        if not session:
-            raise HTTPException(status_code=404, detail="No active parking session found")
-        
-        # Get user
-        user = await db.users.find_one({"rfid_id": exit_data.rfid_id})
-        
-        # Calculate fee
-        exit_time = datetime.utcnow()
-        fee_details = billing_service.calculate_fee(session["entry_time"], exit_time)
-        amount_charged = fee_details["amount"]
-        duration_minutes = fee_details["duration_minutes"]
-        
-        # Check wallet balance
-        wallet_balance = user["wallet_balance"]
-        if wallet_balance < amount_charged:
-            raise HTTPException(
-                status_code=402,
-                detail=f"Insufficient balance. Required: ₹{amount_charged}, Available: ₹{wallet_balance}"
-            )
-        
-        # Deduct from wallet
-        new_balance = wallet_balance - amount_charged
-        
-        # Generate transaction
-        transaction_id = generate_transaction_id()
-        transaction_doc = {
-            "transaction_id": transaction_id,
-            "rfid_id": exit_data.rfid_id,
-            "amount": -amount_charged,
-            "transaction_type": "deduction",
-            "balance_before": wallet_balance,
-            "balance_after": new_balance,
-            "timestamp": exit_time,
-            "session_id": session["session_id"],
-            "payment_method": "wallet",
-            "status": "completed"
-        }
-        
-        await db.transactions.insert_one(transaction_doc)
-        
-        # Update user wallet
-        await db.users.update_one(
-            {"rfid_id": exit_data.rfid_id},
-            {
-                "$set": {
-                    "wallet_balance": new_balance,
-                    "updated_at": exit_time
-                }
-            }
-        )
-        
-        # Update session
-        await db.sessions.update_one(
-            {"session_id": session["session_id"]},
-            {
-                "$set": {
-                    "exit_time": exit_time,
-                    "exit_camera_id": exit_data.camera_id,
-                    "duration_minutes": duration_minutes,
-                    "amount_charged": amount_charged,
-                    "wallet_balance_after": new_balance,
-                    "status": "completed"
-                }
-            }
-        )
-        
-        # Update slot if specified
+        # Taken before the debit so a concurrent top-up's cached result is not overwritten
+        user_generation = user_cache.generation(exit_data.rfid_id)
+        if db_instance.supports_transactions:
+            async with await db_instance.client.start_session() as txn:
+                settlement = await txn.with_transaction(lambda session: settle_exit(db, exit_data, session))
+        else:
+            settlement = await settle_exit(db, exit_data)
+        
+        session = settlement["session"]
+        exit_time = settlement["exit_time"]
+        amount_charged = settlement["amount_charged"]
+        duration_minutes = settlement["duration_minutes"]
+        wallet_balance = settlement["wallet_balance_before"]
+        new_balance = settlement["wallet_balance_after"]
+        transaction_id = settlement["transaction_id"]
+        # Cache the debited user only once the settlement has committed
+        user_cache.put(settlement["user"], user_generation)
+        
+        # Time-series collections cannot be written inside a transaction
+        occupancy_cache.session_ended()
         if session.get("entry_slot_id"):
-            await db.slots.update_one(
-                {"slot_id": session["entry_slot_id"]},
-                {
-                    "$set": {
-                        "is_occupied": False,
-                        "last_freed_time": exit_time
-                    },
-                    "$push": {
-                        "occupancy_history": {
-                            "timestamp": exit_time,
-                            "occupied": False,
-                            "session_id": session["session_id"]
-                        }
-                    }
-                }
-            )
+            occupancy_cache.set_occupied(session["entry_slot_id"], False, exit_time)
+            record_occupancy_event(build_occupancy_event(
+                session["entry_slot_id"], False, exit_time, source="exit",
+                session_id=session["session_id"]
+            ))
+        # Free (grace period) sessions still count towards sessions and dwell time.
+        # Bucket them under the slot's camera, like its occupancy; the entry
+        # camera is the gate's and only used when the slot is unknown
+        camera_id = await get_slot_camera(db, session.get("entry_slot_id")) or session.get("entry_camera_id")
+        occupancy_rollups.record_settlement(session.get("entry_slot_id"), camera_id, exit_time,
+                                            amount_charged, duration_minutes)
         
         await log_event("INFO", "backend", "exit_recorded",
                        f"Exit recorded for {exit_data.rfid_id}, charged ₹{amount_charged}",
@@ -439,7 +692,7 @@ async def get_wallet_balance(rfid_id: str):
     """Get wallet balance for user"""
     try:
         db = await get_database()
-        user = await db.users.find_one({"rfid_id": rfid_id})
+        user = await user_cache.fetch(db, rfid_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -465,14 +718,23 @@ async def topup_wallet(topup: WalletTopup):
     try:
         db = await get_database()
         
-        # Get user
-        user = await db.users.find_one({"rfid_id": topup.rfid_id})
+        # Credit atomically so concurrent top-ups and exits never overwrite each other
+        topup_time = datetime.utcnow()
+        user_generation = user_cache.generation(topup.rfid_id)
+        user = await db.users.find_one_and_update(
+            {"rfid_id": topup.rfid_id},
+            {
+                "$inc": {"wallet_balance": topup.amount},
+                "$set": {"updated_at": topup_time}
+            },
+            return_document=ReturnDocument.AFTER
+        )
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
+        user_cache.put(user, user_generation)
         
-        # Calculate new balance
-        current_balance = user["wallet_balance"]
-        new_balance = current_balance + topup.amount
+        new_balance = user["wallet_balance"]
+        current_balance = new_balance - topup.amount
         
         # Create transaction
         transaction_id = generate_transaction_id()
@@ -483,30 +745,20 @@ async def topup_wallet(topup: WalletTopup):
             "transaction_type": "topup",
             "balance_before": current_balance,
             "balance_after": new_balance,
-            "timestamp": datetime.utcnow(),
+            "timestamp": topup_time,
             "payment_method": topup.payment_method,
             "payment_reference": topup.payment_reference,
             "status": "completed"
         }
         
-        await db.transactions.insert_one(transaction_doc)
-        
-        # Update user wallet
-        await db.users.update_one(
-            {"rfid_id": topup.rfid_id},
-            {
-                "$set": {
-                    "wallet_balance": new_balance,
-                    "updated_at": datetime.utcnow()
-                }
-            }
+        await asyncio.gather(
+            db.transactions.insert_one(transaction_doc),
+            log_event("INFO", "backend", "wallet_topup",
+                      f"Wallet topped up: {topup.rfid_id}, amount: ₹{topup.amount}",
+                      details={"transaction_id": transaction_id},
+                      rfid_id=topup.rfid_id)
         )
         
-        await log_event("INFO", "backend", "wallet_topup",
-                       f"Wallet topped up: {topup.rfid_id}, amount: ₹{topup.amount}",
-                       details={"transaction_id": transaction_id},
-                       rfid_id=topup.rfid_id)
-        
         return {
             "message": "Wallet topped up successfully",
             "transaction_id": transaction_id,
@@ -523,15 +775,40 @@ async def topup_wallet(topup: WalletTopup):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+TRANSACTION_LIST_PROJECTION = {
+    "transaction_id": 1,
+    "rfid_id": 1,
+    "amount": 1,
+    "transaction_type": 1,
+    "balance_before": 1,
+    "balance_after": 1,
+    "timestamp": 1,
+    "session_id": 1,
+    "payment_method": 1,
+    "status": 1
+}
+
+
 @app.get("/api/wallet/history/{rfid_id}", response_model=List[Dict], tags=["Wallet"])
-async def get_transaction_history(rfid_id: str, limit: int = 20):
-    """Get transaction history for user"""
+async def get_transaction_history(rfid_id: str, response: Response, limit: int = 20,
+                                  cursor: Optional[str] = None):
+    """
+    Get transaction history for user, newest first
+    
+    When more transactions remain, the X-Next-Cursor response header holds
+    the cursor for the next page.
+    """
+    limit = page_size(limit)
+    query = {"rfid_id": rfid_id, **descending_after("timestamp", cursor)}
     try:
-        db = await get_database()
+        db = await get_analytics_database()
+        
+        transactions = await db.transactions.find(query, TRANSACTION_LIST_PROJECTION) \
+            .sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
         
-        transactions = await db.transactions.find(
-            {"rfid_id": rfid_id}
-        ).sort("timestamp", -1).limit(limit).to_list(length=limit)
+        cursor = next_cursor(transactions, limit, ("timestamp", "_id"))
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
         
         # Convert ObjectId to string
         for txn in transactions:
@@ -549,33 +826,50 @@ async def get_transaction_history(rfid_id: str, limit: int = 20):
 # SLOT MANAGEMENT ENDPOINTS
 # ============================================
 
+def build_slot_update_doc(slot_update: SlotUpdate, update_time: datetime) -> Dict:
+    """Build the upsert document for a slot occupancy update"""
+    return {
+        "$set": {
+            "is_occupied": slot_update.is_occupied,
+            "last_occupied_time" if slot_update.is_occupied else "last_freed_time": update_time
+        },
+        "$setOnInsert": {
+            "slot_id": slot_update.slot_id,
+            "camera_id": slot_update.camera_id,
+            "slot_name": slot_update.slot_id,
+            "is_active": True
+        }
+    }
+
+
+def build_slot_update_log(slot_update: SlotUpdate) -> Dict:
+    """Build the system log entry for a slot occupancy update"""
+    return build_log_entry(
+        "DEBUG", "vision", "slot_update",
+        f"Slot {slot_update.slot_id} updated: {'occupied' if slot_update.is_occupied else 'free'}",
+        details={"camera_id": slot_update.camera_id}
+    )
+
+
 @app.post("/api/slots/update", response_model=Dict, tags=["Slots"])
 async def update_slot_occupancy(slot_update: SlotUpdate):
     """Update slot occupancy status (called by vision service)"""
     try:
         db = await get_database()
         
-        update_time = slot_update.timestamp or datetime.utcnow()
-        
         # Update or create slot
-        update_doc = {
-            "$set": {
-                "is_occupied": slot_update.is_occupied,
-                "last_occupied_time" if slot_update.is_occupied else "last_freed_time": update_time
-            },
-            "$setOnInsert": {
-                "slot_id": slot_update.slot_id,
-                "camera_id": slot_update.camera_id,
-                "slot_name": slot_update.slot_id,
-                "is_active": True
-            }
-        }
-        
+        update_time = slot_update.timestamp or datetime.utcnow()
         result = await db.slots.update_one(
             {"slot_id": slot_update.slot_id},
-            update_doc,
+            build_slot_update_doc(slot_update, update_time),
             upsert=True
         )
+        occupancy_cache.set_occupied(slot_update.slot_id, slot_update.is_occupied,
+                                     update_time, slot_update.camera_id)
+        record_occupancy_event(build_occupancy_event(
+            slot_update.slot_id, slot_update.is_occupied, update_time,
+            source="vision", camera_id=slot_update.camera_id
+        ))
         
         await log_event("DEBUG", "vision", "slot_update",
                        f"Slot {slot_update.slot_id} updated: {'occupied' if slot_update.is_occupied else 'free'}",
@@ -592,13 +886,95 @@ async def update_slot_occupancy(slot_update: SlotUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/slots", response_model=List[SlotStatus], tags=["Slots"])
-async def get_all_slots():
-    """Get all slot statuses"""
+@app.post("/api/slots/bulk-update", response_model=Dict, tags=["Slots"])
+async def bulk_update_slot_occupancy(slot_updates: List[SlotUpdate]):
+    """Update many slots in one round-trip (called by vision service)"""
     try:
         db = await get_database()
         
-        slots = await db.slots.find({"is_active": True}).to_list(length=100)
+        # Last update wins when a slot appears more than once
+        latest = {}
+        for slot_update in slot_updates:
+            latest.pop(slot_update.slot_id, None)
+            latest[slot_update.slot_id] = slot_update
+        updates = list(latest.values())
+        
+        if not updates:
+            return {"message": "No slot updates", "updated": 0, "results": []}
+        
+        update_times = [update.timestamp or datetime.utcnow() for update in updates]
+        operations = [
+            UpdateOne({"slot_id": update.slot_id}, build_slot_update_doc(update, update_time), upsert=True)
+            for update, update_time in zip(updates, update_times)
+        ]
+        
+        # Unordered: one failing slot does not block the rest
+        errors = {}
+        upserted = set()
+        try:
+            result = await db.slots.bulk_write(operations, ordered=False)
+            upserted = set(result.upserted_ids)
+        except BulkWriteError as e:
+            errors = {error["index"]: error.get("errmsg", "write failed")
+                      for error in e.details.get("writeErrors", [])}
+            upserted = {item["index"] for item in e.details.get("upserted", [])}
+        
+        results = []
+        for index, (update, update_time) in enumerate(zip(updates, update_times)):
+            result_entry = {"slot_id": update.slot_id, "is_occupied": update.is_occupied}
+            if index in errors:
+                result_entry.update(status="error", detail=errors[index])
+            else:
+                result_entry["status"] = "created" if index in upserted else "updated"
+                occupancy_cache.set_occupied(update.slot_id, update.is_occupied,
+                                             update_time, update.camera_id)
+                record_occupancy_event(build_occupancy_event(
+                    update.slot_id, update.is_occupied, update_time,
+                    source="vision", camera_id=update.camera_id
+                ))
+            results.append(result_entry)
+        
+        await log_events([
+            build_slot_update_log(update)
+            for index, update in enumerate(updates) if index not in errors
+        ])
+        
+        return {
+            "message": "Slots updated" if not errors else "Slots partially updated",
+            "updated": len(updates) - len(errors),
+            "failed": len(errors),
+            "results": results
+        }
+    
+    except Exception as e:
+        logger.error(f"Error bulk updating slots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/slots", response_model=List[SlotStatus], tags=["Slots"])
+async def get_all_slots(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    Get slot statuses in slot_id order
+    
+    Returns up to `limit` slots; when more remain, the X-Next-Cursor response
+    header holds the cursor for the next page.
+    """
+    limit = page_size(limit)
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    try:
+        if occupancy_cache.loaded:
+            slots = occupancy_cache.get_slots(limit=limit + 1, after=after)
+        else:
+            db = await get_analytics_database()
+            query = {"is_active": True}
+            if after is not None:
+                query["slot_id"] = {"$gt": after}
+            slots = await db.slots.find(query, SLOT_PROJECTION).sort("slot_id", 1) \
+                .limit(limit + 1).to_list(length=limit + 1)
+        
+        cursor = next_cursor(slots, limit, ("slot_id",))
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
         
         slot_statuses = []
         for slot in slots:
@@ -626,18 +1002,26 @@ async def get_all_slots():
 async def get_system_status():
     """Get overall system status"""
     try:
-        db = await get_database()
-        
-        # Count slots
-        total_slots = await db.slots.count_documents({"is_active": True})
-        occupied_slots = await db.slots.count_documents({"is_active": True, "is_occupied": True})
-        free_slots = total_slots - occupied_slots
-        
-        # Count active sessions
-        active_sessions = await db.sessions.count_documents({"status": "active"})
-        
-        # Get unique cameras
-        cameras = await db.slots.distinct("camera_id")
+        if occupancy_cache.loaded:
+            cached = occupancy_cache.get_status()
+            total_slots = cached["total_slots"]
+            occupied_slots = cached["occupied_slots"]
+            free_slots = cached["free_slots"]
+            active_sessions = cached["active_sessions"]
+            cameras = cached["cameras"]
+        else:
+            db = await get_database()
+            
+            # Count slots
+            total_slots = await db.slots.count_documents({"is_active": True})
+            occupied_slots = await db.slots.count_documents({"is_active": True, "is_occupied": True})
+            free_slots = total_slots - occupied_slots
+            
+            # Count active sessions
+            active_sessions = await db.sessions.count_documents({"status": "active"})
+            
+            # Get unique cameras
+            cameras = await db.slots.distinct("camera_id")
         
         return SystemStatus(
             any_slot_available=free_slots > 0,
@@ -656,15 +1040,170 @@ async def get_system_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/events", tags=["Status"])
+async def stream_slot_events():
+    """
+    Server-sent event stream of slot and status changes
+    
+    Sends a `snapshot` event on connect, then `slot` and `status` deltas.
+    Clients that fall behind receive a fresh `snapshot` instead of the backlog.
+    """
+    return StreamingResponse(
+        slot_events.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/metrics", response_model=Dict, tags=["Status"])
+async def get_metrics():
+    """Internal queue and cache metrics"""
+    return {
+        "log_sink": log_sink.get_stats(),
+        "occupancy_event_sink": occupancy_event_sink.get_stats(),
+        "occupancy_cache": occupancy_cache.get_stats(),
+        "event_stream": slot_events.get_stats(),
+        "occupancy_rollups": occupancy_rollups.get_stats(),
+        "user_cache": user_cache.get_stats(),
+        "database_pool": db_instance.pool_monitor.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+# ============================================
+# ANALYTICS ENDPOINTS
+# ============================================
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC form stored in MongoDB"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def resolve_analytics_range(granularity: str, start: Optional[datetime], end: Optional[datetime]):
+    """Validate granularity and default the range to the last 24 hours / 30 days"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {list(GRANULARITIES)}")
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    end = end or datetime.utcnow()
+    start = start or end - (timedelta(days=1) if granularity == "hour" else timedelta(days=30))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+
+async def count_slots_by_camera() -> Dict[str, int]:
+    """Active slot count per camera, used to turn rollup sums into rates"""
+    if occupancy_cache.loaded:
+        slots = occupancy_cache.get_slots(limit=None)
+    else:
+        db = await get_analytics_database()
+        slots = await db.slots.find({"is_active": True}, {"_id": 0, "camera_id": 1}).to_list(length=None)
+
+    counts = {}
+    for slot in slots:
+        counts[slot.get("camera_id")] = counts.get(slot.get("camera_id"), 0) + 1
+    return counts
+
+
+@app.get("/api/analytics/occupancy", response_model=Dict, tags=["Analytics"])
+async def get_occupancy_analytics(granularity: str = "hour", start: Optional[datetime] = None,
+                                  end: Optional[datetime] = None, camera_id: Optional[str] = None,
+                                  group_by: str = "camera"):
+    """
+    Occupancy rate, turnover and dwell time per hour/day bucket
+
+    Reads the pre-aggregated occupancy_rollups collection only; group_by is
+    "camera" or "slot".
+    """
+    start, end = resolve_analytics_range(granularity, start, end)
+    try:
+        rows = await occupancy_rollups.query(granularity, start, end, group_by, camera_id)
+        slot_counts = {} if group_by == "slot" else await count_slots_by_camera()
+        bucket_seconds = GRANULARITIES[granularity].total_seconds()
+
+        buckets = []
+        for row in rows:
+            slots = 1 if group_by == "slot" else max(slot_counts.get(row["camera_id"], 0), 1)
+            buckets.append({
+                **{key: row[key] for key in ("bucket", "camera_id", "slot_id") if key in row},
+                "occupied_minutes": round(row["occupied_seconds"] / 60, 1),
+                "occupancy_rate": round(min(row["occupied_seconds"] / (slots * bucket_seconds), 1.0), 4),
+                "entries": int(row["entries"]),
+                "exits": int(row["exits"]),
+                "turnover": round(row["entries"] / slots, 2),
+                "avg_dwell_minutes": round(row["dwell_minutes"] / row["sessions"], 1) if row["sessions"] else None
+            })
+
+        return {"granularity": granularity, "start": start, "end": end, "buckets": buckets}
+
+    except Exception as e:
+        logger.error(f"Error fetching occupancy analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/analytics/revenue", response_model=Dict, tags=["Analytics"])
+async def get_revenue_analytics(granularity: str = "day", start: Optional[datetime] = None,
+                                end: Optional[datetime] = None, camera_id: Optional[str] = None):
+    """Revenue and completed sessions per hour/day bucket, from occupancy_rollups only"""
+    start, end = resolve_analytics_range(granularity, start, end)
+    try:
+        rows = await occupancy_rollups.query(granularity, start, end, "camera", camera_id)
+
+        buckets = [{
+            "bucket": row["bucket"],
+            "camera_id": row["camera_id"],
+            "revenue": round(row["revenue"], 2),
+            "sessions": int(row["sessions"]),
+            "avg_dwell_minutes": round(row["dwell_minutes"] / row["sessions"], 1) if row["sessions"] else None
+        } for row in rows if row["sessions"]]
+
+        return {
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "total_revenue": round(sum(bucket["revenue"] for bucket in buckets), 2),
+            "total_sessions": sum(bucket["sessions"] for bucket in buckets),
+            "buckets": buckets
+        }
+
+    except Exception as e:
+        logger.error(f"Error fetching revenue analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+SESSION_LIST_PROJECTION = {
+    "session_id": 1,
+    "rfid_id": 1,
+    "vehicle_no": 1,
+    "entry_time": 1,
+    "entry_camera_id": 1,
+    "entry_slot_id": 1,
+    "wallet_balance_before": 1,
+    "status": 1
+}
+
+
 @app.get("/api/sessions/active", response_model=List[Dict], tags=["Sessions"])
-async def get_active_sessions():
-    """Get all active parking sessions"""
+async def get_active_sessions(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    Get active parking sessions, newest first
+    
+    Returns up to `limit` sessions; when more remain, the X-Next-Cursor
+    response header holds the cursor for the next page.
+    """
+    limit = page_size(limit)
+    query = {"status": "active", **descending_after("entry_time", cursor)}
     try:
-        db = await get_database()
+        db = await get_analytics_database()
+        
+        sessions = await db.sessions.find(query, SESSION_LIST_PROJECTION) \
+            .sort([("entry_time", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
         
-        sessions = await db.sessions.find(
-            {"status": "active"}
-        ).sort("entry_time", -1).to_list(length=100)
+        cursor = next_cursor(sessions, limit, ("entry_time", "_id"))
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
         
         for session in sessions:
             session['_id'] = str(session['_id'])
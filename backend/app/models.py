@@ -168,7 +168,6 @@ class ParkingSlot(BaseModel):
     is_occupied: bool = Field(default=False, description="Current occupancy status")
     last_occupied_time: Optional[datetime] = Field(None, description="Last time slot was occupied")
     last_freed_time: Optional[datetime] = Field(None, description="Last time slot became free")
-    occupancy_history: List[dict] = Field(default_factory=list, description="Historical occupancy data")
     slot_type: str = Field(default="standard", description="Slot type: standard, compact, disabled, etc.")
     is_active: bool = Field(default=True, description="Whether slot is active/available")
 
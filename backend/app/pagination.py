@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination helpers
+Cursors are opaque URL-safe tokens holding the sort key of the last row
+returned, so each page is an index range scan rather than an offset skip
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import base64
+import json
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_size(limit: int) -> int:
+    """Clamp a requested page size to [1, MAX_PAGE_SIZE]"""
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: List) -> str:
+    """Encode sort key values (datetimes, ObjectIds, strings) as an opaque cursor"""
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append({"d": value.isoformat()})
+        elif isinstance(value, ObjectId):
+            encoded.append({"o": str(value)})
+        else:
+            encoded.append({"s": value})
+    raw = json.dumps(encoded, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = []
+        for item in json.loads(raw):
+            if "d" in item:
+                values.append(datetime.fromisoformat(item["d"]))
+            elif "o" in item:
+                values.append(ObjectId(item["o"]))
+            else:
+                values.append(item["s"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def descending_after(field: str, cursor: Optional[str]) -> Dict:
+    """
+    Filter for rows after the cursor in (field desc, _id desc) order
+
+    The _id tie-breaker keeps pages stable when several rows share a timestamp.
+    """
+    if not cursor:
+        return {}
+    value, last_id = decode_cursor(cursor, 2)
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": last_id}}
+    ]}
+
+
+def next_cursor(rows: List[Dict], limit: int, key_fields: Tuple[str, ...]) -> Optional[str]:
+    """
+    Cursor for the page after rows, or None on the last page
+
+    Expects rows fetched with limit + 1; the extra row is removed in place.
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    return encode_cursor([rows[-1][field] for field in key_fields])
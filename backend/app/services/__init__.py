@@ -2,5 +2,11 @@
 Business logic services
 """
 from .billing import billing_service
+from .log_sink import log_sink, occupancy_event_sink
+from .occupancy_cache import occupancy_cache
+from .rollups import occupancy_rollups
+from .slot_events import slot_events
+from .user_cache import user_cache
 
-__all__ = ['billing_service']
+__all__ = ['billing_service', 'log_sink', 'occupancy_event_sink', 'occupancy_cache', 'occupancy_rollups',
+           'slot_events', 'user_cache']
@@ -0,0 +1,124 @@
+"""
+Buffered System Log Writer
+Queues system_logs entries (and occupancy events) in memory and writes them
+in batches from a background task so request handlers never wait on inserts
+"""
+from collections import deque
+from typing import Dict, Optional
+import asyncio
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+
+class LogSink:
+    """Bounded in-memory log queue flushed with insert_many"""
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 1.0,
+                 pressure_ratio: float = 0.5, debug_sample_rate: float = 0.1):
+        """
+        Args:
+            max_queue: Entries held before new ones are dropped
+            batch_size: Entries that trigger an immediate flush
+            flush_interval: Longest time an entry waits before being written (seconds)
+            pressure_ratio: Queue fill ratio above which DEBUG entries are sampled
+            debug_sample_rate: Fraction of DEBUG entries kept under pressure
+        """
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.pressure_ratio = pressure_ratio
+        self.debug_sample_rate = debug_sample_rate
+
+        self.queue = deque()
+        self.collection = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+
+        # Statistics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.debug_sampled_out = 0
+        self.flush_errors = 0
+
+    def enqueue(self, entry: Dict):
+        """Queue a log entry without waiting for the database"""
+        depth = len(self.queue)
+        if depth >= self.max_queue:
+            self.dropped += 1
+            return
+
+        if (entry.get("log_level") == "DEBUG" and depth >= self.max_queue * self.pressure_ratio
+                and random.random() >= self.debug_sample_rate):
+            self.debug_sampled_out += 1
+            return
+
+        self.queue.append(entry)
+        self.enqueued += 1
+        if self.wakeup is not None and len(self.queue) >= self.batch_size:
+            self.wakeup.set()
+
+    async def flush(self):
+        """Write up to batch_size queued entries"""
+        batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+        if not batch or self.collection is None:
+            return
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except Exception as e:
+            self.flush_errors += 1
+            self.dropped += len(batch)
+            logger.error(f"Failed to write {len(batch)} log entries: {e}")
+
+    async def run(self):
+        """Flush loop: write when a batch fills up or the interval elapses"""
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            while self.queue:
+                await self.flush()
+                if len(self.queue) < self.batch_size:
+                    break
+
+    async def start(self, collection):
+        """Start flushing into the given collection"""
+        self.collection = collection
+        self.stopping = False
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the flush loop and write everything still queued"""
+        if self.task:
+            # Let an in-flight insert finish rather than cancelling it
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        while self.queue and self.collection is not None:
+            await self.flush()
+        logger.info(f"Log sink drained: {self.get_stats()}")
+
+    def get_stats(self) -> Dict:
+        """Get queue statistics"""
+        return {
+            "queue_depth": len(self.queue),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "debug_sampled_out": self.debug_sampled_out,
+            "flush_errors": self.flush_errors
+        }
+
+
+# Global log sink instances
+log_sink = LogSink()
+occupancy_event_sink = LogSink(max_queue=50000)
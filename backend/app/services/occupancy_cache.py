@@ -0,0 +1,308 @@
+"""
+In-Memory Slot Occupancy Cache
+Serves slot and status reads without database round-trips; kept current by
+the slot update and entry/exit write paths, and by a change stream for writes
+made by other backend processes
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+SLOT_PROJECTION = {
+    "_id": 0,
+    "slot_id": 1,
+    "slot_name": 1,
+    "camera_id": 1,
+    "is_occupied": 1,
+    "is_active": 1,
+    "slot_type": 1,
+    "last_occupied_time": 1,
+    "last_freed_time": 1
+}
+
+# Change stream filter: slot writes, and session writes that can change the active count
+WATCHED_CHANGES = [{"$match": {"$or": [
+    {"ns.coll": "slots"},
+    {"ns.coll": "sessions", "operationType": {"$in": ["insert", "replace", "delete"]}},
+    {"ns.coll": "sessions", "updateDescription.updatedFields.status": {"$exists": True}}
+]}}]
+
+
+class OccupancyCache:
+    """Process-local copy of slot occupancy and active session count"""
+
+    def __init__(self, verify_interval: float = 30.0, watch_retry_delay: float = 5.0):
+        """
+        Args:
+            verify_interval: Seconds between drift checks against the database
+            watch_retry_delay: Seconds before reopening a failed change stream
+        """
+        self.verify_interval = verify_interval
+        self.slots: Dict[str, Dict] = {}
+        self.total_slots = 0
+        self.occupied_slots = 0
+        self.active_sessions = 0
+        self.cameras = set()
+        self.loaded = False
+        self.last_loaded: Optional[datetime] = None
+        self.watch_retry_delay = watch_retry_delay
+        self.task: Optional[asyncio.Task] = None
+        self.watch_task: Optional[asyncio.Task] = None
+        self.watching = False
+        self.listeners: List[Callable[[Optional[Dict], Optional[Dict]], None]] = []
+
+        # Statistics
+        self.reloads = 0
+        self.drift_detected = 0
+        self.external_changes = 0
+
+    async def load(self, db):
+        """Rebuild the cache from the database"""
+        slots = await db.slots.find({}, SLOT_PROJECTION).to_list(length=None)
+        active_sessions = await db.sessions.count_documents({"status": "active"})
+
+        self.slots = {slot["slot_id"]: slot for slot in slots}
+        self.total_slots = sum(1 for slot in slots if slot.get("is_active", False))
+        self.occupied_slots = sum(1 for slot in slots if self.counts_as_occupied(slot))
+        self.cameras = {slot["camera_id"] for slot in slots if slot.get("camera_id")}
+        self.active_sessions = active_sessions
+        self.loaded = True
+        self.last_loaded = datetime.utcnow()
+        self.reloads += 1
+        logger.info(f"Occupancy cache loaded: {len(self.slots)} slots, "
+                    f"{self.occupied_slots} occupied, {active_sessions} active sessions")
+        self.notify(reloaded=True)
+
+    def add_listener(self, listener: Callable[[Optional[Dict], Optional[Dict]], None]):
+        """
+        Register a change listener
+
+        listener(slot, status) is called after every slot change (slot is None
+        when only the counters changed) and listener(None, None) after a reload.
+        """
+        self.listeners.append(listener)
+
+    def notify(self, slot: Optional[Dict] = None, reloaded: bool = False):
+        status = None if reloaded else self.get_status()
+        for listener in self.listeners:
+            try:
+                listener(slot, status)
+            except Exception as e:
+                logger.error(f"Occupancy cache listener failed: {e}")
+
+    @staticmethod
+    def slot_state(slot: Dict) -> tuple:
+        """Fields a slot must agree on between the cache and the database"""
+        return (slot.get("is_active", False), slot.get("is_occupied", False), slot.get("camera_id"))
+
+    async def verify(self, db) -> bool:
+        """
+        Compare cached slot states and session count with the database and
+        reload on mismatch
+
+        Slots are compared one by one; matching totals can hide a slot freed
+        and another occupied behind the cache's back.
+
+        Returns:
+            True if the cache was consistent
+        """
+        slots = await db.slots.find({}, {"_id": 0, "slot_id": 1, "is_active": 1,
+                                         "is_occupied": 1, "camera_id": 1}).to_list(length=None)
+        active_sessions = await db.sessions.count_documents({"status": "active"})
+
+        drifted = [
+            slot["slot_id"] for slot in slots
+            if slot["slot_id"] not in self.slots
+            or self.slot_state(self.slots[slot["slot_id"]]) != self.slot_state(slot)
+        ]
+        missing = len(set(self.slots) - {slot["slot_id"] for slot in slots})
+        if not drifted and not missing and active_sessions == self.active_sessions:
+            return True
+
+        self.drift_detected += 1
+        logger.warning(f"Occupancy cache drift ({len(drifted)} slot(s) differ, e.g. {drifted[:5]}; "
+                       f"{missing} slot(s) gone; active sessions cached {self.active_sessions}, "
+                       f"database {active_sessions}), reloading")
+        await self.load(db)
+        return False
+
+    async def run_verifier(self, get_database):
+        """Background drift check loop"""
+        while True:
+            await asyncio.sleep(self.verify_interval)
+            try:
+                await self.verify(await get_database())
+            except Exception as e:
+                logger.error(f"Occupancy cache verification failed: {e}")
+
+    async def run_watcher(self, get_database):
+        """
+        Follow slot and session writes from every backend process
+
+        Each (re)open reloads the cache and resumes the stream from the cluster
+        time taken before the reload, so no write falls in between.
+        """
+        while True:
+            try:
+                db = await get_database()
+                started = (await db.command("ping")).get("operationTime")
+                await self.load(db)
+                async with db.watch(WATCHED_CHANGES, full_document="updateLookup",
+                                    start_at_operation_time=started) as stream:
+                    self.watching = True
+                    async for change in stream:
+                        await self.apply_change(db, change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Occupancy change stream failed, reopening in {self.watch_retry_delay}s: {e}")
+            self.watching = False
+            await asyncio.sleep(self.watch_retry_delay)
+
+    async def apply_change(self, db, change: Dict):
+        """Apply one change stream event"""
+        if change["ns"]["coll"] == "sessions":
+            active_sessions = await db.sessions.count_documents({"status": "active"})
+            if active_sessions != self.active_sessions:
+                self.active_sessions = active_sessions
+                self.notify()
+        elif change["operationType"] in ("insert", "update", "replace"):
+            if change.get("fullDocument"):
+                self.apply_slot(change["fullDocument"])
+        else:
+            # Deleted slots are only known by _id; rebuild
+            await self.load(db)
+
+    def apply_slot(self, document: Dict):
+        """
+        Bring a cached slot in line with its database document
+
+        Writes made by this process were already applied by set_occupied and
+        only refresh timestamps here; anything else came from another process.
+        """
+        fields = {field: document[field] for field in SLOT_PROJECTION if field in document and field != "_id"}
+        slot = self.slots.get(document["slot_id"])
+        if slot is not None and self.slot_state(slot) == self.slot_state(fields):
+            slot.update(fields)
+            return
+
+        was_active = bool(slot and slot.get("is_active", False))
+        was_occupied = bool(slot and self.counts_as_occupied(slot))
+        if slot is None:
+            slot = self.slots[document["slot_id"]] = {}
+        slot.update(fields)
+        self.total_slots += slot.get("is_active", False) - was_active
+        self.occupied_slots += self.counts_as_occupied(slot) - was_occupied
+        if slot.get("camera_id"):
+            self.cameras.add(slot["camera_id"])
+        self.external_changes += 1
+        self.notify(slot)
+
+    async def start(self, get_database, watch: bool = False):
+        """
+        Load the cache and start periodic drift checks
+
+        Args:
+            get_database: Coroutine returning the database
+            watch: Also follow writes from other processes through a change
+                stream (needs a replica set or sharded cluster)
+        """
+        await self.load(await get_database())
+        self.task = asyncio.create_task(self.run_verifier(get_database))
+        if watch:
+            self.watch_task = asyncio.create_task(self.run_watcher(get_database))
+
+    async def stop(self):
+        """Stop the drift checks and the change stream"""
+        for task in (self.task, self.watch_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.task = None
+        self.watch_task = None
+        self.watching = False
+
+    @staticmethod
+    def counts_as_occupied(slot: Dict) -> bool:
+        return bool(slot.get("is_active", False) and slot.get("is_occupied", False))
+
+    def set_occupied(self, slot_id: str, is_occupied: bool, update_time: datetime,
+                     camera_id: str = None):
+        """
+        Apply an occupancy change that was written to the database
+
+        Args:
+            slot_id: Slot identifier
+            is_occupied: New occupancy
+            update_time: Time of the change
+            camera_id: Camera of the slot; when given, an unknown slot is added
+                the same way the upsert in /api/slots/update creates it
+        """
+        slot = self.slots.get(slot_id)
+        if slot is None:
+            if camera_id is None:
+                return
+            slot = self.slots[slot_id] = {
+                "slot_id": slot_id,
+                "slot_name": slot_id,
+                "camera_id": camera_id,
+                "is_active": True,
+                "is_occupied": False
+            }
+            self.cameras.add(camera_id)
+            self.total_slots += 1
+
+        was_occupied = self.counts_as_occupied(slot)
+        slot["is_occupied"] = is_occupied
+        slot["last_occupied_time" if is_occupied else "last_freed_time"] = update_time
+        self.occupied_slots += self.counts_as_occupied(slot) - was_occupied
+        self.notify(slot)
+
+    def session_started(self):
+        self.active_sessions += 1
+        self.notify()
+
+    def session_ended(self):
+        self.active_sessions = max(0, self.active_sessions - 1)
+        self.notify()
+
+    def get_slots(self, limit: Optional[int] = 100, after: Optional[str] = None) -> List[Dict]:
+        """Active slot records in slot_id order, starting after the given slot_id"""
+        slots = sorted(
+            (slot for slot in self.slots.values()
+             if slot.get("is_active", False) and (after is None or slot["slot_id"] > after)),
+            key=lambda slot: slot["slot_id"]
+        )
+        return slots[:limit]
+
+    def get_status(self) -> Dict:
+        """Counters for /api/status"""
+        return {
+            "total_slots": self.total_slots,
+            "occupied_slots": self.occupied_slots,
+            "free_slots": self.total_slots - self.occupied_slots,
+            "active_sessions": self.active_sessions,
+            "cameras": sorted(self.cameras)
+        }
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            "loaded": self.loaded,
+            "slots": len(self.slots),
+            "reloads": self.reloads,
+            "drift_detected": self.drift_detected,
+            "watching": self.watching,
+            "external_changes": self.external_changes,
+            "last_loaded": self.last_loaded.isoformat() if self.last_loaded else None
+        }
+
+
+# Global occupancy cache instance
+occupancy_cache = OccupancyCache()
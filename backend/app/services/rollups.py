@@ -0,0 +1,273 @@
+"""
+Occupancy and Revenue Rollups
+Maintains hourly and daily per-slot buckets (occupied time, entries, exits,
+sessions, dwell time, revenue) incrementally as events arrive
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Document recording the time open intervals have been credited up to
+CHECKPOINT = {"granularity": "checkpoint", "bucket": None, "camera_id": None, "slot_id": None}
+
+GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1)
+}
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour/day bucket containing timestamp"""
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def split_interval(start: datetime, end: datetime, granularity: str) -> Iterator[Tuple[datetime, float]]:
+    """Yield (bucket start, seconds of [start, end) inside that bucket)"""
+    step = GRANULARITIES[granularity]
+    current = start
+    while current < end:
+        bucket = bucket_start(current, granularity)
+        bucket_end = min(bucket + step, end)
+        yield bucket, (bucket_end - current).total_seconds()
+        current = bucket_end
+
+
+class OccupancyRollups:
+    """In-memory rollup deltas flushed to the occupancy_rollups collection"""
+
+    def __init__(self, flush_interval: float = 10.0):
+        """
+        Args:
+            flush_interval: Seconds between writes of accumulated deltas
+        """
+        self.flush_interval = flush_interval
+        self.collection = None
+        self.read_collection = None
+        self.slot_lookup: Optional[Callable[[str], Optional[Dict]]] = None
+        self.task: Optional[asyncio.Task] = None
+
+        # (granularity, bucket, camera_id, slot_id) -> {field: increment}
+        self.pending: Dict[Tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # slot_id -> (camera_id, occupied since)
+        self.occupied_since: Dict[str, Tuple[str, datetime]] = {}
+
+        # Statistics
+        self.events_applied = 0
+        self.flushes = 0
+        self.buckets_written = 0
+
+    def add(self, timestamp: datetime, camera_id: str, slot_id: Optional[str], field: str, amount: float):
+        """Add an increment to the hour and day buckets containing timestamp"""
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(timestamp, granularity), camera_id, slot_id)
+            self.pending[key][field] += amount
+
+    def record_occupancy(self, slot_id: str, camera_id: str, occupied: bool, timestamp: datetime):
+        """Apply a slot state change"""
+        self.events_applied += 1
+        if occupied:
+            if slot_id not in self.occupied_since:
+                self.occupied_since[slot_id] = (camera_id, timestamp)
+                self.add(timestamp, camera_id, slot_id, "entries", 1)
+            return
+
+        since = self.occupied_since.pop(slot_id, None)
+        if since is None:
+            return
+        camera_id = camera_id or since[0]
+        self.add(timestamp, camera_id, slot_id, "exits", 1)
+        self.add_occupied(camera_id, slot_id, since[1], timestamp)
+
+    def add_occupied(self, camera_id: str, slot_id: str, start: datetime, end: datetime):
+        """Add occupied seconds for [start, end) to every bucket it overlaps"""
+        for granularity in GRANULARITIES:
+            for bucket, seconds in split_interval(start, end, granularity):
+                self.pending[(granularity, bucket, camera_id, slot_id)]["occupied_seconds"] += seconds
+
+    def credit_open_intervals(self, now: datetime):
+        """
+        Count slots that are still occupied up to now, so current buckets are not short
+
+        An interval belongs to the process that saw the slot become occupied.
+        When the current slot state (slot_lookup) shows another process freed
+        it, the interval is closed here at the slot's last_freed_time.
+        """
+        for slot_id, (camera_id, since) in list(self.occupied_since.items()):
+            slot = self.slot_lookup(slot_id) if self.slot_lookup else None
+            freed = slot.get("last_freed_time") if slot else None
+            # Free now, or freed (and maybe re-occupied) since the last credit
+            if freed is not None and (not slot.get("is_occupied", True) or freed > since):
+                del self.occupied_since[slot_id]
+                end = min(max(freed, since), now)
+                self.add(end, camera_id, slot_id, "exits", 1)
+                self.add_occupied(camera_id, slot_id, since, end)
+            elif since < now:
+                self.add_occupied(camera_id, slot_id, since, now)
+                self.occupied_since[slot_id] = (camera_id, now)
+
+    def record_settlement(self, slot_id: Optional[str], camera_id: Optional[str], exit_time: datetime,
+                          amount: float, duration_minutes: int):
+        """Apply a completed parking session, including free ones"""
+        self.add(exit_time, camera_id, slot_id, "sessions", 1)
+        self.add(exit_time, camera_id, slot_id, "revenue", amount)
+        self.add(exit_time, camera_id, slot_id, "dwell_minutes", duration_minutes)
+
+    def seed(self, slots: List[Dict], credited_through: Optional[datetime] = None):
+        """
+        Resume open occupancy intervals from slot documents after a restart
+
+        Args:
+            slots: Slot documents with the current occupancy
+            credited_through: Time open intervals were already written up to
+                by the last flush before the restart
+        """
+        for slot in slots:
+            if slot.get("is_occupied") and slot.get("last_occupied_time"):
+                since = slot["last_occupied_time"]
+                if credited_through and credited_through > since:
+                    since = credited_through
+                self.occupied_since.setdefault(slot["slot_id"], (slot.get("camera_id"), since))
+
+    def restore(self, keys: List[Tuple], pending: Dict[Tuple, Dict[str, float]]):
+        """Put increments that were not written back for the next flush"""
+        for key in keys:
+            for field, amount in pending[key].items():
+                self.pending[key][field] += amount
+
+    async def flush(self):
+        """Write accumulated increments with one bulk upsert"""
+        if self.collection is None:
+            return
+        now = datetime.utcnow()
+        self.credit_open_intervals(now)
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, defaultdict(lambda: defaultdict(float))
+
+        keys = list(pending)
+        operations = [
+            UpdateOne(
+                {"granularity": granularity, "bucket": bucket, "camera_id": camera_id, "slot_id": slot_id},
+                {"$inc": dict(pending[(granularity, bucket, camera_id, slot_id)])},
+                upsert=True
+            )
+            for granularity, bucket, camera_id, slot_id in keys
+        ]
+        # Last, so seed() does not credit the same open time again after a restart
+        operations.append(UpdateOne(CHECKPOINT, {"$max": {"credited_through": now}}, upsert=True))
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+            self.flushes += 1
+            self.buckets_written += len(keys)
+        except BulkWriteError as e:
+            # Unordered: everything except the listed operations was applied
+            errors = e.details.get("writeErrors", [])
+            failed = [error["index"] for error in errors if error["index"] < len(keys)]
+            logger.error(f"Failed to write {len(failed)} of {len(keys)} rollup bucket(s): "
+                         f"{errors[0].get('errmsg') if errors else e}")
+            self.buckets_written += len(keys) - len(failed)
+            self.restore([keys[index] for index in failed], pending)
+        except Exception as e:
+            logger.error(f"Failed to write {len(keys)} rollup bucket(s): {e}")
+            # Keep the increments for the next flush
+            self.restore(keys, pending)
+
+    async def run(self):
+        """Periodic flush loop"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self, collection, slots: List[Dict], read_collection=None,
+                    slot_lookup: Optional[Callable[[str], Optional[Dict]]] = None):
+        """
+        Create indexes, resume open intervals and start flushing
+
+        Args:
+            collection: occupancy_rollups collection for writes
+            slots: Slot documents with the current occupancy
+            read_collection: Same collection with the read preference used by
+                query(); defaults to collection
+            slot_lookup: Current slot record by slot_id, including changes made
+                by other processes; used to close intervals they ended
+        """
+        self.collection = collection
+        self.read_collection = read_collection if read_collection is not None else collection
+        self.slot_lookup = slot_lookup
+        await collection.create_index(
+            [("granularity", 1), ("bucket", 1), ("camera_id", 1), ("slot_id", 1)],
+            unique=True
+        )
+        checkpoint = await collection.find_one(CHECKPOINT)
+        self.seed(slots, checkpoint.get("credited_through") if checkpoint else None)
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the flush loop and write what is pending"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+    async def query(self, granularity: str, start: datetime, end: datetime,
+                    group_by: str = "camera", camera_id: Optional[str] = None) -> List[Dict]:
+        """
+        Sum rollup buckets in [start, end)
+
+        Args:
+            granularity: "hour" or "day"
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            group_by: "camera" or "slot"
+            camera_id: Restrict to one camera
+
+        Returns:
+            One row per bucket and camera (or slot), in bucket order
+        """
+        match = {"granularity": granularity, "bucket": {"$gte": bucket_start(start, granularity), "$lt": end}}
+        if camera_id:
+            match["camera_id"] = camera_id
+
+        group_id = {"bucket": "$bucket", "camera_id": "$camera_id"}
+        if group_by == "slot":
+            group_id["slot_id"] = "$slot_id"
+
+        fields = ["occupied_seconds", "entries", "exits", "sessions", "revenue", "dwell_minutes"]
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": group_id, **{field: {"$sum": f"${field}"} for field in fields}}},
+            {"$sort": {"_id.bucket": 1, "_id.camera_id": 1, "_id.slot_id": 1}}
+        ]
+
+        rows = []
+        async for row in self.read_collection.aggregate(pipeline):
+            key = row.pop("_id")
+            rows.append({**key, **row})
+        return rows
+
+    def get_stats(self) -> Dict:
+        """Get rollup statistics"""
+        return {
+            "events_applied": self.events_applied,
+            "open_intervals": len(self.occupied_since),
+            "pending_buckets": len(self.pending),
+            "flushes": self.flushes,
+            "buckets_written": self.buckets_written
+        }
+
+
+# Global rollup instance
+occupancy_rollups = OccupancyRollups()
@@ -0,0 +1,146 @@
+"""
+Slot Change Broadcaster
+Fans occupancy cache changes out to server-sent event subscribers
+"""
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+import asyncio
+import json
+import logging
+
+from .occupancy_cache import occupancy_cache
+
+logger = logging.getLogger(__name__)
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_event(event_type: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    payload = json.dumps(data, default=json_default)
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+class Subscriber:
+    """Bounded event queue for one connected client"""
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.needs_snapshot = False
+
+    def push(self, event: str) -> bool:
+        """
+        Queue an event
+
+        Returns:
+            True if the client fell behind and was switched to a fresh snapshot
+        """
+        if self.needs_snapshot:
+            # The pending snapshot already covers this change
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return False
+        except asyncio.QueueFull:
+            # Deltas are useless once one is lost; replace the backlog with a snapshot
+            self.resync()
+            return True
+
+    def resync(self):
+        """Drop queued deltas and queue a snapshot marker (None)"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.needs_snapshot = True
+        self.queue.put_nowait(None)
+
+
+class SlotEventBroadcaster:
+    """Pushes a snapshot on connect, then slot and status deltas"""
+
+    def __init__(self, snapshot: Callable[[], Dict], max_queue: int = 100,
+                 keepalive_interval: float = 15.0):
+        """
+        Args:
+            snapshot: Returns the full {"slots": [...], "status": {...}} state
+            max_queue: Pending events per client before it is resynced
+            keepalive_interval: Seconds between comments sent to idle clients
+        """
+        self.snapshot = snapshot
+        self.max_queue = max(1, max_queue)
+        self.keepalive_interval = keepalive_interval
+        self.subscribers: Set[Subscriber] = set()
+
+        # Statistics
+        self.events_published = 0
+        self.resyncs = 0
+
+    def publish(self, event_type: str, data: Dict):
+        """Broadcast a delta to every subscriber"""
+        if not self.subscribers:
+            return
+        event = encode_event(event_type, data)
+        self.events_published += 1
+        for subscriber in self.subscribers:
+            if subscriber.push(event):
+                self.resyncs += 1
+
+    def resync_all(self):
+        """Send every subscriber a fresh snapshot instead of deltas"""
+        for subscriber in self.subscribers:
+            if not subscriber.needs_snapshot:
+                subscriber.resync()
+
+    def on_cache_change(self, slot: Optional[Dict], status: Optional[Dict]):
+        """OccupancyCache listener"""
+        if status is None:
+            self.resync_all()
+            return
+        if slot is not None:
+            self.publish("slot", slot)
+        self.publish("status", status)
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Event stream for one client"""
+        subscriber = Subscriber(self.max_queue)
+        self.subscribers.add(subscriber)
+        try:
+            yield encode_event("snapshot", self.snapshot())
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is None:
+                    subscriber.needs_snapshot = False
+                    yield encode_event("snapshot", self.snapshot())
+                else:
+                    yield event
+        finally:
+            self.subscribers.discard(subscriber)
+
+    def get_stats(self) -> Dict:
+        """Get broadcaster statistics"""
+        return {
+            "subscribers": len(self.subscribers),
+            "events_published": self.events_published,
+            "resyncs": self.resyncs
+        }
+
+
+def cache_snapshot() -> Dict:
+    """Full slot and status state from the occupancy cache"""
+    return {
+        "slots": occupancy_cache.get_slots(limit=None),
+        "status": occupancy_cache.get_status()
+    }
+
+
+# Global broadcaster instance, fed by the occupancy cache
+slot_events = SlotEventBroadcaster(cache_snapshot)
+occupancy_cache.add_listener(slot_events.on_cache_change)
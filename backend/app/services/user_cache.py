@@ -0,0 +1,197 @@
+"""
+RFID User Cache
+Size-bounded LRU cache with expiry for user documents keyed by rfid_id, so
+repeat taps at a gate skip the users lookup
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    LRU/TTL cache of users documents
+
+    Backend writes update or invalidate entries (write-through); the TTL bounds
+    staleness from writers outside this process (admin scripts, other
+    instances). Cached balances are only used for display and session
+    bookkeeping; debits are still guarded in the database.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0, enabled: bool = True):
+        """
+        Args:
+            max_size: Users held before the least recently used is evicted
+            ttl: Seconds a cached user is served before being re-read
+            enabled: When False every lookup goes to the database
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self.entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Future] = {}
+        # Write clock per cached or in-flight tag, so a read or write that
+        # started before another write does not cache its older document.
+        # Dropped tags report `floor`, at least their last write, which can
+        # only make a result look outdated, never current
+        self.clock = 0
+        self.floor = 0
+        self.generations: Dict[str, int] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, enabled: bool = None, max_size: int = None, ttl: float = None):
+        """Apply settings from config; disabling also empties the cache"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if max_size is not None:
+            self.max_size = max(1, int(max_size))
+        if ttl is not None:
+            self.ttl = float(ttl)
+        if not self.enabled:
+            self.clear()
+        while len(self.entries) > self.max_size:
+            self.forget(self.entries.popitem(last=False)[0])
+            self.evictions += 1
+
+    def get(self, rfid_id: str) -> Optional[Dict]:
+        """Return a copy of the cached user, or None if absent or expired"""
+        entry = self.entries.get(rfid_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self.entries[rfid_id]
+            self.forget(rfid_id)
+            self.expired += 1
+            return None
+        self.entries.move_to_end(rfid_id)
+        return dict(user)
+
+    def generation(self, rfid_id: str) -> int:
+        """Write clock of a tag; take it before a write and pass it to put()"""
+        return self.generations.get(rfid_id, self.floor)
+
+    def bump(self, rfid_id: str):
+        self.clock += 1
+        self.generations[rfid_id] = self.clock
+
+    def forget(self, rfid_id: str):
+        """Drop a tag's write clock once it is neither cached nor being read"""
+        if rfid_id in self.entries or rfid_id in self.inflight:
+            return
+        self.floor = max(self.floor, self.generations.pop(rfid_id, self.floor))
+
+    def put(self, user: Optional[Dict], generation: Optional[int] = None):
+        """
+        Cache a user document that reflects a completed write
+
+        Args:
+            user: Document returned by the write
+            generation: generation() taken before the write; if another write
+                to the same tag was cached or invalidated since, the order of
+                the two is unknown and the tag is dropped instead
+        """
+        if not self.enabled or not user or "rfid_id" not in user:
+            return
+        rfid_id = user["rfid_id"]
+        if generation is not None and self.generation(rfid_id) != generation:
+            self.invalidate(rfid_id)
+            return
+        self.bump(rfid_id)
+        self.store(rfid_id, user)
+
+    def store(self, rfid_id: str, user: Dict):
+        self.entries[rfid_id] = (time.monotonic() + self.ttl, dict(user))
+        self.entries.move_to_end(rfid_id)
+        if len(self.entries) > self.max_size:
+            self.forget(self.entries.popitem(last=False)[0])
+            self.evictions += 1
+
+    def invalidate(self, rfid_id: str):
+        """Drop a user after a write whose result is not at hand"""
+        self.bump(rfid_id)
+        if self.entries.pop(rfid_id, None) is not None:
+            self.invalidations += 1
+        self.forget(rfid_id)
+
+    def clear(self):
+        self.entries.clear()
+        self.floor = self.clock
+        self.generations.clear()
+
+    async def fetch(self, db, rfid_id: str) -> Optional[Dict]:
+        """
+        Get a user by RFID, reading through to db.users on a miss
+
+        Concurrent misses for the same tag share one database read. Unknown
+        tags are not cached, so a registration is visible immediately.
+        """
+        if not self.enabled:
+            return await db.users.find_one({"rfid_id": rfid_id})
+
+        user = self.get(rfid_id)
+        if user is not None:
+            self.hits += 1
+            return user
+        self.misses += 1
+
+        pending = self.inflight.get(rfid_id)
+        if pending is not None:
+            self.coalesced += 1
+            user = await asyncio.shield(pending)
+            return dict(user) if user else None
+
+        # Pinned while the read is in flight so unrelated evictions cannot move it
+        generation = self.generations.setdefault(rfid_id, self.floor)
+        pending = self.inflight[rfid_id] = asyncio.get_running_loop().create_future()
+        try:
+            user = await db.users.find_one({"rfid_id": rfid_id})
+        except Exception as e:
+            pending.set_exception(e)
+            # Waiters receive the exception; mark it retrieved for the owner
+            pending.exception()
+            raise
+        else:
+            pending.set_result(user)
+            if user and self.generation(rfid_id) == generation:
+                self.store(rfid_id, user)
+        finally:
+            del self.inflight[rfid_id]
+            self.forget(rfid_id)
+            if not pending.done():
+                pending.cancel()
+        return dict(user) if user else None
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "tracked_generations": len(self.generations)
+        }
+
+
+# Global user cache instance
+user_cache = UserCache()
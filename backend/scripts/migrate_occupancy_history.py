@@ -0,0 +1,74 @@
+"""
+Move slots.occupancy_history into the occupancy_events time-series collection
+
+Run from the backend directory:
+    python -m scripts.migrate_occupancy_history [--dry-run] [--keep-history]
+"""
+import argparse
+import asyncio
+import logging
+
+from app.database import db_instance, get_connection_string, get_database_name
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def history_to_events(slot: dict) -> list:
+    """Convert one slot's occupancy_history array into occupancy_events documents"""
+    events = []
+    for item in slot.get("occupancy_history") or []:
+        if not item.get("timestamp"):
+            continue
+        events.append({
+            "timestamp": item["timestamp"],
+            "meta": {"slot_id": slot["slot_id"], "camera_id": slot.get("camera_id")},
+            "occupied": bool(item.get("occupied")),
+            "source": "migrated",
+            "session_id": item.get("session_id")
+        })
+    return events
+
+
+async def migrate(dry_run: bool, keep_history: bool):
+    """Copy every slot's history, then strip the array from the slot document"""
+    # Connecting creates the time-series collection if needed
+    await db_instance.connect_to_database(get_connection_string(), get_database_name())
+    db = db_instance.database
+
+    slots_migrated = 0
+    events_migrated = 0
+    cursor = db.slots.find(
+        {"occupancy_history.0": {"$exists": True}},
+        {"slot_id": 1, "camera_id": 1, "occupancy_history": 1}
+    )
+
+    async for slot in cursor:
+        events = history_to_events(slot)
+        if dry_run:
+            logger.info(f"{slot['slot_id']}: {len(events)} event(s) would be migrated")
+        else:
+            for start in range(0, len(events), BATCH_SIZE):
+                await db.occupancy_events.insert_many(events[start:start + BATCH_SIZE], ordered=False)
+            # Unset per slot so a re-run after an interruption skips finished slots
+            if not keep_history:
+                await db.slots.update_one({"_id": slot["_id"]}, {"$unset": {"occupancy_history": ""}})
+            logger.info(f"{slot['slot_id']}: migrated {len(events)} event(s)")
+
+        slots_migrated += 1
+        events_migrated += len(events)
+
+    logger.info(f"{'Dry run: ' if dry_run else ''}{slots_migrated} slot(s), {events_migrated} event(s)")
+    await db_instance.close_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate slot occupancy history to occupancy_events")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be migrated")
+    parser.add_argument("--keep-history", action="store_true",
+                        help="Leave occupancy_history on slot documents (re-running will duplicate events)")
+    args = parser.parse_args()
+
+    asyncio.run(migrate(args.dry_run, args.keep_history))
@@ -22,6 +22,8 @@
 #define MQTT_TOPIC_RFID_SCAN "parking/rfid/scan"
 
 // Gate Settings
+#define GATE_ID "gate_1"        // Unique per device; gate commands carry it back
+#define GATE_LOCATION "gate"    // "entry" (or "gate") / "exit"
 #define GATE_OPEN_DURATION_MS 5000  // How long gate stays open (milliseconds)
 
 #endif
@@ -198,8 +198,14 @@ void mqtt_callback(char* topic, byte* payload, unsigned int length) {
     return;
   }
   
+  // Commands addressed to another gate are not for us
+  const char* target = doc["gate_id"];
+  if (target && strcmp(target, GATE_ID) != 0) {
+    return;
+  }
+  
   // Check action
-  const char* action = doc["action"];
+  const char* action = doc["action"] | "";
   if (strcmp(action, "open") == 0) {
     const char* reason = doc["reason"] | "MQTT command";
     openGate(String(reason));
@@ -224,7 +230,8 @@ void openGate(String reason) {
   digitalWrite(LED_BLUE_PIN, HIGH);
   
   // Publish status to MQTT
-  StaticJsonDocument<128> doc;
+  StaticJsonDocument<192> doc;
+  doc["gate_id"] = GATE_ID;
   doc["gate_status"] = "open";
   doc["reason"] = reason;
   doc["timestamp"] = millis();
@@ -248,6 +255,7 @@ void closeGate() {
   
   // Publish status to MQTT
   StaticJsonDocument<128> doc;
+  doc["gate_id"] = GATE_ID;
   doc["gate_status"] = "closed";
   doc["timestamp"] = millis();
   
@@ -297,7 +305,8 @@ void readRFID() {
   StaticJsonDocument<128> doc;
   doc["rfid_id"] = rfidUID;
   doc["timestamp"] = millis();
-  doc["location"] = "gate";
+  doc["location"] = GATE_LOCATION;
+  doc["gate_id"] = GATE_ID;
   
   String output;
   serializeJson(doc, output);
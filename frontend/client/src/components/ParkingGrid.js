@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Box, Grid, Paper, Typography, Chip } from '@mui/material';
 import { CheckCircle, Cancel } from '@mui/icons-material';
-import axios from 'axios';
+import { slotsAPI } from '../services/api';
 
 const ParkingSlot = ({ slot }) => {
   const isOccupied = slot.is_occupied;
@@ -59,7 +59,7 @@ export default function ParkingGrid() {
 
   const fetchSlots = async () => {
     try {
-      const response = await axios.get('http://localhost:8000/api/slots');
+      const response = await slotsAPI.getAll();
       setSlots(response.data);
     } catch (error) {
       console.error('Failed to fetch slots:', error);
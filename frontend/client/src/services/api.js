@@ -22,6 +22,20 @@ const createAxiosInstance = (baseURL) => {
 const pythonApi = createAxiosInstance(PYTHON_API_URL);
 const nodeApi = createAxiosInstance(NODE_API_URL);
 
+// List endpoints return one page at a time and put the cursor for the next
+// page in the X-Next-Cursor header; follow it until the last page
+export const getAllPages = async (instance, url, params = {}) => {
+  const rows = [];
+  let cursor = null;
+  let response;
+  do {
+    response = await instance.get(url, { params: cursor ? { ...params, cursor } : params });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { ...response, data: rows };
+};
+
 // ============================================
 // AUTHENTICATION
 // ============================================
@@ -59,7 +73,7 @@ export const usersAPI = {
 // ============================================
 export const sessionsAPI = {
   // Get all active sessions
-  getActive: () => pythonApi.get('/api/sessions/active'),
+  getActive: () => getAllPages(pythonApi, '/api/sessions/active'),
   
   // Get all sessions (with filters)
   getAll: (params) => pythonApi.get('/api/sessions', { params }),
@@ -82,7 +96,7 @@ export const sessionsAPI = {
 // ============================================
 export const slotsAPI = {
   // Get all slots
-  getAll: () => pythonApi.get('/api/slots'),
+  getAll: () => getAllPages(pythonApi, '/api/slots'),
   
   // Get slot by ID
   getById: (slotId) => pythonApi.get(`/api/slots/${slotId}`),
@@ -106,6 +106,18 @@ app.post('/api/admin/login', async (req, res) => {
 // PROXY ROUTES TO PYTHON API
 // ============================================
 
+// List endpoints are paged; follow the X-Next-Cursor header to the last page
+async function getAllPages(url, params = {}) {
+  const rows = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(url, { params: cursor ? { ...params, cursor } : params });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return rows;
+}
+
 // Get system status
 app.get('/api/status', authenticateToken, async (req, res) => {
   try {
@@ -120,8 +132,7 @@ app.get('/api/status', authenticateToken, async (req, res) => {
 // Get all slots
 app.get('/api/slots', authenticateToken, async (req, res) => {
   try {
-    const response = await axios.get(`${PYTHON_API}/api/slots`);
-    res.json(response.data);
+    res.json(await getAllPages(`${PYTHON_API}/api/slots`));
   } catch (error) {
     console.error('Slots error:', error.message);
     res.status(500).json({ error: 'Failed to fetch slots' });
@@ -131,8 +142,7 @@ app.get('/api/slots', authenticateToken, async (req, res) => {
 // Get active sessions
 app.get('/api/sessions/active', authenticateToken, async (req, res) => {
   try {
-    const response = await axios.get(`${PYTHON_API}/api/sessions/active`);
-    res.json(response.data);
+    res.json(await getAllPages(`${PYTHON_API}/api/sessions/active`));
   } catch (error) {
     console.error('Sessions error:', error.message);
     res.status(500).json({ error: 'Failed to fetch sessions' });
@@ -170,10 +180,7 @@ app.get('/api/wallet/:rfid', authenticateToken, async (req, res) => {
 // Get dashboard stats
 app.get('/api/dashboard/stats', authenticateToken, async (req, res) => {
   try {
-    const [status, activeSessions] = await Promise.all([
-      axios.get(`${PYTHON_API}/api/status`),
-      axios.get(`${PYTHON_API}/api/sessions/active`)
-    ]);
+    const status = await axios.get(`${PYTHON_API}/api/status`);
 
     // Get today's revenue
     const today = new Date();
@@ -204,7 +211,7 @@ app.get('/api/dashboard/stats', authenticateToken, async (req, res) => {
         free: status.data.free_slots
       },
       sessions: {
-        active: activeSessions.data.length
+        active: status.data.active_sessions
       },
       revenue: {
         today: todayRevenue[0]?.total || 0
@@ -0,0 +1,109 @@
+"""
+Entry/Exit Settlement Latency Benchmark
+Runs entry/exit cycles through the backend's settlement code with and
+without multi-document transactions and reports latency percentiles
+
+Needs a replica set for the transactional path, e.g. a single-node one:
+    mongod --replSet rs0  (then rs.initiate() in mongosh)
+
+Usage (from project root):
+    python scripts/benchmarks/bench_exit_settlement.py --uri mongodb://localhost:27017/?replicaSet=rs0 --cycles 200
+"""
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.database import db_instance  # noqa: E402
+from app.main import open_session, settle_exit, generate_session_id  # noqa: E402
+from app.models import SessionExit  # noqa: E402
+
+
+async def run_cycles(db, rfid_id: str, cycles: int, use_transactions: bool):
+    """Time entry writes and exit settlement separately (milliseconds)"""
+    entry_times, exit_times = [], []
+    for _ in range(cycles):
+        # Back-date entry so every exit is charged
+        session_doc = {
+            "session_id": generate_session_id(),
+            "rfid_id": rfid_id,
+            "vehicle_no": rfid_id,
+            "entry_time": datetime.utcnow() - timedelta(hours=1),
+            "entry_camera_id": None,
+            "entry_slot_id": None,
+            "exit_time": None,
+            "status": "active"
+        }
+
+        started = time.perf_counter()
+        if use_transactions:
+            async with await db_instance.client.start_session() as txn:
+                await txn.with_transaction(lambda session: open_session(db, session_doc, session))
+        else:
+            await open_session(db, session_doc)
+        entry_times.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        exit_data = SessionExit(rfid_id=rfid_id)
+        if use_transactions:
+            async with await db_instance.client.start_session() as txn:
+                await txn.with_transaction(lambda session: settle_exit(db, exit_data, session))
+        else:
+            await settle_exit(db, exit_data)
+        exit_times.append((time.perf_counter() - started) * 1000)
+
+    return np.array(entry_times), np.array(exit_times)
+
+
+def report(name: str, samples: np.ndarray):
+    print(f"{name:<28}{np.percentile(samples, 50):>10.2f}{np.percentile(samples, 95):>10.2f}"
+          f"{np.percentile(samples, 99):>10.2f}{samples.mean():>10.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark transactional vs atomic-update settlement')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--database', default='smart_parking_bench')
+    parser.add_argument('--cycles', type=int, default=200)
+    args = parser.parse_args()
+
+    await db_instance.connect_to_database(args.uri, args.database)
+    db = db_instance.database
+
+    rfid_id = f"BENCH_{int(time.time())}"
+    await db.users.insert_one({
+        "rfid_id": rfid_id,
+        "user_name": "Settlement Benchmark",
+        "vehicle_no": rfid_id,
+        "wallet_balance": 1_000_000.0
+    })
+
+    modes = [False]
+    if db_instance.supports_transactions:
+        modes.append(True)
+    else:
+        print("Server is not a replica set; only the non-transactional path is measured")
+
+    print(f"{args.cycles} cycles, latency in ms")
+    print(f"{'path':<28}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}")
+    for use_transactions in modes:
+        label = "transaction" if use_transactions else "atomic updates"
+        entry_times, exit_times = await run_cycles(db, rfid_id, args.cycles, use_transactions)
+        report(f"entry ({label})", entry_times)
+        report(f"exit ({label})", exit_times)
+
+    await db.users.delete_one({"rfid_id": rfid_id})
+    await db.sessions.delete_many({"rfid_id": rfid_id})
+    await db.transactions.delete_many({"rfid_id": rfid_id})
+    await db_instance.close_database_connection()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""
+Multi-Gate Decision Latency Benchmark
+Feeds RFID scans from several gates through the aggregator's MQTT message
+handler against a stub backend with slow exits, once handling requests on the
+MQTT thread and once on the gate worker pool, and reports per-gate decision
+latency percentiles
+
+No broker or backend needed.
+
+Usage (from project root):
+    python scripts/benchmarks/bench_gate_latency.py --gates 4 --scans 50 --exit-delay 0.5
+"""
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+AGGREGATOR_DIR = Path(__file__).resolve().parents[2] / "aggregator"
+sys.path.insert(0, str(AGGREGATOR_DIR))
+
+from aggregator_service import AggregatorService  # noqa: E402
+from gate_dispatcher import GateDispatcher  # noqa: E402
+
+
+def make_backend_handler(entry_delay: float, exit_delay: float):
+    class StubBackend(BaseHTTPRequestHandler):
+        """Answers /api/entry and /api/exit after a fixed delay"""
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if self.path == '/api/exit':
+                time.sleep(exit_delay)
+                reply = {'session_id': f"SESS_{body['rfid_id']}", 'amount_charged': 20.0}
+            else:
+                time.sleep(entry_delay)
+                reply = {'session_id': f"SESS_{body['rfid_id']}", 'status': 'active'}
+            data = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StubBackend
+
+
+class FakeMQTTClient:
+    """Records when each gate command is published"""
+
+    def __init__(self):
+        self.decided = defaultdict(list)
+
+    def publish(self, topic, payload, qos=0):
+        if topic == "parking/gate/control":
+            self.decided[json.loads(payload)['gate_id']].append(time.perf_counter())
+
+
+class BenchAggregator(AggregatorService):
+    """Aggregator with a fake MQTT client and no config file"""
+
+    def __init__(self, backend_url: str, max_workers: int):
+        self.config_override = {
+            'backend_url': backend_url,
+            'gate_requests': {'max_workers': max_workers, 'max_pending_per_gate': 1000, 'stats_interval': 0}
+        }
+        super().__init__("unused")
+
+    def load_config(self, config_path: str):
+        return self.config_override
+
+    def setup_mqtt(self):
+        return FakeMQTTClient()
+
+
+def message(topic: str, payload: dict):
+    return SimpleNamespace(topic=topic, payload=json.dumps(payload).encode())
+
+
+def run(backend_url: str, max_workers: int, gates: int, scans: int, interval: float):
+    """
+    Deliver the same scan stream to one 'MQTT thread'
+
+    Latency runs from when the broker delivers a scan to when the gate
+    command is published, so time spent queued behind other gates counts.
+
+    Returns:
+        gate_id -> latency percentiles
+    """
+    aggregator = BenchAggregator(backend_url, max_workers)
+    aggregator.on_message(None, None, message("parking/camera/CAM_1/slot/A1",
+                                              {'slot_id': 'A1', 'occupied': False, 'camera_id': 'CAM_1'}))
+
+    inbox = queue.Queue()
+    arrived = defaultdict(list)
+
+    def broker():
+        random.seed(42)
+        for i in range(scans):
+            for gate in range(gates):
+                # Even gates are entries, odd gates exits
+                location = 'entry' if gate % 2 == 0 else 'exit'
+                gate_id = f"{location}_{gate}"
+                arrived[gate_id].append(time.perf_counter())
+                inbox.put(message("parking/rfid/scan", {
+                    'rfid_id': f"TAG_{gate}_{i}", 'location': location, 'gate_id': gate_id
+                }))
+            time.sleep(interval * random.uniform(0.5, 1.5))
+        inbox.put(None)
+
+    threading.Thread(target=broker, daemon=True).start()
+    while (msg := inbox.get()) is not None:
+        aggregator.on_message(None, None, msg)
+
+    aggregator.dispatcher.stop()
+    aggregator.session.close()
+
+    # Commands for a gate are published in scan order
+    decided = aggregator.mqtt_client.decided
+    return {
+        gate_id: GateDispatcher.percentiles([(done - start) * 1000 for start, done in zip(times, decided[gate_id])])
+        for gate_id, times in arrived.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gate decision latency under multi-gate load')
+    parser.add_argument('--gates', type=int, default=4)
+    parser.add_argument('--scans', type=int, default=50, help='Scans per gate')
+    parser.add_argument('--interval', type=float, default=0.05, help='Mean seconds between scan rounds')
+    parser.add_argument('--entry-delay', type=float, default=0.02)
+    parser.add_argument('--exit-delay', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_backend_handler(args.entry_delay, args.exit_delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    backend_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{args.gates} gates x {args.scans} scans, backend entry {args.entry_delay * 1000:.0f}ms / "
+          f"exit {args.exit_delay * 1000:.0f}ms, decision latency in ms")
+    print(f"{'mode':<14}{'gate':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for label, workers in (("mqtt thread", 0), (f"{args.workers} workers", args.workers)):
+        latencies = run(backend_url, workers, args.gates, args.scans, args.interval)
+        for gate_id, latency in sorted(latencies.items()):
+            print(f"{label:<14}{gate_id:<12}{latency['p50_ms']:>10.1f}{latency['p95_ms']:>10.1f}"
+                  f"{latency['p99_ms']:>10.1f}{latency['max_ms']:>10.1f}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
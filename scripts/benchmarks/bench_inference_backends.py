@@ -0,0 +1,102 @@
+"""
+Inference Backend Benchmark
+Runs each configured detector backend over the same recorded frames and
+reports throughput and latency percentiles
+
+Usage (from project root):
+    python scripts/benchmarks/bench_inference_backends.py --frames-dir recorded_frames/ \
+        --backends ultralytics onnxruntime onnxruntime-int8
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import yaml
+import numpy as np
+
+VISION_DIR = Path(__file__).resolve().parents[2] / "vision"
+sys.path.insert(0, str(VISION_DIR))
+
+from src.inference_backends import create_backend  # noqa: E402
+
+
+def load_frames(frames_dir: str, limit: int):
+    """Load recorded frames (jpg/png) in name order"""
+    paths = sorted(p for p in Path(frames_dir).iterdir()
+                   if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:limit]
+    frames = [cv2.imread(str(p)) for p in paths]
+    return [f for f in frames if f is not None]
+
+
+def backend_settings(name: str, vision_settings: dict) -> dict:
+    """Map a benchmark backend name onto an inference_backend config section"""
+    settings = dict(vision_settings.get('inference_backend', {}))
+    if name == 'ultralytics':
+        settings['type'] = 'ultralytics'
+    elif name == 'onnxruntime':
+        settings.update(type='onnxruntime', use_int8=False)
+    elif name == 'onnxruntime-int8':
+        settings.update(type='onnxruntime', use_int8=True)
+    else:
+        raise ValueError(f"Unknown backend: {name}")
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark detector inference backends')
+    parser.add_argument('--frames-dir', required=True, help='Directory of recorded frames')
+    parser.add_argument('--config', default=str(VISION_DIR / 'config' / 'cameras.yaml'))
+    parser.add_argument('--backends', nargs='+', default=['ultralytics', 'onnxruntime'])
+    parser.add_argument('--limit', type=int, default=200, help='Maximum frames to load')
+    parser.add_argument('--warmup', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        vision_settings = yaml.safe_load(f).get('vision_settings', {})
+
+    frames = load_frames(args.frames_dir, args.limit)
+    if not frames:
+        print(f"No frames found in {args.frames_dir}")
+        return 1
+
+    # Model paths in the config are relative to the vision directory
+    model_path = str(VISION_DIR / vision_settings.get('yolo_model', 'yolov8n.pt'))
+
+    print(f"Frames: {len(frames)} ({frames[0].shape[1]}x{frames[0].shape[0]})")
+    print(f"{'backend':<20}{'fps':>8}{'p50 ms':>10}{'p99 ms':>10}{'detections':>12}")
+
+    for name in args.backends:
+        settings = backend_settings(name, vision_settings)
+        for key in ('onnx_model', 'int8_model'):
+            if settings.get(key):
+                settings[key] = str(VISION_DIR / settings[key])
+
+        try:
+            backend = create_backend(model_path, settings)
+        except Exception as e:
+            print(f"{name:<20}skipped: {e}")
+            continue
+
+        for frame in frames[:args.warmup]:
+            backend.predict([frame])
+
+        latencies = []
+        detections = 0
+        start = time.perf_counter()
+        for frame in frames:
+            t0 = time.perf_counter()
+            detections += len(backend.predict([frame])[0])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<20}{len(frames) / elapsed:>8.1f}"
+              f"{np.percentile(latencies, 50):>10.1f}{np.percentile(latencies, 99):>10.1f}"
+              f"{detections:>12}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
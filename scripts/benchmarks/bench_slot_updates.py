@@ -0,0 +1,96 @@
+"""
+Slot Update Ingestion Load Test
+Pushes the same stream of slot changes through /api/slots/update (one slot
+per request) and /api/slots/bulk-update and reports updates per second
+
+Usage (from project root, with the backend running):
+    python scripts/benchmarks/bench_slot_updates.py --slots 30 --rounds 20 --concurrency 4
+"""
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def make_session(concurrency: int) -> requests.Session:
+    """Keep-alive session sized for the worker threads"""
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+    return session
+
+
+def make_rounds(slots: int, rounds: int, camera_id: str):
+    """One round = every benchmark slot changing state (e.g. a shift change)"""
+    return [
+        [
+            {
+                'slot_id': f"BENCH_{i:03d}",
+                'camera_id': camera_id,
+                'is_occupied': random.random() < 0.5,
+                'confidence': round(random.uniform(0.5, 1.0), 2),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            for i in range(slots)
+        ]
+        for _ in range(rounds)
+    ]
+
+
+def run_single(session, url: str, rounds, concurrency: int) -> float:
+    """Send every update as its own request; returns elapsed seconds"""
+    def post(update):
+        session.post(f"{url}/api/slots/update", json=update, timeout=10).raise_for_status()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for updates in rounds:
+            list(pool.map(post, updates))
+    return time.perf_counter() - started
+
+
+def run_bulk(session, url: str, rounds, concurrency: int) -> float:
+    """Send each round as one bulk request; returns elapsed seconds"""
+    def post(updates):
+        session.post(f"{url}/api/slots/bulk-update", json=updates, timeout=10).raise_for_status()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(post, rounds))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test slot update ingestion')
+    parser.add_argument('--url', default='http://localhost:8000', help='Backend base URL')
+    parser.add_argument('--slots', type=int, default=30, help='Slots changing per round')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4, help='Parallel HTTP requests')
+    parser.add_argument('--camera-id', default='BENCH_CAM')
+    args = parser.parse_args()
+
+    rounds = make_rounds(args.slots, args.rounds, args.camera_id)
+    total = args.slots * args.rounds
+    session = make_session(args.concurrency)
+
+    # Warm up connections and create the benchmark slots
+    run_bulk(session, args.url, rounds[:1], 1)
+
+    print(f"{total} updates ({args.rounds} rounds x {args.slots} slots), concurrency {args.concurrency}")
+    print(f"{'endpoint':<22}{'seconds':>10}{'updates/s':>12}{'requests':>10}")
+
+    for name, runner, requests_sent in (
+        ('/api/slots/update', run_single, total),
+        ('/api/slots/bulk-update', run_bulk, args.rounds),
+    ):
+        elapsed = runner(session, args.url, rounds, args.concurrency)
+        print(f"{name:<22}{elapsed:>10.2f}{total / elapsed:>12.1f}{requests_sent:>10}")
+
+    print("Benchmark slots use the 'BENCH_' prefix; remove them from the slots collection afterwards.")
+
+
+if __name__ == '__main__':
+    main()
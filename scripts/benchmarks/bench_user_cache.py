@@ -0,0 +1,92 @@
+"""
+Gate Entry Latency Benchmark (RFID user cache)
+Drives entry/exit cycles for a pool of repeat tags through the backend's
+endpoint functions with the user cache disabled and enabled, and reports
+entry latency percentiles and the cache hit rate
+
+Usage (from project root, MongoDB running):
+    python scripts/benchmarks/bench_user_cache.py --tags 200 --cycles 2000 --concurrency 16
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.database import db_instance  # noqa: E402
+from app.main import record_entry, record_exit  # noqa: E402
+from app.models import SessionEntry, SessionExit  # noqa: E402
+from app.services.user_cache import user_cache  # noqa: E402
+
+
+async def run_cycles(tags, cycles: int, concurrency: int) -> np.ndarray:
+    """Entry then exit for random tags; returns entry latencies in ms"""
+    idle = asyncio.Queue()
+    for tag in tags:
+        idle.put_nowait(tag)
+    entry_times = []
+
+    async def gate(count: int):
+        for _ in range(count):
+            tag = await idle.get()
+            started = time.perf_counter()
+            await record_entry(SessionEntry(rfid_id=tag))
+            entry_times.append((time.perf_counter() - started) * 1000)
+            await record_exit(SessionExit(rfid_id=tag))
+            idle.put_nowait(tag)
+
+    per_gate = cycles // concurrency
+    await asyncio.gather(*[gate(per_gate) for _ in range(concurrency)])
+    return np.array(entry_times)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark gate entry latency with and without the user cache')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--database', default='smart_parking_bench')
+    parser.add_argument('--tags', type=int, default=200)
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    await db_instance.connect_to_database(args.uri, args.database)
+    db = db_instance.database
+
+    prefix = f"BENCH_{int(time.time())}"
+    tags = [f"{prefix}_{i:05d}" for i in range(args.tags)]
+    random.shuffle(tags)
+    await db.users.insert_many([
+        {
+            "rfid_id": tag,
+            "user_name": "User Cache Benchmark",
+            "vehicle_no": tag,
+            "wallet_balance": 1_000_000.0
+        }
+        for tag in tags
+    ])
+
+    print(f"{args.cycles} entry/exit cycles, {args.tags} tags, {args.concurrency} gates, latency in ms")
+    print(f"{'user cache':<16}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}{'hit rate':>10}")
+    for enabled in (False, True):
+        user_cache.configure(enabled=enabled)
+        user_cache.hits = user_cache.misses = 0
+        samples = await run_cycles(tags, args.cycles, args.concurrency)
+        hit_rate = user_cache.get_stats()["hit_rate"] if enabled else None
+        print(f"{'enabled' if enabled else 'disabled':<16}{np.percentile(samples, 50):>10.2f}"
+              f"{np.percentile(samples, 95):>10.2f}{np.percentile(samples, 99):>10.2f}"
+              f"{samples.mean():>10.2f}{hit_rate if hit_rate is not None else '-':>10}")
+
+    await db.users.delete_many({"rfid_id": {"$in": tags}})
+    await db.sessions.delete_many({"rfid_id": {"$in": tags}})
+    await db.transactions.delete_many({"rfid_id": {"$in": tags}})
+    await db_instance.close_database_connection()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
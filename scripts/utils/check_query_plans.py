@@ -0,0 +1,113 @@
+"""
+Query Plan Check
+Explains the query shapes the backend endpoints run and fails if any of them
+scans a whole collection or sorts in memory instead of walking an index
+
+Connecting through the backend's database layer creates the indexes first.
+
+Usage (from project root, MongoDB running):
+    python scripts/utils/check_query_plans.py --database smart_parking
+"""
+import sys
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.database import db_instance, get_connection_string, get_database_name  # noqa: E402
+
+INDEX_STAGES = {"IXSCAN", "COUNT_SCAN", "IDHACK", "EXPRESS_IXSCAN", "DISTINCT_SCAN"}
+
+
+def plan_stages(plan: dict) -> list:
+    """(stage, index name) for every stage in a winning plan tree"""
+    stages = [(plan.get("stage"), plan.get("indexName"))]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def winning_plan(explain: dict) -> dict:
+    planner = explain.get("queryPlanner") or explain["stages"][0]["$cursor"]["queryPlanner"]
+    return planner["winningPlan"]
+
+
+def query_shapes() -> list:
+    """(endpoint query, explain command, forbid in-memory sort)"""
+    now = datetime.utcnow()
+    sort_desc = {"entry_time": -1, "_id": -1}
+    return [
+        ("entry/wallet/users: user by RFID",
+         {"find": "users", "filter": {"rfid_id": "X"}, "limit": 1}, False),
+        ("exit: active session by RFID",
+         {"find": "sessions", "filter": {"rfid_id": "X", "status": "active"}, "limit": 1}, False),
+        ("sessions/active: newest active sessions",
+         {"find": "sessions", "filter": {"status": "active"}, "sort": sort_desc, "limit": 101}, True),
+        ("sessions/active: next page",
+         {"find": "sessions", "sort": sort_desc, "limit": 101, "filter": {
+             "status": "active",
+             "$or": [{"entry_time": {"$lt": now}}, {"entry_time": now, "_id": {"$lt": "X"}}]
+         }}, True),
+        ("status: active session count",
+         {"count": "sessions", "query": {"status": "active"}}, False),
+        ("status: total slot count",
+         {"count": "slots", "query": {"is_active": True}}, False),
+        ("status: occupied slot count",
+         {"count": "slots", "query": {"is_active": True, "is_occupied": True}}, False),
+        ("slots/update: slot by id",
+         {"find": "slots", "filter": {"slot_id": "X"}, "limit": 1}, False),
+        ("slots: listing page",
+         {"find": "slots", "filter": {"is_active": True, "slot_id": {"$gt": "X"}},
+          "sort": {"slot_id": 1}, "limit": 101}, True),
+        ("wallet/history: transactions page",
+         {"find": "transactions", "filter": {"rfid_id": "X"},
+          "sort": {"timestamp": -1, "_id": -1}, "limit": 21}, True),
+        ("analytics: rollup buckets",
+         {"find": "occupancy_rollups",
+          "filter": {"granularity": "hour", "bucket": {"$gte": now - timedelta(days=1), "$lt": now}}}, False),
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Check that endpoint queries are served by indexes')
+    parser.add_argument('--uri', default=get_connection_string())
+    parser.add_argument('--database', default=get_database_name())
+    args = parser.parse_args()
+
+    await db_instance.connect_to_database(args.uri, args.database)
+    db = db_instance.database
+
+    failures = 0
+    print(f"{'query':<44}{'result':<8}plan")
+    for name, command, forbid_sort in query_shapes():
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        stages = plan_stages(winning_plan(explain))
+        stage_names = [stage for stage, _ in stages]
+        indexes = sorted({index for _, index in stages if index})
+
+        problems = []
+        if "COLLSCAN" in stage_names or not INDEX_STAGES & set(stage_names):
+            problems.append("collection scan")
+        if forbid_sort and "SORT" in stage_names:
+            problems.append("in-memory sort")
+
+        failures += bool(problems)
+        result = "FAIL" if problems else "ok"
+        detail = " > ".join(stage_names) + (f" [{', '.join(indexes)}]" if indexes else "")
+        if problems:
+            detail += f" ({', '.join(problems)})"
+        print(f"{name:<44}{result:<8}{detail}")
+
+    await db_instance.close_database_connection()
+    print(f"\n{failures} query shape(s) not served by an index" if failures else "\nAll query shapes use indexes")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Export YOLOv8 weights to ONNX (and optionally INT8) for the ONNX Runtime backend
+
+Usage (from project root):
+    python scripts/utils/export_onnx_model.py --weights models/yolov8n.pt --int8
+    python scripts/utils/export_onnx_model.py --weights models/yolov8n.pt --int8 --calibration-dir recorded_frames/
+"""
+import sys
+import argparse
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "vision"))
+
+from src.inference_backends import letterbox, to_input_tensor  # noqa: E402
+
+
+class FrameCalibrationReader:
+    """Feeds recorded frames to ONNX Runtime static quantization"""
+
+    def __init__(self, frames_dir: str, input_name: str, input_size: int, limit: int = 100):
+        paths = sorted(p for p in Path(frames_dir).iterdir()
+                       if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:limit]
+        self.inputs = iter(
+            {input_name: to_input_tensor([letterbox(cv2.imread(str(p)), input_size)[0]])}
+            for p in paths
+        )
+
+    def get_next(self):
+        return next(self.inputs, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export YOLOv8 to ONNX / INT8 ONNX')
+    parser.add_argument('--weights', default='models/yolov8n.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--dynamic', action='store_true', help='Dynamic batch dimension (needed for batched inference)')
+    parser.add_argument('--int8', action='store_true', help='Also write an INT8-quantized model')
+    parser.add_argument('--calibration-dir', help='Frames for static INT8 calibration (dynamic quantization otherwise)')
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    onnx_path = YOLO(args.weights).export(format='onnx', imgsz=args.imgsz, dynamic=args.dynamic, simplify=True)
+    print(f"ONNX model: {onnx_path}")
+
+    if not args.int8:
+        return
+
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantType, QuantFormat
+
+    int8_path = str(Path(onnx_path).with_suffix('.int8.onnx'))
+    if args.calibration_dir:
+        input_name = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        reader = FrameCalibrationReader(args.calibration_dir, input_name, args.imgsz)
+        quantize_static(onnx_path, int8_path, reader, quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    print(f"INT8 model: {int8_path}")
+
+
+if __name__ == '__main__':
+    main()
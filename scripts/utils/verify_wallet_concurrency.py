@@ -0,0 +1,120 @@
+"""
+Wallet Concurrency Check
+Fires parallel top-ups and exits at a running backend and checks that no
+wallet update is lost and no session is charged twice
+
+Usage (from project root, with the backend running):
+    python scripts/utils/verify_wallet_concurrency.py --topups 200 --cycles 20 --concurrency 16
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def make_session(concurrency: int) -> requests.Session:
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+    return session
+
+
+def create_user(http, url: str, rfid_id: str, balance: float):
+    response = http.post(f"{url}/api/users", json={
+        'rfid_id': rfid_id,
+        'user_name': 'Concurrency Check',
+        'vehicle_no': rfid_id,
+        'initial_balance': balance
+    }, timeout=10)
+    response.raise_for_status()
+
+
+def get_balance(http, url: str, rfid_id: str) -> float:
+    response = http.get(f"{url}/api/wallet/{rfid_id}", timeout=10)
+    response.raise_for_status()
+    return response.json()['wallet_balance']
+
+
+def check_lost_updates(http, url: str, rfid_id: str, topups: int, cycles: int,
+                       amount: float, concurrency: int) -> bool:
+    """Parallel top-ups while the same wallet goes through entry/exit cycles"""
+    start_balance = get_balance(http, url, rfid_id)
+
+    def topup(_):
+        return http.post(f"{url}/api/wallet/topup", json={
+            'rfid_id': rfid_id, 'amount': amount
+        }, timeout=30).status_code
+
+    def exit_cycles():
+        charged = 0.0
+        for _ in range(cycles):
+            http.post(f"{url}/api/entry", json={'rfid_id': rfid_id}, timeout=30).raise_for_status()
+            response = http.post(f"{url}/api/exit", json={'rfid_id': rfid_id}, timeout=30)
+            response.raise_for_status()
+            charged += response.json()['amount_charged']
+        return charged
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        exits = pool.submit(exit_cycles)
+        statuses = list(pool.map(topup, range(topups)))
+        charged = exits.result()
+    elapsed = time.perf_counter() - started
+
+    credited = statuses.count(200) * amount
+    expected = round(start_balance + credited - charged, 2)
+    actual = round(get_balance(http, url, rfid_id), 2)
+    ok = expected == actual and statuses.count(200) == topups
+
+    print(f"lost updates: {topups} top-ups x {amount} + {cycles} exits in {elapsed:.2f}s")
+    print(f"  start {start_balance}, credited {credited}, charged {charged}")
+    print(f"  expected {expected}, actual {actual} -> {'OK' if ok else 'FAILED'}")
+    return ok
+
+
+def check_double_exit(http, url: str, rfid_id: str, concurrency: int) -> bool:
+    """Parallel exits for one session must charge exactly once"""
+    http.post(f"{url}/api/entry", json={'rfid_id': rfid_id}, timeout=30).raise_for_status()
+    start_balance = get_balance(http, url, rfid_id)
+
+    def exit_once(_):
+        response = http.post(f"{url}/api/exit", json={'rfid_id': rfid_id}, timeout=30)
+        return response.status_code, response.json() if response.ok else None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(exit_once, range(concurrency)))
+
+    receipts = [body for status, body in results if status == 200]
+    charged = sum(receipt['amount_charged'] for receipt in receipts)
+    actual = round(get_balance(http, url, rfid_id), 2)
+    ok = len(receipts) == 1 and actual == round(start_balance - charged, 2)
+
+    print(f"double exit: {concurrency} parallel exits -> {len(receipts)} receipt(s), "
+          f"balance {start_balance} -> {actual} -> {'OK' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check wallet updates under concurrent top-ups and exits')
+    parser.add_argument('--url', default='http://localhost:8000', help='Backend base URL')
+    parser.add_argument('--topups', type=int, default=200)
+    parser.add_argument('--cycles', type=int, default=20, help='Entry/exit cycles during the top-ups')
+    parser.add_argument('--amount', type=float, default=5.0, help='Amount per top-up')
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    http = make_session(args.concurrency)
+    rfid_id = f"CONCHECK_{int(time.time())}"
+    create_user(http, args.url, rfid_id, balance=1000.0)
+    print(f"Using test user {rfid_id}")
+
+    ok = check_lost_updates(http, args.url, rfid_id, args.topups, args.cycles,
+                            args.amount, args.concurrency)
+    ok = check_double_exit(http, args.url, rfid_id, args.concurrency) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
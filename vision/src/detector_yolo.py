@@ -4,31 +4,40 @@ Uses pre-trained YOLOv8 model to detect vehicles in parking slots
 """
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, Union
 import logging
 
+from .slot_overlap import SlotOverlapEngine, SlotMaskEngine, slots_signature, compute_inference_rois
+from .inference_backends import InferenceBackend, create_backend
+
 logger = logging.getLogger(__name__)
 
 
 class YOLODetector:
     """YOLO-based parking slot occupancy detector"""
     
-    def __init__(self, model_path: str = "yolov8n.pt", confidence_threshold: float = 0.5):
+    def __init__(self, model_path: str = "yolov8n.pt", confidence_threshold: float = 0.5,
+                 backend_config: Optional[Dict] = None):
         """
         Initialize YOLO detector
         
         Args:
             model_path: Path to YOLO model weights
             confidence_threshold: Minimum confidence for detections
+            backend_config: Inference backend settings (vision_settings.inference_backend)
         """
         self.confidence_threshold = confidence_threshold
         self.vehicle_classes = [2, 3, 5, 7]  # car, motorcycle, bus, truck in COCO dataset
         
+        # Overlap engines keyed by camera (or slot configuration when no camera is given)
+        self._overlap_engines: Dict = {}
+        # Inference regions keyed the same way
+        self._inference_rois: Dict = {}
+        
         try:
             logger.info(f"Loading YOLO model: {model_path}")
-            self.model = YOLO(model_path)
-            logger.info("YOLO model loaded successfully")
+            self.backend: InferenceBackend = create_backend(model_path, backend_config)
+            logger.info(f"YOLO model loaded successfully ({self.backend.name} backend)")
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
             raise
@@ -97,44 +106,179 @@ class YOLODetector:
         overlap_ratio = points_inside / total_points
         return overlap_ratio >= overlap_threshold
     
-    def detect_vehicles(self, frame: np.ndarray) -> List[Dict]:
+    def parse_detections(self, detections: np.ndarray, offset: Tuple[int, int] = (0, 0)) -> List[Dict]:
+        """
+        Convert one image's backend output into vehicle detections
+        
+        Args:
+            detections: Array of (x1, y1, x2, y2, confidence, class) rows
+            offset: (x, y) of the crop the result came from, to map boxes back to the frame
+            
+        Returns:
+            List of detected vehicles with bounding boxes and confidence
+        """
+        vehicles = []
+        dx, dy = offset
+        
+        # Process detections
+        for x1, y1, x2, y2, conf, cls in detections:
+            cls = int(cls)
+            conf = float(conf)
+            x1, y1, x2, y2 = int(x1) + dx, int(y1) + dy, int(x2) + dx, int(y2) + dy
+            
+            # Filter for vehicle classes and confidence
+            if cls in self.vehicle_classes and conf >= self.confidence_threshold:
+                vehicles.append({
+                    'class': cls,
+                    'confidence': conf,
+                    'bbox': (x1, y1, x2, y2),
+                    'center': ((x1 + x2) // 2, (y1 + y2) // 2)
+                })
+        
+        return vehicles
+    
+    def suppress_duplicates(self, vehicles: List[Dict], iou_threshold: float = 0.5) -> List[Dict]:
+        """
+        Drop lower-confidence boxes that duplicate a vehicle seen in an overlapping tile
+        
+        Args:
+            vehicles: Detections in frame coordinates
+            iou_threshold: Overlap above which two boxes are the same vehicle
+            
+        Returns:
+            Detections with duplicates removed
+        """
+        if len(vehicles) < 2:
+            return vehicles
+        
+        ordered = sorted(vehicles, key=lambda v: v['confidence'], reverse=True)
+        boxes = np.array([v['bbox'] for v in ordered], dtype=np.float64)
+        areas = (boxes[:, 2] - boxes[:, 0]).clip(0) * (boxes[:, 3] - boxes[:, 1]).clip(0)
+        
+        keep = []
+        suppressed = np.zeros(len(ordered), dtype=bool)
+        for i in range(len(ordered)):
+            if suppressed[i]:
+                continue
+            keep.append(ordered[i])
+            ix1 = np.maximum(boxes[i, 0], boxes[:, 0])
+            iy1 = np.maximum(boxes[i, 1], boxes[:, 1])
+            ix2 = np.minimum(boxes[i, 2], boxes[:, 2])
+            iy2 = np.minimum(boxes[i, 3], boxes[:, 3])
+            inter = (ix2 - ix1).clip(0) * (iy2 - iy1).clip(0)
+            union = areas[i] + areas - inter
+            iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+            suppressed |= iou > iou_threshold
+        
+        return keep
+    
+    def get_inference_rois(self, slots: List[Dict], frame_shape: Tuple[int, ...],
+                           camera_id: Optional[str] = None, padding: int = 32,
+                           max_tiles: int = 1) -> List[Tuple[int, int, int, int]]:
+        """
+        Get the cached frame regions covering a camera's slots
+        
+        Args:
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+            frame_shape: Shape of the camera frames
+            camera_id: Camera the slots belong to
+            padding: Pixels added around each slot
+            max_tiles: Maximum number of regions
+            
+        Returns:
+            List of (x1, y1, x2, y2) regions to run inference on
+        """
+        signature = slots_signature(slots)
+        params = (signature, tuple(frame_shape[:2]), padding, max_tiles)
+        key = camera_id if camera_id is not None else signature
+        
+        cached = self._inference_rois.get(key)
+        if cached is None or cached[0] != params:
+            rois = compute_inference_rois(slots, frame_shape, padding, max_tiles)
+            covered = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rois)
+            logger.info(f"Inference regions for {camera_id or 'slots'}: {rois} "
+                        f"({covered / (frame_shape[0] * frame_shape[1]):.0%} of frame)")
+            cached = (params, rois)
+            self._inference_rois[key] = cached
+        
+        return cached[1]
+    
+    def detect_vehicles(self, frame: np.ndarray,
+                        rois: Optional[List[Tuple[int, int, int, int]]] = None) -> List[Dict]:
         """
         Detect vehicles in frame using YOLO
         
         Args:
             frame: Input image frame
+            rois: Optional (x1, y1, x2, y2) regions; only these crops are processed
             
         Returns:
             List of detected vehicles with bounding boxes and confidence
         """
+        if rois:
+            return self.detect_vehicles_batch([frame], [rois])[0]
+        
         try:
             # Run inference
-            results = self.model(frame, verbose=False)[0]
-            
-            vehicles = []
-            
-            # Process detections
-            for box in results.boxes:
-                # Get class, confidence, and coordinates
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                
-                # Filter for vehicle classes and confidence
-                if cls in self.vehicle_classes and conf >= self.confidence_threshold:
-                    vehicles.append({
-                        'class': cls,
-                        'confidence': conf,
-                        'bbox': (x1, y1, x2, y2),
-                        'center': ((x1 + x2) // 2, (y1 + y2) // 2)
-                    })
-            
-            return vehicles
+            detections = self.backend.predict([frame])[0]
+            return self.parse_detections(detections)
         
         except Exception as e:
             logger.error(f"Error detecting vehicles: {e}")
             return []
     
+    def detect_vehicles_batch(self, frames: List[np.ndarray],
+                              rois_list: Optional[List[Optional[List[Tuple[int, int, int, int]]]]] = None
+                              ) -> List[List[Dict]]:
+        """
+        Detect vehicles in several frames with a single batched forward pass
+        
+        Args:
+            frames: Input image frames (sizes may differ)
+            rois_list: Optional per-frame list of regions; frames with regions
+                are cropped and every crop joins the same batch
+            
+        Returns:
+            One list of detected vehicles per input frame
+        """
+        if not frames:
+            return []
+        
+        # Flatten all crops into one batch, remembering where each came from
+        crops, owners, offsets = [], [], []
+        for index, frame in enumerate(frames):
+            height, width = frame.shape[:2]
+            rois = rois_list[index] if rois_list else None
+            # An empty crop would fail the whole batch; regions computed for
+            # another frame size may fall outside this one
+            regions = [
+                (max(0, x1), max(0, y1), min(width, x2), min(height, y2))
+                for x1, y1, x2, y2 in rois or []
+            ]
+            regions = [(x1, y1, x2, y2) for x1, y1, x2, y2 in regions if x2 > x1 and y2 > y1]
+            for x1, y1, x2, y2 in regions or [(0, 0, width, height)]:
+                crops.append(frame[y1:y2, x1:x2])
+                owners.append(index)
+                offsets.append((x1, y1))
+        
+        try:
+            results = self.backend.predict(crops)
+        
+        except Exception as e:
+            logger.error(f"Error detecting vehicles in batch of {len(frames)}: {e}")
+            return [[] for _ in frames]
+        
+        detections = [[] for _ in frames]
+        for result, owner, offset in zip(results, owners, offsets):
+            detections[owner].extend(self.parse_detections(result, offset))
+        
+        # Vehicles straddling overlapping tiles are seen more than once
+        for index, rois in enumerate(rois_list or []):
+            if rois and len(rois) > 1:
+                detections[index] = self.suppress_duplicates(detections[index])
+        
+        return detections
+    
     def check_slot_occupancy(self, frame: np.ndarray, slot_polygon: List[List[int]], 
                             overlap_threshold: float = 0.3) -> Dict:
         """
@@ -169,7 +313,9 @@ class YOLODetector:
         }
     
     def detect_all_slots(self, frame: np.ndarray, slots: List[Dict], 
-                        overlap_threshold: float = 0.3) -> Dict[str, Dict]:
+                        overlap_threshold: float = 0.3, overlap_mode: str = "grid",
+                        camera_id: Optional[str] = None,
+                        rois: Optional[List[Tuple[int, int, int, int]]] = None) -> Dict[str, Dict]:
         """
         Detect occupancy for all slots in frame
         
@@ -177,45 +323,82 @@ class YOLODetector:
             frame: Input image frame
             slots: List of slot dictionaries with 'slot_id' and 'polygon'
             overlap_threshold: Minimum overlap to consider slot occupied
+            overlap_mode: "grid" (5x5 point sampling) or "mask" (rasterized pixel overlap)
+            camera_id: Camera the slots belong to, used to cache precomputed geometry
+            rois: Optional regions to restrict inference to (see get_inference_rois)
             
         Returns:
             Dictionary mapping slot_id to occupancy information
         """
         # Detect all vehicles once
-        vehicles = self.detect_vehicles(frame)
+        vehicles = self.detect_vehicles(frame, rois)
         
-        results = {}
+        return self.match_vehicles_to_slots(vehicles, slots, overlap_threshold,
+                                            overlap_mode=overlap_mode,
+                                            frame_shape=frame.shape,
+                                            camera_id=camera_id)
+    
+    def get_overlap_engine(self, slots: List[Dict], overlap_mode: str = "grid",
+                           frame_shape: Optional[Tuple[int, ...]] = None,
+                           camera_id: Optional[str] = None) -> Union[SlotOverlapEngine, SlotMaskEngine]:
+        """
+        Get the cached overlap engine for a camera's slots
         
-        for slot in slots:
-            slot_id = slot['slot_id']
-            polygon = slot['polygon']
-            
-            # Check if any vehicle overlaps with this slot
-            occupied = False
-            best_match = None
-            
-            for vehicle in vehicles:
-                if self.box_in_polygon(vehicle['bbox'], polygon, overlap_threshold):
-                    if best_match is None or vehicle['confidence'] > best_match['confidence']:
-                        best_match = vehicle
-                        occupied = True
+        The engine is rebuilt whenever the slot configuration (or, for mask
+        mode, the frame size) differs from the one it was built for.
+        
+        Args:
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+            overlap_mode: "grid" or "mask"
+            frame_shape: Frame shape, required for mask mode
+            camera_id: Camera the slots belong to
             
-            if occupied and best_match:
-                results[slot_id] = {
-                    'occupied': True,
-                    'confidence': best_match['confidence'],
-                    'vehicle_class': best_match['class'],
-                    'vehicle_bbox': best_match['bbox']
-                }
-            else:
-                results[slot_id] = {
-                    'occupied': False,
-                    'confidence': 1.0,
-                    'vehicle_class': None,
-                    'vehicle_bbox': None
-                }
+        Returns:
+            SlotOverlapEngine or SlotMaskEngine for the slots
+        """
+        signature = slots_signature(slots)
+        key = (overlap_mode, camera_id if camera_id is not None else signature)
+        engine = self._overlap_engines.get(key)
+        
+        if overlap_mode == "mask":
+            if frame_shape is None:
+                raise ValueError("frame_shape is required for mask overlap mode")
+            stale = (engine is None or engine.signature != signature
+                     or engine.frame_shape != tuple(frame_shape[:2]))
+            if stale:
+                engine = SlotMaskEngine(slots, frame_shape)
+                logger.info(f"Rasterized {len(slots)} slot mask(s) at "
+                            f"{frame_shape[1]}x{frame_shape[0]} for {camera_id or 'slots'}")
+        elif overlap_mode == "grid":
+            if engine is None or engine.signature != signature:
+                engine = SlotOverlapEngine(slots)
+                logger.info(f"Built overlap engine for {len(slots)} slot(s) for {camera_id or 'slots'}")
+        else:
+            raise ValueError(f"Unknown overlap mode: {overlap_mode}")
         
-        return results
+        self._overlap_engines[key] = engine
+        return engine
+    
+    def match_vehicles_to_slots(self, vehicles: List[Dict], slots: List[Dict],
+                                overlap_threshold: float = 0.3, overlap_mode: str = "grid",
+                                frame_shape: Optional[Tuple[int, ...]] = None,
+                                camera_id: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Assign detected vehicles to slots
+        
+        Args:
+            vehicles: Detections from detect_vehicles
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+            overlap_threshold: Minimum overlap to consider slot occupied
+            overlap_mode: "grid" or "mask"
+            frame_shape: Frame shape, required for mask mode
+            camera_id: Camera the slots belong to
+            
+        Returns:
+            Dictionary mapping slot_id to occupancy information
+        """
+        engine = self.get_overlap_engine(slots, overlap_mode, frame_shape, camera_id)
+        return engine.match(vehicles, overlap_threshold)
     
     def visualize_detections(self, frame: np.ndarray, slots: List[Dict], 
                             slot_statuses: Dict[str, Dict]) -> np.ndarray:
@@ -0,0 +1,161 @@
+"""
+Latest-Frame Capture Stage
+Decodes a camera stream in its own thread and exposes only the newest frame
+"""
+import cv2
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameCapture:
+    """Capture thread with a single-slot buffer that drops stale frames"""
+
+    def __init__(self, camera_id: str, stream_url: Union[str, int], reconnect_delay: float = 5.0):
+        """
+        Initialize capture stage
+
+        Args:
+            camera_id: Camera identifier (for logging)
+            stream_url: OpenCV source - RTSP/HTTP URL, video file path or device index
+            reconnect_delay: Seconds to wait before reopening a failed stream
+        """
+        self.camera_id = camera_id
+        self.stream_url = stream_url
+        self.reconnect_delay = reconnect_delay
+
+        # Video files decode faster than real time; pace them at their native fps
+        self.is_file = isinstance(stream_url, str) and Path(stream_url).is_file()
+
+        self.cap = None
+        self.thread = None
+        self.running = False
+        self.condition = threading.Condition()
+
+        # Single-slot buffer
+        self.frame: Optional[np.ndarray] = None
+        self.frame_seq = 0
+        self.frame_time = 0.0
+        self.consumed = True
+
+        # When set, frames go to a SharedFrameRing read by other processes
+        self.ring = None
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.reconnects = 0
+
+    def start(self) -> bool:
+        """
+        Open the stream and start the decoding thread
+
+        Returns:
+            True if the stream was opened
+        """
+        self.cap = cv2.VideoCapture(self.stream_url)
+        if not self.cap.isOpened():
+            logger.error(f"Failed to open camera {self.camera_id}")
+            return False
+
+        self.running = True
+        self.thread = threading.Thread(
+            target=self.run,
+            name=f"capture-{self.camera_id}",
+            daemon=True
+        )
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Stop decoding and release the stream"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.cap:
+            self.cap.release()
+
+    def run(self):
+        """Decoding loop: keep reading and overwrite the buffered frame"""
+        frame_interval = 0.0
+        if self.is_file:
+            source_fps = self.cap.get(cv2.CAP_PROP_FPS) or 0
+            frame_interval = 1.0 / source_fps if source_fps > 0 else 0.0
+
+        while self.running:
+            started = time.monotonic()
+            ret, frame = self.cap.read()
+
+            if not ret:
+                logger.warning(f"Failed to read frame from {self.camera_id}, reconnecting...")
+                self.cap.release()
+                time.sleep(self.reconnect_delay)
+                self.cap = cv2.VideoCapture(self.stream_url)
+                self.reconnects += 1
+                continue
+
+            if self.ring is not None:
+                self.ring.write(frame)
+                self.frame_time = time.time()
+                self.frames_captured += 1
+            else:
+                self.buffer(frame)
+
+            if frame_interval:
+                time.sleep(max(0.0, frame_interval - (time.monotonic() - started)))
+
+    def buffer(self, frame: np.ndarray):
+        """Replace the single-slot buffer with a new frame"""
+        with self.condition:
+            if not self.consumed:
+                self.frames_dropped += 1
+            self.frame = frame
+            self.frame_seq += 1
+            self.frame_time = time.time()
+            self.consumed = False
+            self.frames_captured += 1
+            self.condition.notify_all()
+
+    def read(self, timeout: float = 1.0) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Take the newest frame that has not been returned yet
+
+        Args:
+            timeout: Maximum seconds to wait for a new frame
+
+        Returns:
+            Tuple of (frame or None on timeout, frame sequence number)
+        """
+        with self.condition:
+            if self.consumed:
+                self.condition.wait_for(lambda: not self.consumed or not self.running, timeout)
+            if self.consumed:
+                return None, self.frame_seq
+
+            self.consumed = True
+            self.frames_processed += 1
+            return self.frame, self.frame_seq
+
+    def frame_valid(self, seq: int) -> bool:
+        """Frames are never reused once returned, so they stay valid"""
+        return True
+
+    def get_stats(self) -> Dict:
+        """Get capture counters"""
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'frames_processed': self.frames_processed,
+            'reconnects': self.reconnects,
+            'frame_age_s': round(time.time() - self.frame_time, 3) if self.frame_time else None
+        }
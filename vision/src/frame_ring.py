@@ -0,0 +1,277 @@
+"""
+Shared-Memory Frame Ring
+Preallocated ring of frames in multiprocessing.shared_memory so capture and
+inference processes can exchange frames without pickling them
+"""
+import cv2
+import time
+import logging
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Header layout (int64): [latest seq, then (seq, timestamp_ns) per slot]
+# A slot's seq is -1 while the writer is filling it
+WRITING = -1
+
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of frames shared between one writer and any number of readers
+
+    The writer copies each captured frame into the next slot once; readers
+    get a read-only view of the slot and can check afterwards whether the
+    writer has lapped them.
+    """
+
+    def __init__(self, name: str, frame_shape: Tuple[int, ...], slots: int, create: bool = False):
+        """
+        Create or attach to a ring
+
+        Args:
+            name: Shared memory base name (frames live in `<name>_frames`)
+            frame_shape: (height, width, channels) of every frame in the ring
+            slots: Number of frames in the ring
+            create: Allocate the shared memory (writer side) instead of attaching
+        """
+        self.name = name
+        self.frame_shape = tuple(frame_shape)
+        self.slots = max(2, int(slots))
+        self.owner = create
+
+        header_size = (1 + 2 * self.slots) * np.dtype(np.int64).itemsize
+        frames_size = self.slots * int(np.prod(self.frame_shape))
+        if create:
+            self.header_shm = shared_memory.SharedMemory(name=f"{name}_header", create=True, size=header_size)
+            self.frames_shm = shared_memory.SharedMemory(name=f"{name}_frames", create=True, size=frames_size)
+        else:
+            self.header_shm = shared_memory.SharedMemory(name=f"{name}_header")
+            self.frames_shm = shared_memory.SharedMemory(name=f"{name}_frames")
+
+        self.header = np.ndarray((1 + 2 * self.slots,), dtype=np.int64, buffer=self.header_shm.buf)
+        self.frames = np.ndarray((self.slots,) + self.frame_shape, dtype=np.uint8, buffer=self.frames_shm.buf)
+        if create:
+            self.header[:] = 0
+
+        # Writer statistics
+        self.frames_written = 0
+        self.frames_resized = 0
+        self.bytes_written = 0
+        self.started = time.monotonic()
+
+    @classmethod
+    def create(cls, name: str, frame_shape: Tuple[int, ...], slots: int = 4) -> 'SharedFrameRing':
+        """Allocate a new ring (writer side)"""
+        return cls(name, frame_shape, slots, create=True)
+
+    @classmethod
+    def attach(cls, spec: Dict) -> 'SharedFrameRing':
+        """Attach to an existing ring described by spec() (reader side)"""
+        return cls(spec['name'], spec['frame_shape'], spec['slots'])
+
+    def spec(self) -> Dict:
+        """Picklable description handed to reader processes"""
+        return {'name': self.name, 'frame_shape': self.frame_shape, 'slots': self.slots}
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the newest complete frame (0 = none yet)"""
+        return int(self.header[0])
+
+    def slot_seq(self, seq: int) -> int:
+        """Sequence number currently stored in the slot that held `seq`"""
+        return int(self.header[1 + 2 * ((seq - 1) % self.slots)])
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        Copy a frame into the next slot
+
+        Args:
+            frame: BGR frame; resized if it does not match the ring shape
+            timestamp: Capture time (defaults to time.time())
+
+        Returns:
+            Sequence number assigned to the frame
+        """
+        if frame.shape != self.frame_shape:
+            frame = cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]))
+            self.frames_resized += 1
+
+        seq = self.latest_seq + 1
+        index = (seq - 1) % self.slots
+        timestamp = time.time() if timestamp is None else timestamp
+
+        # Mark the slot as in progress so readers never accept a torn frame
+        self.header[1 + 2 * index] = WRITING
+        np.copyto(self.frames[index], frame)
+        self.header[2 + 2 * index] = int(timestamp * 1e9)
+        self.header[1 + 2 * index] = seq
+        self.header[0] = seq
+
+        self.frames_written += 1
+        self.bytes_written += frame.nbytes
+        return seq
+
+    def read(self, seq: int) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Get a zero-copy view of a frame
+
+        Args:
+            seq: Sequence number to read
+
+        Returns:
+            Tuple of (read-only view or None if the slot was overwritten, capture timestamp)
+        """
+        index = (seq - 1) % self.slots
+        if int(self.header[1 + 2 * index]) != seq:
+            return None, 0.0
+
+        view = self.frames[index]
+        view.flags.writeable = False
+        return view, int(self.header[2 + 2 * index]) / 1e9
+
+    def close(self):
+        """Detach from the ring; the writer also frees the shared memory"""
+        self.header = None
+        self.frames = None
+        for shm in (self.header_shm, self.frames_shm):
+            shm.close()
+            if self.owner:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def get_stats(self) -> Dict:
+        """Get writer throughput counters"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'frames_written': self.frames_written,
+            'frames_resized': self.frames_resized,
+            'write_fps': round(self.frames_written / elapsed, 2),
+            'write_mb_s': round(self.bytes_written / elapsed / 1e6, 2)
+        }
+
+
+class SharedFrameReader:
+    """
+    Reader over a SharedFrameRing with the LatestFrameCapture interface
+
+    Lets VisionService.process_camera consume frames captured in another
+    process unchanged.
+    """
+
+    def __init__(self, camera_id: str, ring_spec: Dict, copy_frames: bool = False,
+                 poll_interval: float = 0.002):
+        """
+        Initialize reader
+
+        Args:
+            camera_id: Camera identifier (for logging)
+            ring_spec: SharedFrameRing.spec() of the camera's ring
+            copy_frames: Return private copies instead of views into shared memory
+            poll_interval: Seconds between checks for a new frame
+        """
+        self.camera_id = camera_id
+        self.ring_spec = ring_spec
+        self.copy_frames = copy_frames
+        self.poll_interval = poll_interval
+
+        self.ring: Optional[SharedFrameRing] = None
+        self.running = False
+        self.last_seq = 0
+        self.frame_time = 0.0
+
+        # Counters
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.frames_copied = 0
+        self.stale_views = 0
+        self.lapped_reads = 0
+        self.started = time.monotonic()
+
+    def start(self) -> bool:
+        """Attach to the shared ring"""
+        try:
+            self.ring = SharedFrameRing.attach(self.ring_spec)
+        except FileNotFoundError:
+            logger.error(f"Frame ring for camera {self.camera_id} does not exist")
+            return False
+        self.last_seq = self.ring.latest_seq
+        self.running = True
+        return True
+
+    def stop(self):
+        """Detach from the shared ring"""
+        self.running = False
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+    def read(self, timeout: float = 1.0) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Take the newest frame that has not been returned yet
+
+        Args:
+            timeout: Maximum seconds to wait for a new frame
+
+        Returns:
+            Tuple of (frame or None on timeout, frame sequence number)
+        """
+        deadline = time.monotonic() + timeout
+        while self.running:
+            seq = self.ring.latest_seq
+            if seq > self.last_seq:
+                frame, timestamp = self.ring.read(seq)
+                if frame is not None and self.copy_frames:
+                    frame = frame.copy()
+                    self.frames_copied += 1
+                    # The writer may have reused the slot during the copy
+                    if self.ring.slot_seq(seq) != seq:
+                        frame = None
+                if frame is not None:
+                    if self.last_seq:
+                        self.frames_dropped += seq - self.last_seq - 1
+                    self.last_seq = seq
+                    self.frame_time = timestamp
+                    self.frames_processed += 1
+                    return frame, seq
+                # Writer is filling (or has just refilled) this slot
+                self.lapped_reads += 1
+
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        return None, self.last_seq
+
+    def frame_valid(self, seq: int) -> bool:
+        """
+        Check that a frame returned by read() was not overwritten while in use
+
+        Call after processing a zero-copy view; a False result means the
+        writer lapped the reader and the view may mix two frames. Copies are
+        checked once the copy is done, in read(), and stay valid.
+        """
+        if self.copy_frames or self.ring is None:
+            return True
+        if self.ring.slot_seq(seq) == seq:
+            return True
+        self.stale_views += 1
+        return False
+
+    def get_stats(self) -> Dict:
+        """Get reader counters"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'frames_processed': self.frames_processed,
+            'frames_dropped': self.frames_dropped,
+            'frames_copied': self.frames_copied,
+            'stale_views': self.stale_views,
+            'lapped_reads': self.lapped_reads,
+            'read_fps': round(self.frames_processed / elapsed, 2),
+            'frame_age_s': round(time.time() - self.frame_time, 3) if self.frame_time else None
+        }
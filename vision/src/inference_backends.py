@@ -0,0 +1,194 @@
+"""
+Inference Backends for YOLODetector
+Common interface over ultralytics (PyTorch) and ONNX Runtime CPU models
+"""
+import abc
+import cv2
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def letterbox(image: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize keeping aspect ratio and pad to a square model input
+
+    Args:
+        image: BGR image
+        size: Model input width/height
+
+    Returns:
+        Tuple of (padded image, scale factor, (pad_x, pad_y))
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (pad_x, pad_y)
+
+
+def to_input_tensor(images: List[np.ndarray]) -> np.ndarray:
+    """Stack letterboxed BGR images into a normalized RGB NCHW float batch"""
+    batch = np.stack([image[:, :, ::-1].transpose(2, 0, 1) for image in images])
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+class InferenceBackend(abc.ABC):
+    """
+    Base class for detector backends
+
+    predict() takes a list of BGR images and returns one array per image
+    with rows of (x1, y1, x2, y2, confidence, class) in image coordinates.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def predict(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """Run detection on a batch of BGR images"""
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch YOLO model loaded through ultralytics"""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path: str):
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+
+    def predict(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        outputs = []
+        for result in self.model(list(images), verbose=False):
+            boxes = result.boxes
+            outputs.append(np.column_stack([
+                boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy()
+            ]).reshape(-1, 6))
+        return outputs
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    YOLOv8 ONNX export run with ONNX Runtime
+
+    Works with FP32 and INT8-quantized exports. Other execution providers
+    (e.g. OpenVINOExecutionProvider from onnxruntime-openvino) can be
+    selected through `providers`.
+    """
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path: str, input_size: int = 640,
+                 providers: Optional[List[str]] = None, intra_op_threads: int = 0,
+                 score_threshold: float = 0.25, iou_threshold: float = 0.45):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("onnxruntime backend requires 'pip install onnxruntime'") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=providers or ["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = input_size
+        # Exports without dynamic=True have a fixed batch of 1
+        self.max_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        self.score_threshold = score_threshold
+        self.iou_threshold = iou_threshold
+
+    def decode(self, output: np.ndarray, scale: float, pad: Tuple[int, int],
+               image_shape: Tuple[int, ...]) -> np.ndarray:
+        """Convert one (4 + classes, anchors) YOLOv8 output into detections"""
+        predictions = output.T
+        class_scores = predictions[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+
+        keep = scores >= self.score_threshold
+        predictions, classes, scores = predictions[keep], classes[keep], scores[keep]
+        if not len(scores):
+            return np.zeros((0, 6), dtype=np.float32)
+
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        boxes = np.column_stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+        # Class-aware NMS: offset boxes per class so different classes never overlap
+        offset = classes[:, None] * (self.input_size + 1)
+        nms_boxes = boxes + offset
+        indices = cv2.dnn.NMSBoxes(
+            np.column_stack([nms_boxes[:, :2], nms_boxes[:, 2:] - nms_boxes[:, :2]]).tolist(),
+            scores.tolist(), self.score_threshold, self.iou_threshold
+        )
+        indices = np.array(indices, dtype=np.int64).reshape(-1)
+
+        # Undo letterboxing
+        boxes = boxes[indices]
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / scale).clip(0, image_shape[1])
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / scale).clip(0, image_shape[0])
+        return np.column_stack([boxes, scores[indices], classes[indices]]).astype(np.float32)
+
+    def predict(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        prepared = [letterbox(image, self.input_size) for image in images]
+        batch = to_input_tensor([canvas for canvas, _, _ in prepared])
+
+        chunk = self.max_batch or len(images)
+        outputs = []
+        for start in range(0, len(images), chunk):
+            outputs.extend(self.session.run(None, {self.input_name: batch[start:start + chunk]})[0])
+
+        return [
+            self.decode(output, scale, pad, image.shape)
+            for output, (_, scale, pad), image in zip(outputs, prepared, images)
+        ]
+
+
+def create_backend(model_path: str, backend_config: Optional[Dict] = None) -> InferenceBackend:
+    """
+    Build the inference backend selected in the vision config
+
+    Args:
+        model_path: PyTorch weights used by the ultralytics backend
+        backend_config: vision_settings.inference_backend section
+
+    Returns:
+        Configured InferenceBackend
+    """
+    backend_config = backend_config or {}
+    backend_type = backend_config.get('type', 'ultralytics')
+
+    if backend_type == 'ultralytics':
+        return UltralyticsBackend(model_path)
+
+    if backend_type == 'onnxruntime':
+        onnx_path = backend_config.get('onnx_model')
+        if backend_config.get('use_int8', False):
+            onnx_path = backend_config.get('int8_model', onnx_path)
+        if not onnx_path:
+            raise ValueError("inference_backend.onnx_model is required for the onnxruntime backend")
+        logger.info(f"Using ONNX Runtime backend: {onnx_path}")
+        return OnnxRuntimeBackend(
+            onnx_path,
+            input_size=backend_config.get('input_size', 640),
+            providers=backend_config.get('providers'),
+            intra_op_threads=backend_config.get('intra_op_threads', 0)
+        )
+
+    raise ValueError(f"Unknown inference backend: {backend_type}")
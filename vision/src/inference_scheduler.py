@@ -0,0 +1,173 @@
+"""
+Batched Multi-Camera Inference Scheduler
+Collects the latest frame from each camera thread and runs them through
+the shared YOLO model as one batch
+"""
+import time
+import logging
+import threading
+from concurrent.futures import Future, CancelledError
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    """Central scheduler that batches camera frames into single forward passes"""
+
+    def __init__(self, detector, max_batch_size: int = 8, max_wait_ms: float = 20):
+        """
+        Initialize scheduler
+
+        Args:
+            detector: YOLODetector used for batched inference
+            max_batch_size: Maximum number of frames per forward pass
+            max_wait_ms: Longest time the first queued frame waits for a batch to fill
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+
+        # Latest pending frame per camera, in arrival order
+        self.pending: Dict[str, Tuple[np.ndarray, Optional[List], Future, float]] = {}
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_inferred = 0
+        self.frames_replaced = 0
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="inference-scheduler", daemon=True)
+        self.thread.start()
+        logger.info(f"Inference scheduler started (batch<={self.max_batch_size}, "
+                    f"wait<={self.max_wait * 1000:.0f}ms)")
+
+    def stop(self):
+        """Stop the scheduler and cancel pending requests"""
+        with self.condition:
+            self.running = False
+            for _, _, future, _ in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+            self.condition.notify_all()
+
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("Inference scheduler stopped")
+
+    def submit(self, camera_id: str, frame: np.ndarray, rois: Optional[List] = None) -> Future:
+        """
+        Queue a camera frame for the next batch
+
+        A newer frame from the same camera replaces one that has not been
+        picked up yet; the older request is cancelled.
+
+        Args:
+            camera_id: Camera the frame came from
+            frame: Input image frame
+            rois: Optional regions to restrict inference to
+
+        Returns:
+            Future resolving to the camera's list of detected vehicles
+        """
+        future = Future()
+
+        with self.condition:
+            if not self.running:
+                future.cancel()
+                return future
+
+            previous = self.pending.pop(camera_id, None)
+            if previous is not None:
+                previous[2].cancel()
+                self.frames_replaced += 1
+
+            self.pending[camera_id] = (frame, rois, future, time.monotonic())
+            self.condition.notify_all()
+
+        return future
+
+    def detect(self, camera_id: str, frame: np.ndarray, rois: Optional[List] = None,
+               timeout: float = None) -> Optional[List[Dict]]:
+        """
+        Submit a frame and wait for its detections
+
+        Args:
+            camera_id: Camera the frame came from
+            frame: Input image frame
+            rois: Optional regions to restrict inference to
+            timeout: Maximum seconds to wait for the result
+
+        Returns:
+            List of detected vehicles, or None if the request was cancelled
+            (scheduler stopping or not running) and the frame was never inferred
+        """
+        try:
+            return self.submit(camera_id, frame, rois).result(timeout=timeout)
+        except CancelledError:
+            return None
+
+    def next_batch(self) -> List[Tuple[str, np.ndarray, Optional[List], Future]]:
+        """Block until a batch is ready and remove it from the pending queue"""
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+
+            if not self.running:
+                return []
+
+            # Give other cameras until the oldest frame's deadline to join the batch
+            oldest = min(queued_at for _, _, _, queued_at in self.pending.values())
+            deadline = oldest + self.max_wait
+            while self.running and len(self.pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            batch = []
+            for camera_id in list(self.pending)[:self.max_batch_size]:
+                frame, rois, future, _ = self.pending.pop(camera_id)
+                batch.append((camera_id, frame, rois, future))
+            return batch
+
+    def run(self):
+        """Scheduler loop: batch, infer, fan results back out"""
+        while self.running:
+            batch = self.next_batch()
+            batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            frames = [frame for _, frame, _, _ in batch]
+            rois_list = [rois for _, _, rois, _ in batch]
+            try:
+                detections = self.detector.detect_vehicles_batch(frames, rois_list)
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                detections = [[] for _ in batch]
+
+            for (_, _, _, future), vehicles in zip(batch, detections):
+                future.set_result(vehicles)
+
+            self.batches_run += 1
+            self.frames_inferred += len(batch)
+
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics"""
+        return {
+            'batches_run': self.batches_run,
+            'frames_inferred': self.frames_inferred,
+            'frames_replaced': self.frames_replaced,
+            'avg_batch_size': round(self.frames_inferred / self.batches_run, 2) if self.batches_run else 0.0,
+            'pending': len(self.pending)
+        }
@@ -0,0 +1,139 @@
+"""
+Motion-Gated Inference
+Cheap per-slot change detector that decides whether a frame needs YOLO
+"""
+import cv2
+import time
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .slot_overlap import slots_signature
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Per-slot change detector over downscaled grayscale slot ROIs"""
+
+    def __init__(self, camera_id: str, threshold: float = 8.0, downscale: float = 0.25,
+                 learning_rate: float = 0.05, refresh_interval: float = 30.0):
+        """
+        Initialize motion gate
+
+        Args:
+            camera_id: Camera identifier (for logging)
+            threshold: Mean absolute gray-level difference that marks a slot as changed
+            downscale: Resize factor applied before comparison
+            learning_rate: Weight of each new frame in the running background
+            refresh_interval: Force inference at least this often (seconds) to guard against drift
+        """
+        self.camera_id = camera_id
+        self.threshold = threshold
+        self.downscale = downscale
+        self.learning_rate = learning_rate
+        self.refresh_interval = refresh_interval
+
+        self.background = None
+        self.rois: List[Tuple[str, slice, slice, np.ndarray]] = []
+        self.signature = None
+        self.frame_shape = None
+        self.last_inference = 0.0
+
+        # Statistics
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.forced_refreshes = 0
+
+    def build_rois(self, slots: List[Dict], frame_shape: Tuple[int, ...]):
+        """Precompute downscaled slot bounding boxes and polygon masks"""
+        height = max(1, int(round(frame_shape[0] * self.downscale)))
+        width = max(1, int(round(frame_shape[1] * self.downscale)))
+
+        self.rois = []
+        for slot in slots:
+            polygon = np.asarray(slot['polygon'], dtype=np.float64) * self.downscale
+            x0 = int(np.clip(np.floor(polygon[:, 0].min()), 0, width))
+            y0 = int(np.clip(np.floor(polygon[:, 1].min()), 0, height))
+            x1 = int(np.clip(np.ceil(polygon[:, 0].max()) + 1, x0, width))
+            y1 = int(np.clip(np.ceil(polygon[:, 1].max()) + 1, y0, height))
+
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            if mask.size:
+                local = np.round(polygon - [x0, y0]).astype(np.int32)
+                cv2.fillPoly(mask, [local], 1)
+            self.rois.append((slot['slot_id'], slice(y0, y1), slice(x0, x1), mask.astype(bool)))
+
+        self.signature = slots_signature(slots)
+        self.frame_shape = tuple(frame_shape[:2])
+        self.background = None
+
+    def changed_slots(self, frame: np.ndarray, slots: List[Dict]) -> List[str]:
+        """
+        Update the background and return slots whose ROI changed
+
+        Args:
+            frame: Input image frame (BGR or grayscale)
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+
+        Returns:
+            Slot ids whose mean ROI difference exceeds the threshold; all
+            slots when there is no background yet
+        """
+        if self.signature != slots_signature(slots) or self.frame_shape != tuple(frame.shape[:2]):
+            self.build_rois(slots, frame.shape)
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale,
+                           interpolation=cv2.INTER_AREA).astype(np.float32)
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small
+            return [slot_id for slot_id, _, _, _ in self.rois]
+
+        diff = cv2.absdiff(small, self.background)
+        changed = []
+        for slot_id, rows, cols, mask in self.rois:
+            roi = diff[rows, cols]
+            if mask.any() and float(roi[mask].mean()) > self.threshold:
+                changed.append(slot_id)
+
+        cv2.accumulateWeighted(small, self.background, self.learning_rate)
+        return changed
+
+    def should_infer(self, frame: np.ndarray, slots: List[Dict]) -> bool:
+        """
+        Decide whether the frame needs a detector pass
+
+        Args:
+            frame: Input image frame
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+
+        Returns:
+            True if any slot changed or the refresh interval elapsed
+        """
+        self.frames_seen += 1
+        changed = self.changed_slots(frame, slots)
+        now = time.monotonic()
+
+        if changed:
+            self.last_inference = now
+            return True
+
+        if now - self.last_inference >= self.refresh_interval:
+            self.last_inference = now
+            self.forced_refreshes += 1
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    def get_stats(self) -> Dict:
+        """Get gating statistics"""
+        return {
+            'frames_seen': self.frames_seen,
+            'frames_skipped': self.frames_skipped,
+            'forced_refreshes': self.forced_refreshes,
+            'skip_ratio': round(self.frames_skipped / self.frames_seen, 3) if self.frames_seen else 0.0
+        }
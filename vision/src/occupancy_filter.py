@@ -0,0 +1,132 @@
+"""
+Slot Occupancy Debouncing
+Per-slot confirmation state machine that turns noisy per-frame detections
+into confirmed FREE/OCCUPIED transitions
+"""
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SlotState:
+    """Confirmation state for a single slot"""
+
+    def __init__(self, window: int):
+        self.confirmed: Optional[bool] = None
+        self.history = deque(maxlen=window)
+        self.candidate: Optional[bool] = None
+        self.candidate_since = 0.0
+        self.confidence_ewma = 0.0
+        self.last_observed: Optional[bool] = None
+
+
+class SlotOccupancyFilter:
+    """N-of-M / minimum-dwell hysteresis over per-frame slot statuses"""
+
+    def __init__(self, window: int = 5, required: int = 3, min_dwell: float = 0.0,
+                 ewma_alpha: float = 0.3):
+        """
+        Initialize occupancy filter
+
+        Args:
+            window: Number of recent frames considered (M)
+            required: Frames within the window that must agree on a new state (N)
+            min_dwell: Seconds the new state must hold before it is confirmed
+            ewma_alpha: Weight of the newest frame in the confidence average
+        """
+        self.window = max(1, int(window))
+        self.required = min(max(1, int(required)), self.window)
+        self.min_dwell = min_dwell
+        self.ewma_alpha = ewma_alpha
+
+        self.slots: Dict[str, SlotState] = {}
+
+        # Statistics
+        self.frames_observed = 0
+        self.transitions_published = 0
+        self.flaps_suppressed = 0
+
+    def observe(self, slot_id: str, occupied: bool, confidence: float,
+                now: float) -> Optional[Tuple[bool, float]]:
+        """
+        Feed one frame's observation for a slot
+
+        Args:
+            slot_id: Slot identifier
+            occupied: Per-frame occupancy from the detector
+            confidence: Per-frame detection confidence
+            now: Observation time (monotonic seconds)
+
+        Returns:
+            (occupied, smoothed confidence) if the slot's confirmed state changed, else None
+        """
+        state = self.slots.get(slot_id)
+        if state is None:
+            state = self.slots[slot_id] = SlotState(self.window)
+
+        state.history.append(occupied)
+
+        # Smooth confidence over consecutive frames that agree
+        if occupied == state.last_observed:
+            state.confidence_ewma += self.ewma_alpha * (confidence - state.confidence_ewma)
+        else:
+            state.confidence_ewma = confidence
+        state.last_observed = occupied
+
+        if occupied == state.confirmed:
+            # A deviation that never got confirmed is a suppressed flap
+            if state.candidate is not None:
+                self.flaps_suppressed += 1
+                state.candidate = None
+            return None
+
+        if state.candidate != occupied:
+            state.candidate = occupied
+            state.candidate_since = now
+
+        votes = sum(1 for observed in state.history if observed == occupied)
+        if votes < self.required or now - state.candidate_since < self.min_dwell:
+            return None
+
+        state.confirmed = occupied
+        state.candidate = None
+        self.transitions_published += 1
+        return occupied, state.confidence_ewma
+
+    def update(self, slot_statuses: Dict[str, Dict],
+               now: Optional[float] = None) -> List[Tuple[str, bool, float]]:
+        """
+        Feed a frame of detector results
+
+        Args:
+            slot_statuses: Output of YOLODetector.detect_all_slots
+            now: Observation time (defaults to time.monotonic())
+
+        Returns:
+            List of (slot_id, occupied, confidence) for confirmed transitions
+        """
+        now = time.monotonic() if now is None else now
+        self.frames_observed += 1
+
+        transitions = []
+        for slot_id, status in slot_statuses.items():
+            change = self.observe(slot_id, status['occupied'], status['confidence'], now)
+            if change is not None:
+                transitions.append((slot_id, change[0], change[1]))
+
+        # Forget slots that were removed from the configuration
+        for slot_id in set(self.slots) - set(slot_statuses):
+            del self.slots[slot_id]
+
+        return transitions
+
+    def get_stats(self) -> Dict:
+        """Get debouncing statistics"""
+        return {
+            'frames_observed': self.frames_observed,
+            'transitions_published': self.transitions_published,
+            'flaps_suppressed': self.flaps_suppressed
+        }
@@ -0,0 +1,342 @@
+"""
+Vectorized Box-vs-Polygon Overlap Engines
+Scores all vehicle boxes against all slot polygons in one NumPy pass
+"""
+import cv2
+import numpy as np
+from typing import List, Dict, Tuple
+
+
+GRID_SIZE = 5  # Same 5x5 sampling grid as YOLODetector.box_in_polygon
+
+
+def slots_signature(slots: List[Dict]) -> Tuple:
+    """
+    Build a hashable signature of a slot configuration
+
+    Args:
+        slots: List of slot dictionaries with 'slot_id' and 'polygon'
+
+    Returns:
+        Tuple that changes whenever a slot id or polygon changes
+    """
+    return tuple(
+        (slot['slot_id'], tuple(tuple(point) for point in slot['polygon']))
+        for slot in slots
+    )
+
+
+def assign_vehicles(slot_ids: List[str], vehicles: List[Dict], ratios: np.ndarray,
+                    overlap_threshold: float) -> Dict[str, Dict]:
+    """
+    Assign the most confident overlapping vehicle to each slot
+
+    Args:
+        slot_ids: Slot ids in column order of ratios
+        vehicles: Detections from YOLODetector.detect_vehicles
+        ratios: Array of shape (vehicles, slots) with overlap ratios
+        overlap_threshold: Minimum overlap to consider slot occupied
+
+    Returns:
+        Dictionary mapping slot_id to occupancy information
+    """
+    results = {}
+
+    if vehicles:
+        confidences = np.array([vehicle['confidence'] for vehicle in vehicles])
+        overlapping = ratios >= overlap_threshold
+        # argmax picks the first maximum, matching the strict '>' in the loop version
+        scores = np.where(overlapping, confidences[:, None], -np.inf)
+        best = np.argmax(scores, axis=0)
+        occupied = overlapping.any(axis=0)
+    else:
+        best = occupied = None
+
+    for s, slot_id in enumerate(slot_ids):
+        if occupied is not None and occupied[s]:
+            vehicle = vehicles[best[s]]
+            results[slot_id] = {
+                'occupied': True,
+                'confidence': vehicle['confidence'],
+                'vehicle_class': vehicle['class'],
+                'vehicle_bbox': vehicle['bbox']
+            }
+        else:
+            results[slot_id] = {
+                'occupied': False,
+                'confidence': 1.0,
+                'vehicle_class': None,
+                'vehicle_bbox': None
+            }
+
+    return results
+
+
+class SlotOverlapEngine:
+    """Precomputed slot polygon edges for batched occupancy scoring"""
+
+    def __init__(self, slots: List[Dict]):
+        """
+        Precompute polygon edge arrays for a camera's slots
+
+        Args:
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+        """
+        self.slot_ids = [slot['slot_id'] for slot in slots]
+        self.signature = slots_signature(slots)
+
+        num_slots = len(slots)
+        max_edges = max((len(slot['polygon']) for slot in slots), default=0)
+
+        # Edge arrays of shape (slots, edges). Polygons with fewer vertices are
+        # padded with horizontal zero-length edges, which never toggle the ray cast.
+        p1x = np.zeros((num_slots, max_edges), dtype=np.float64)
+        p1y = np.zeros((num_slots, max_edges), dtype=np.float64)
+        p2x = np.zeros((num_slots, max_edges), dtype=np.float64)
+        p2y = np.zeros((num_slots, max_edges), dtype=np.float64)
+
+        for s, slot in enumerate(slots):
+            polygon = np.asarray(slot['polygon'], dtype=np.float64)
+            n = len(polygon)
+            p1x[s, :n] = polygon[:, 0]
+            p1y[s, :n] = polygon[:, 1]
+            # Edge i runs from vertex i to vertex (i + 1) % n, as in point_in_polygon
+            p2x[s, :n] = np.roll(polygon[:, 0], -1)
+            p2y[s, :n] = np.roll(polygon[:, 1], -1)
+
+        self.edge_min_y = np.minimum(p1y, p2y)
+        self.edge_max_y = np.maximum(p1y, p2y)
+        self.edge_max_x = np.maximum(p1x, p2x)
+        self.edge_vertical = p1x == p2x
+        self.edge_horizontal = p1y == p2y
+        self.p1x = p1x
+        self.p1y = p1y
+        self.dx = p2x - p1x
+        # Horizontal edges never reach the xinters test; avoid dividing by zero
+        self.dy = np.where(self.edge_horizontal, 1.0, p2y - p1y)
+
+    @staticmethod
+    def sample_points(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build the 5x5 sampling grid for every box
+
+        Args:
+            boxes: Array of shape (N, 4) with (x1, y1, x2, y2) rows
+
+        Returns:
+            Tuple of (px, py) integer arrays of shape (N, 25)
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x1, y1, x2, y2 = (boxes[:, k:k + 1] for k in range(4))
+
+        offsets = np.arange(GRID_SIZE, dtype=np.float64) + 0.5
+        i = np.repeat(offsets, GRID_SIZE)[None, :]
+        j = np.tile(offsets, GRID_SIZE)[None, :]
+
+        # int() in the reference implementation truncates toward zero
+        px = np.trunc(x1 + i * (x2 - x1) / GRID_SIZE)
+        py = np.trunc(y1 + j * (y2 - y1) / GRID_SIZE)
+        return px, py
+
+    def overlap_ratios(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        Fraction of each box's sample points that fall inside each slot
+
+        Args:
+            boxes: Array of shape (N, 4) with (x1, y1, x2, y2) rows
+
+        Returns:
+            Array of shape (N, slots) with overlap ratios in [0, 1]
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if len(boxes) == 0 or not self.slot_ids:
+            return np.zeros((len(boxes), len(self.slot_ids)))
+
+        px, py = self.sample_points(boxes)
+        # Broadcast to (boxes, points, slots, edges)
+        x = px[:, :, None, None]
+        y = py[:, :, None, None]
+
+        crosses = (y > self.edge_min_y) & (y <= self.edge_max_y) & (x <= self.edge_max_x)
+        xinters = (y - self.p1y) * self.dx / self.dy + self.p1x
+        crosses &= self.edge_vertical | (x <= xinters)
+
+        inside = np.count_nonzero(crosses, axis=3) % 2 == 1
+        return np.count_nonzero(inside, axis=1) / (GRID_SIZE * GRID_SIZE)
+
+    def match(self, vehicles: List[Dict], overlap_threshold: float = 0.3) -> Dict[str, Dict]:
+        """
+        Assign the most confident overlapping vehicle to each slot
+
+        Args:
+            vehicles: Detections from YOLODetector.detect_vehicles
+            overlap_threshold: Minimum overlap to consider slot occupied
+
+        Returns:
+            Dictionary mapping slot_id to occupancy information
+        """
+        boxes = np.array([vehicle['bbox'] for vehicle in vehicles], dtype=np.float64)
+        return assign_vehicles(self.slot_ids, vehicles, self.overlap_ratios(boxes), overlap_threshold)
+
+
+class SlotMaskEngine:
+    """
+    Rasterized slot masks with per-slot summed-area tables
+
+    Overlap is the fraction of a box's pixels covered by the slot polygon,
+    answered with four table lookups per box/slot pair.
+    """
+
+    def __init__(self, slots: List[Dict], frame_shape: Tuple[int, ...]):
+        """
+        Rasterize a camera's slot polygons for a given frame size
+
+        Args:
+            slots: List of slot dictionaries with 'slot_id' and 'polygon'
+            frame_shape: Shape of the camera frames, (height, width[, channels])
+        """
+        self.slot_ids = [slot['slot_id'] for slot in slots]
+        self.signature = slots_signature(slots)
+        self.frame_shape = tuple(frame_shape[:2])
+
+        height, width = self.frame_shape
+        # Slot index per pixel, -1 for background; later slots win where polygons overlap
+        self.label_mask = np.full((height, width), -1, dtype=np.int32)
+
+        num_slots = len(slots)
+        self.origin_x = np.zeros(num_slots, dtype=np.int64)
+        self.origin_y = np.zeros(num_slots, dtype=np.int64)
+        self.table_width = np.ones(num_slots, dtype=np.int64)
+        self.table_height = np.ones(num_slots, dtype=np.int64)
+        self.table_offset = np.zeros(num_slots, dtype=np.int64)
+
+        # Tables only cover each slot's clipped bounding box and are stored
+        # back to back in one flat array so lookups vectorize across slots.
+        tables = []
+        offset = 0
+        for s, slot in enumerate(slots):
+            polygon = np.asarray(slot['polygon'], dtype=np.int32)
+            x0 = int(np.clip(polygon[:, 0].min(), 0, width))
+            y0 = int(np.clip(polygon[:, 1].min(), 0, height))
+            x1 = int(np.clip(polygon[:, 0].max() + 1, x0, width))
+            y1 = int(np.clip(polygon[:, 1].max() + 1, y0, height))
+
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            if mask.size:
+                cv2.fillPoly(mask, [polygon - np.array([x0, y0], dtype=np.int32)], 1)
+                self.label_mask[y0:y1, x0:x1][mask > 0] = s
+
+            table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+            table[1:, 1:] = mask.cumsum(axis=0, dtype=np.int64).cumsum(axis=1)
+            tables.append(table.ravel())
+
+            self.origin_x[s], self.origin_y[s] = x0, y0
+            self.table_height[s], self.table_width[s] = table.shape
+            self.table_offset[s] = offset
+            offset += table.size
+
+        self.tables = np.concatenate(tables) if tables else np.zeros(0, dtype=np.int64)
+
+    def overlap_ratios(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        Fraction of each box's pixels that fall inside each slot
+
+        Args:
+            boxes: Array of shape (N, 4) with (x1, y1, x2, y2) rows
+
+        Returns:
+            Array of shape (N, slots) with overlap ratios in [0, 1]
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if len(boxes) == 0 or not self.slot_ids:
+            return np.zeros((len(boxes), len(self.slot_ids)))
+
+        height, width = self.frame_shape
+        bx1 = np.clip(boxes[:, 0], 0, width).astype(np.int64)[:, None]
+        by1 = np.clip(boxes[:, 1], 0, height).astype(np.int64)[:, None]
+        bx2 = np.clip(boxes[:, 2], 0, width).astype(np.int64)[:, None]
+        by2 = np.clip(boxes[:, 3], 0, height).astype(np.int64)[:, None]
+        box_area = np.maximum(bx2 - bx1, 0) * np.maximum(by2 - by1, 0)
+
+        # Box corners in each slot's table coordinates, shape (boxes, slots)
+        lx1 = np.clip(bx1 - self.origin_x, 0, self.table_width - 1)
+        lx2 = np.clip(bx2 - self.origin_x, 0, self.table_width - 1)
+        ly1 = np.clip(by1 - self.origin_y, 0, self.table_height - 1)
+        ly2 = np.clip(by2 - self.origin_y, 0, self.table_height - 1)
+
+        def lookup(ly, lx):
+            return self.tables[self.table_offset + ly * self.table_width + lx]
+
+        inside = lookup(ly2, lx2) - lookup(ly1, lx2) - lookup(ly2, lx1) + lookup(ly1, lx1)
+        return np.divide(inside, box_area, out=np.zeros(inside.shape), where=box_area > 0)
+
+    def match(self, vehicles: List[Dict], overlap_threshold: float = 0.3) -> Dict[str, Dict]:
+        """
+        Assign the most confident overlapping vehicle to each slot
+
+        Args:
+            vehicles: Detections from YOLODetector.detect_vehicles
+            overlap_threshold: Minimum pixel overlap to consider slot occupied
+
+        Returns:
+            Dictionary mapping slot_id to occupancy information
+        """
+        boxes = np.array([vehicle['bbox'] for vehicle in vehicles], dtype=np.float64)
+        return assign_vehicles(self.slot_ids, vehicles, self.overlap_ratios(boxes), overlap_threshold)
+
+
+def compute_inference_rois(slots: List[Dict], frame_shape: Tuple[int, ...], padding: int = 32,
+                           max_tiles: int = 1) -> List[Tuple[int, int, int, int]]:
+    """
+    Compute the frame regions that cover a camera's slot polygons
+
+    Starts from one padded box per slot and greedily merges the pair whose
+    union adds the least uncovered area until at most max_tiles remain.
+    With max_tiles=1 this is the padded union bounding box of all slots.
+
+    Args:
+        slots: List of slot dictionaries with 'slot_id' and 'polygon'
+        frame_shape: Shape of the camera frames, (height, width[, channels])
+        padding: Pixels added around each slot so vehicles at the edge stay in view
+        max_tiles: Maximum number of regions to return
+
+    Returns:
+        List of non-empty (x1, y1, x2, y2) regions clipped to the frame; the
+        full frame if no slot overlaps it
+    """
+    height, width = frame_shape[:2]
+    if not slots:
+        return [(0, 0, width, height)]
+
+    boxes = []
+    for slot in slots:
+        polygon = np.asarray(slot['polygon'], dtype=np.int64)
+        boxes.append((
+            int(np.clip(polygon[:, 0].min() - padding, 0, width)),
+            int(np.clip(polygon[:, 1].min() - padding, 0, height)),
+            int(np.clip(polygon[:, 0].max() + padding + 1, 0, width)),
+            int(np.clip(polygon[:, 1].max() + padding + 1, 0, height))
+        ))
+    # Slots lying entirely outside the frame clip to empty boxes
+    boxes = [box for box in boxes if box[2] > box[0] and box[3] > box[1]]
+    if not boxes:
+        return [(0, 0, width, height)]
+    boxes = np.array(boxes, dtype=np.int64)
+
+    def area(b):
+        return np.maximum(b[..., 2] - b[..., 0], 0) * np.maximum(b[..., 3] - b[..., 1], 0)
+
+    max_tiles = max(1, int(max_tiles))
+    while len(boxes) > max_tiles:
+        # Pairwise union boxes, shape (n, n, 4)
+        union = np.concatenate([
+            np.minimum(boxes[:, None, :2], boxes[None, :, :2]),
+            np.maximum(boxes[:, None, 2:], boxes[None, :, 2:])
+        ], axis=2)
+        cost = (area(union) - area(boxes)[:, None] - area(boxes)[None, :]).astype(np.float64)
+        np.fill_diagonal(cost, np.inf)
+        a, b = np.unravel_index(np.argmin(cost), cost.shape)
+        merged = union[a, b]
+        boxes = np.vstack([np.delete(boxes, [a, b], axis=0), merged[None, :]])
+
+    return [tuple(int(v) for v in box) for box in boxes]
@@ -0,0 +1,238 @@
+"""
+Background Slot Update Publisher
+Queues slot changes off the camera loop, coalesces them per slot and sends
+them to the backend over a pooled keep-alive HTTP session
+"""
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class SlotUpdatePublisher:
+    """Bounded, coalescing queue of slot updates flushed by a worker thread"""
+
+    def __init__(self, backend_url: str, batch_size: int = 50, flush_interval: float = 0.2,
+                 max_queue: int = 1000, max_retries: int = 3, retry_backoff: float = 0.5,
+                 timeout: float = 2.0, use_bulk: bool = True):
+        """
+        Initialize publisher
+
+        Args:
+            backend_url: Base URL of the backend API
+            batch_size: Maximum updates sent per flush
+            flush_interval: Longest time an update waits before being sent (seconds)
+            max_queue: Maximum distinct slots pending; the oldest is dropped beyond this
+            max_retries: Retries for a failed send before it is requeued
+            retry_backoff: Base delay for exponential backoff with jitter (seconds)
+            timeout: HTTP request timeout (seconds)
+            use_bulk: Send batches to /api/slots/bulk-update (falls back to
+                per-slot requests if the backend does not have it)
+        """
+        self.backend_url = backend_url.rstrip('/')
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_queue = max(1, int(max_queue))
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.use_bulk = use_bulk
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # slot_id -> latest payload, oldest first
+        self.pending: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.requeued = 0
+        self.max_depth = 0
+        self.last_latency_ms = 0.0
+
+    def start(self):
+        """Start the flush thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="slot-publisher", daemon=True)
+        self.thread.start()
+        logger.info(f"Slot publisher started ({self.backend_url}, batch<={self.batch_size})")
+
+    def stop(self, drain_timeout: float = 5.0):
+        """Flush what is pending (best effort) and stop the thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.thread:
+            self.thread.join(timeout=drain_timeout)
+        self.session.close()
+        logger.info(f"Slot publisher stopped: {self.get_stats()}")
+
+    def publish(self, camera_id: str, slot_id: str, is_occupied: bool, confidence: float = 1.0):
+        """
+        Queue a slot update without blocking on the network
+
+        A newer update for a slot that is still pending replaces the older one.
+        """
+        payload = {
+            'slot_id': slot_id,
+            'camera_id': camera_id,
+            'is_occupied': is_occupied,
+            'confidence': confidence,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        with self.condition:
+            self.enqueued += 1
+            if slot_id in self.pending:
+                del self.pending[slot_id]
+                self.coalesced += 1
+            elif len(self.pending) >= self.max_queue:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+
+            self.pending[slot_id] = payload
+            self.max_depth = max(self.max_depth, len(self.pending))
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+
+    def next_batch(self) -> List[Dict]:
+        """Wait for a full batch or the flush interval and take it off the queue"""
+        with self.condition:
+            if self.running and len(self.pending) < self.batch_size:
+                self.condition.wait(self.flush_interval)
+
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                batch.append(self.pending.popitem(last=False)[1])
+            return batch
+
+    def requeue(self, batch: List[Dict]):
+        """Put unsent updates back unless a newer one arrived meanwhile"""
+        with self.condition:
+            for payload in reversed(batch):
+                if payload['slot_id'] in self.pending or len(self.pending) >= self.max_queue:
+                    continue
+                self.pending[payload['slot_id']] = payload
+                self.pending.move_to_end(payload['slot_id'], last=False)
+                self.requeued += 1
+
+    def send(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Send a batch to the backend
+
+        Returns:
+            Updates that could not be delivered
+        """
+        if self.use_bulk:
+            response = self.session.post(
+                f"{self.backend_url}/api/slots/bulk-update",
+                json=batch,
+                timeout=self.timeout
+            )
+            if response.status_code in (404, 405):
+                logger.warning("Backend has no bulk slot endpoint, sending updates one by one")
+                self.use_bulk = False
+            elif not response.ok:
+                # Rejected batches (4xx) were not applied either; keep them for a retry
+                logger.warning(f"Bulk slot update failed with HTTP {response.status_code}: {response.text[:200]}")
+                return batch
+            else:
+                failed_ids = {
+                    result['slot_id'] for result in response.json().get('results', [])
+                    if result.get('status') == 'error'
+                }
+                return [payload for payload in batch if payload['slot_id'] in failed_ids]
+
+        failed = []
+        for payload in batch:
+            response = self.session.post(
+                f"{self.backend_url}/api/slots/update",
+                json=payload,
+                timeout=self.timeout
+            )
+            if not response.ok:
+                failed.append(payload)
+        return failed
+
+    def flush(self, batch: List[Dict]) -> bool:
+        """
+        Send a batch, retrying failures with exponential backoff and jitter
+
+        Returns:
+            True if every update was delivered
+        """
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                remaining = self.send(batch)
+            except requests.RequestException as e:
+                logger.debug(f"Failed to update backend: {e}")
+                remaining = batch
+            self.last_latency_ms = (time.monotonic() - started) * 1000
+
+            self.sent += len(batch) - len(remaining)
+            batch = remaining
+            if not batch or not self.running:
+                break
+
+            self.retries += 1
+            self.backoff(attempt)
+
+        if batch:
+            self.failed += len(batch)
+            # During shutdown give up instead of looping on a dead backend
+            if self.running:
+                self.requeue(batch)
+        return not batch
+
+    def backoff(self, attempt: int):
+        """Sleep for the attempt's exponential delay with +/-50% jitter"""
+        delay = self.retry_backoff * (2 ** attempt)
+        time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def run(self):
+        """Flush loop; drains the queue once more after stop()"""
+        while True:
+            batch = self.next_batch()
+            if batch:
+                # Keep backing off while the backend stays unreachable
+                if not self.flush(batch) and self.running:
+                    self.backoff(self.max_retries)
+            elif not self.running:
+                break
+
+    def get_stats(self) -> Dict:
+        """Get queue and delivery statistics"""
+        return {
+            'queue_depth': len(self.pending),
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'requeued': self.requeued,
+            'last_latency_ms': round(self.last_latency_ms, 1)
+        }
@@ -11,10 +11,14 @@ import threading
 from pathlib import Path
 from typing import Dict, List
 import paho.mqtt.client as mqtt
-import requests
 from datetime import datetime
 
 from .detector_yolo import YOLODetector
+from .inference_scheduler import InferenceScheduler
+from .frame_capture import LatestFrameCapture
+from .motion_gate import MotionGate
+from .occupancy_filter import SlotOccupancyFilter
+from .slot_publisher import SlotUpdatePublisher
 
 # Configure logging
 logging.basicConfig(
@@ -29,25 +33,54 @@ class VisionService:
     
     def __init__(self, config_path: str, mqtt_config_path: str):
         """Initialize vision service"""
+        self.config_path = config_path
         self.config = self.load_config(config_path)
+        self.config_mtime = self.get_config_mtime()
+        self.config_lock = threading.Lock()
         self.mqtt_config = self.load_mqtt_config(mqtt_config_path)
         
         # Initialize MQTT client
         self.mqtt_client = self.setup_mqtt()
         
-        # Initialize detector
-        model_path = self.config['vision_settings'].get('yolo_model', 'yolov8n.pt')
-        self.detector = YOLODetector(model_path=model_path, confidence_threshold=0.5)
+        # In process-pool mode the detectors live in the worker processes
+        self.worker_processes = self.config['vision_settings'].get('worker_processes', 0)
+        self.worker_pool = None
+        self.detector = None
+        self.scheduler = None
+        if self.worker_processes <= 0:
+            self.init_detector()
         
-        # Camera threads
+        # Camera threads and their capture stages
         self.camera_threads = []
+        self.captures: Dict[str, LatestFrameCapture] = {}
+        self.motion_gates: Dict[str, MotionGate] = {}
+        self.occupancy_filters: Dict[str, SlotOccupancyFilter] = {}
         self.running = False
         
         # Backend API URL
         self.backend_url = "http://localhost:8000"
+        self.publisher = self.setup_publisher()
         
         logger.info("Vision Service initialized")
     
+    def init_detector(self):
+        """Load the detector and optional batching scheduler"""
+        model_path = self.config['vision_settings'].get('yolo_model', 'yolov8n.pt')
+        self.detector = YOLODetector(
+            model_path=model_path,
+            confidence_threshold=0.5,
+            backend_config=self.config['vision_settings'].get('inference_backend')
+        )
+        
+        # Optional central scheduler batching frames from all cameras
+        batch_config = self.config['vision_settings'].get('batch_inference', {})
+        if batch_config.get('enabled', False):
+            self.scheduler = InferenceScheduler(
+                self.detector,
+                max_batch_size=batch_config.get('max_batch_size', 8),
+                max_wait_ms=batch_config.get('max_wait_ms', 20)
+            )
+    
     def load_config(self, config_path: str) -> Dict:
         """Load camera configuration"""
         try:
@@ -59,6 +92,45 @@ class VisionService:
             logger.error(f"Failed to load config: {e}")
             raise
     
+    def get_config_mtime(self) -> float:
+        """Get modification time of the camera config file"""
+        try:
+            return Path(self.config_path).stat().st_mtime
+        except OSError:
+            return 0.0
+    
+    def refresh_config(self) -> bool:
+        """
+        Reload camera configuration if the file changed on disk
+        
+        Returns:
+            True if a new configuration was loaded
+        """
+        with self.config_lock:
+            mtime = self.get_config_mtime()
+            if mtime == self.config_mtime:
+                return False
+            try:
+                config = self.load_config(self.config_path)
+            except Exception:
+                return False
+            self.config = config
+            self.config_mtime = mtime
+            return True
+    
+    def get_camera_slots(self, camera_id: str, default: List[Dict]) -> List[Dict]:
+        """Get current slot definitions for a camera in detector format"""
+        slots = default
+        for camera in self.config.get('cameras', []):
+            if camera.get('camera_id') == camera_id:
+                slots = camera.get('slots', default)
+                break
+        
+        return [
+            {'slot_id': slot['slot_id'], 'polygon': slot['polygon']}
+            for slot in slots
+        ]
+    
     def load_mqtt_config(self, config_path: str) -> Dict:
         """Load MQTT configuration"""
         try:
@@ -102,6 +174,23 @@ class VisionService:
         
         return client
     
+    def setup_publisher(self) -> SlotUpdatePublisher:
+        """Setup the background publisher for backend slot updates"""
+        publisher_config = self.config['vision_settings'].get('backend_publisher', {})
+        self.backend_url = publisher_config.get('backend_url', self.backend_url)
+        publisher = SlotUpdatePublisher(
+            self.backend_url,
+            batch_size=publisher_config.get('batch_size', 50),
+            flush_interval=publisher_config.get('flush_interval', 0.2),
+            max_queue=publisher_config.get('max_queue', 1000),
+            max_retries=publisher_config.get('max_retries', 3),
+            retry_backoff=publisher_config.get('retry_backoff', 0.5),
+            timeout=publisher_config.get('timeout', 2.0),
+            use_bulk=publisher_config.get('use_bulk', True)
+        )
+        publisher.start()
+        return publisher
+    
     def publish_slot_update(self, camera_id: str, slot_id: str, is_occupied: bool, confidence: float = 1.0):
         """Publish slot occupancy update via MQTT and HTTP"""
         # MQTT publish
@@ -121,20 +210,13 @@ class VisionService:
         except Exception as e:
             logger.error(f"Failed to publish MQTT: {e}")
         
-        # Also update backend via HTTP
-        try:
-            requests.post(
-                f"{self.backend_url}/api/slots/update",
-                json={
-                    'slot_id': slot_id,
-                    'camera_id': camera_id,
-                    'is_occupied': is_occupied,
-                    'confidence': confidence
-                },
-                timeout=2
-            )
-        except Exception as e:
-            logger.debug(f"Failed to update backend: {e}")
+        # Also update backend via HTTP, off the camera thread
+        if self.publisher:
+            self.publisher.publish(camera_id, slot_id, is_occupied, confidence)
+    
+    def create_capture(self, camera_config: Dict) -> LatestFrameCapture:
+        """Build the frame source for a camera"""
+        return LatestFrameCapture(camera_config['camera_id'], camera_config['stream_url'])
     
     def process_camera(self, camera_config: Dict):
         """Process single camera stream"""
@@ -145,53 +227,128 @@ class VisionService:
         
         logger.info(f"Starting camera {camera_id}: {stream_url}")
         
-        # Open video stream
-        cap = cv2.VideoCapture(stream_url)
-        if not cap.isOpened():
-            logger.error(f"Failed to open camera {camera_id}")
+        # Decode in a separate thread; this loop only ever sees the newest frame
+        capture = self.create_capture(camera_config)
+        if not capture.start():
             return
+        self.captures[camera_id] = capture
         
         frame_delay = 1.0 / fps
-        last_status = {}
+        overlap_mode = camera_config.get('overlap_mode', 'grid')
         
         # Prepare slots for detector
-        detector_slots = []
-        for slot in slots:
-            detector_slots.append({
-                'slot_id': slot['slot_id'],
-                'polygon': slot['polygon']
-            })
+        detector_slots = self.get_camera_slots(camera_id, slots)
+        config_check_interval = self.config['vision_settings'].get('config_reload_interval', 5)
+        last_config_check = time.time()
+        config_mtime = self.config_mtime
+        
+        # Optional change detector that skips YOLO on static frames
+        motion_config = camera_config.get('motion_gate', self.config['vision_settings'].get('motion_gate', {}))
+        motion_gate = None
+        if motion_config.get('enabled', False):
+            motion_gate = MotionGate(
+                camera_id,
+                threshold=motion_config.get('threshold', 8.0),
+                downscale=motion_config.get('downscale', 0.25),
+                learning_rate=motion_config.get('learning_rate', 0.05),
+                refresh_interval=motion_config.get('refresh_interval', 30.0)
+            )
+            self.motion_gates[camera_id] = motion_gate
+        slot_statuses = None
+        # Set when a detector pass was cancelled so the next frame runs one
+        retry_inference = False
+        
+        # Only confirmed transitions are published; single-frame flaps are absorbed
+        filter_config = self.config['vision_settings'].get('occupancy_filter', {})
+        occupancy_filter = SlotOccupancyFilter(
+            window=filter_config.get('window', 5),
+            required=filter_config.get('required', 3),
+            min_dwell=filter_config.get('min_dwell', 0.0),
+            ewma_alpha=filter_config.get('ewma_alpha', 0.3)
+        )
+        self.occupancy_filters[camera_id] = occupancy_filter
+        
+        # Optional cropping of inference to the region(s) covering the slots
+        roi_config = camera_config.get('roi_inference', self.config['vision_settings'].get('roi_inference', {}))
+        
+        # Rasterize slot masks up front when the frame size is known
+        if overlap_mode == 'mask' and camera_config.get('resolution'):
+            width, height = camera_config['resolution']
+            self.detector.get_overlap_engine(detector_slots, overlap_mode, (height, width), camera_id)
         
         while self.running:
-            ret, frame = cap.read()
-            if not ret:
-                logger.warning(f"Failed to read frame from {camera_id}, reconnecting...")
-                cap.release()
-                time.sleep(5)
-                cap = cv2.VideoCapture(stream_url)
+            frame, frame_seq = capture.read(timeout=1.0)
+            if frame is None:
                 continue
+            started = time.monotonic()
+            
+            # Pick up slot polygon edits; the detector rebuilds its geometry on change
+            if time.time() - last_config_check >= config_check_interval:
+                last_config_check = time.time()
+                self.refresh_config()
+                if self.config_mtime != config_mtime:
+                    config_mtime = self.config_mtime
+                    detector_slots = self.get_camera_slots(camera_id, slots)
+                    logger.info(f"Reloaded slot config for {camera_id}: {len(detector_slots)} slot(s)")
             
             try:
-                # Detect occupancy for all slots
-                slot_statuses = self.detector.detect_all_slots(
-                    frame, 
-                    detector_slots,
-                    overlap_threshold=camera_config.get('overlap_threshold', 0.3)
-                )
+                # Detect occupancy for all slots (reuse the last result if nothing moved)
+                run_inference = (retry_inference or slot_statuses is None or motion_gate is None
+                                 or motion_gate.should_infer(frame, detector_slots))
+                retry_inference = False
+                
+                rois = None
+                if run_inference and roi_config.get('enabled', False):
+                    rois = self.detector.get_inference_rois(
+                        detector_slots, frame.shape, camera_id,
+                        padding=roi_config.get('padding', 32),
+                        max_tiles=roi_config.get('max_tiles', 1)
+                    )
                 
-                # Check for changes and publish
-                for slot_id, status in slot_statuses.items():
-                    is_occupied = status['occupied']
-                    confidence = status['confidence']
-                    
-                    # Only publish if status changed
-                    if slot_id not in last_status or last_status[slot_id] != is_occupied:
+                if run_inference and self.scheduler:
+                    vehicles = self.scheduler.detect(camera_id, frame, rois)
+                    if vehicles is None:
+                        # Cancelled before inference ran: the frame is not evidence of
+                        # empty slots, so skip it and run the detector on the next one
+                        retry_inference = True
+                        run_inference = False
+                    else:
+                        statuses = self.detector.match_vehicles_to_slots(
+                            vehicles,
+                            detector_slots,
+                            overlap_threshold=camera_config.get('overlap_threshold', 0.3),
+                            overlap_mode=overlap_mode,
+                            frame_shape=frame.shape,
+                            camera_id=camera_id
+                        )
+                elif run_inference:
+                    statuses = self.detector.detect_all_slots(
+                        frame, 
+                        detector_slots,
+                        overlap_threshold=camera_config.get('overlap_threshold', 0.3),
+                        overlap_mode=overlap_mode,
+                        camera_id=camera_id,
+                        rois=rois
+                    )
+                
+                if run_inference:
+                    if capture.frame_valid(frame_seq):
+                        slot_statuses = statuses
+                    else:
+                        # A shared-memory view was overwritten mid-inference; the
+                        # result may come from a torn frame, so drop it and retry
+                        retry_inference = True
+                        run_inference = False
+                
+                # Only fresh detector passes vote; a result reused on a frame the
+                # motion gate skipped would count as another agreeing observation
+                if run_inference:
+                    for slot_id, is_occupied, confidence in occupancy_filter.update(slot_statuses):
                         self.publish_slot_update(camera_id, slot_id, is_occupied, confidence)
-                        last_status[slot_id] = is_occupied
                         logger.info(f"{camera_id}/{slot_id}: {'OCCUPIED' if is_occupied else 'FREE'} ({confidence:.2f})")
                 
                 # Visualization (optional)
-                if self.config['vision_settings'].get('show_visualization', False):
+                if self.config['vision_settings'].get('show_visualization', False) and slot_statuses is not None:
                     vis_frame = self.detector.visualize_detections(frame, detector_slots, slot_statuses)
                     cv2.imshow(f"Camera {camera_id}", vis_frame)
                     if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -201,9 +358,10 @@ class VisionService:
             except Exception as e:
                 logger.error(f"Error processing frame from {camera_id}: {e}")
             
-            time.sleep(frame_delay)
+            # Cap the inference rate at the configured fps
+            time.sleep(max(0.0, frame_delay - (time.monotonic() - started)))
         
-        cap.release()
+        capture.stop()
         cv2.destroyAllWindows()
         logger.info(f"Camera {camera_id} stopped")
     
@@ -216,8 +374,18 @@ class VisionService:
             logger.error("No cameras configured!")
             return
         
+        if self.worker_processes > 0:
+            # Shard cameras across worker processes; this process only publishes
+            from .worker_pool import VisionWorkerPool
+            self.worker_pool = VisionWorkerPool(self, self.worker_processes)
+            self.worker_pool.run()
+            return
+        
         logger.info(f"Starting {len(cameras)} camera(s)...")
         
+        if self.scheduler:
+            self.scheduler.start()
+        
         for camera_config in cameras:
             thread = threading.Thread(
                 target=self.process_camera,
@@ -228,17 +396,47 @@ class VisionService:
             self.camera_threads.append(thread)
             logger.info(f"Started thread for camera {camera_config['camera_id']}")
         
-        # Wait for all threads
+        # Wait for all threads, reporting pipeline counters periodically
+        stats_interval = self.config['vision_settings'].get('stats_interval', 60)
         try:
-            for thread in self.camera_threads:
-                thread.join()
+            while any(thread.is_alive() for thread in self.camera_threads):
+                alive = next(thread for thread in self.camera_threads if thread.is_alive())
+                alive.join(timeout=stats_interval)
+                self.report_stats()
         except KeyboardInterrupt:
             logger.info("Shutting down vision service...")
             self.stop()
     
+    def report_stats(self):
+        """Log per-camera pipeline counters"""
+        for camera_id, stats in self.get_camera_stats().items():
+            logger.info(f"{camera_id} stats: {stats}")
+        if self.publisher:
+            logger.info(f"Backend publisher stats: {self.publisher.get_stats()}")
+    
+    def get_camera_stats(self) -> Dict[str, Dict]:
+        """Get capture/processing counters for every camera"""
+        stats = {}
+        for camera_id, capture in self.captures.items():
+            stats[camera_id] = capture.get_stats()
+            if camera_id in self.motion_gates:
+                stats[camera_id]['motion_gate'] = self.motion_gates[camera_id].get_stats()
+            if camera_id in self.occupancy_filters:
+                stats[camera_id]['occupancy_filter'] = self.occupancy_filters[camera_id].get_stats()
+        return stats
+    
     def stop(self):
         """Stop all camera processing"""
         self.running = False
+        if self.worker_pool:
+            self.worker_pool.stop()
+        if self.publisher:
+            self.publisher.stop()
+        if self.scheduler:
+            self.scheduler.stop()
+            logger.info(f"Inference stats: {self.scheduler.get_stats()}")
+        if self.mqtt_client is None:
+            return
         self.mqtt_client.loop_stop()
         self.mqtt_client.disconnect()
         logger.info("Vision service stopped")
@@ -0,0 +1,270 @@
+"""
+Multi-Process Vision Worker Pool
+Shards cameras across worker processes, each with its own detector, and
+merges their slot updates into the supervisor's single publish stream
+"""
+import os
+import time
+import queue
+import signal
+import logging
+import multiprocessing as mp
+from typing import Dict, List, Optional
+
+from .frame_capture import LatestFrameCapture
+from .frame_ring import SharedFrameRing, SharedFrameReader
+from .vision_service import VisionService
+
+logger = logging.getLogger(__name__)
+
+
+def shard_cameras(cameras: List[Dict], num_workers: int) -> List[List[Dict]]:
+    """
+    Split cameras into balanced shards by slot count
+
+    Args:
+        cameras: Camera configurations
+        num_workers: Number of worker processes
+
+    Returns:
+        One list of camera configurations per non-empty shard
+    """
+    shards = [[] for _ in range(max(1, min(num_workers, len(cameras))))]
+    loads = [0] * len(shards)
+
+    # Largest cameras first onto the least loaded worker
+    for camera in sorted(cameras, key=lambda c: len(c.get('slots', [])), reverse=True):
+        target = loads.index(min(loads))
+        shards[target].append(camera)
+        loads[target] += max(1, len(camera.get('slots', [])))
+
+    return [shard for shard in shards if shard]
+
+
+class WorkerVisionService(VisionService):
+    """VisionService running one shard of cameras inside a worker process"""
+
+    def __init__(self, config_path: str, camera_ids: List[str], update_queue, worker_id: int,
+                 ring_specs: Optional[Dict[str, Dict]] = None):
+        self.update_queue = update_queue
+        self.worker_id = worker_id
+        self.ring_specs = ring_specs or {}
+        super().__init__(config_path, mqtt_config_path=None)
+
+        self.config['cameras'] = [
+            camera for camera in self.config.get('cameras', [])
+            if camera['camera_id'] in camera_ids
+        ]
+        # Always run cameras as threads inside the worker
+        self.worker_processes = 0
+        self.init_detector()
+
+    def load_mqtt_config(self, config_path: str) -> Dict:
+        return {}
+
+    def setup_mqtt(self):
+        # Workers never talk to the broker; the supervisor publishes for them
+        return None
+
+    def setup_publisher(self):
+        return None
+
+    def create_capture(self, camera_config: Dict):
+        camera_id = camera_config['camera_id']
+        if camera_id not in self.ring_specs:
+            return super().create_capture(camera_config)
+
+        # Frames are decoded by the supervisor and read from shared memory
+        shared_config = self.config['vision_settings'].get('shared_frames', {})
+        return SharedFrameReader(
+            camera_id,
+            self.ring_specs[camera_id],
+            copy_frames=shared_config.get('copy_frames', False)
+        )
+
+    def publish_slot_update(self, camera_id: str, slot_id: str, is_occupied: bool, confidence: float = 1.0):
+        self.update_queue.put(('slot_update', camera_id, slot_id, is_occupied, confidence))
+
+    def report_stats(self):
+        self.update_queue.put(('stats', self.worker_id, self.get_camera_stats()))
+
+
+def run_worker(config_path: str, camera_ids: List[str], update_queue, worker_id: int,
+               ring_specs: Optional[Dict[str, Dict]] = None):
+    """Worker process entry point"""
+    service = WorkerVisionService(config_path, camera_ids, update_queue, worker_id, ring_specs)
+
+    def handle_term(signum, frame):
+        service.running = False
+
+    signal.signal(signal.SIGTERM, handle_term)
+    service.start()
+    service.stop()
+
+
+class VisionWorkerPool:
+    """Supervisor that runs camera shards in worker processes"""
+
+    def __init__(self, service: VisionService, num_workers: int, restart_delay: float = 5.0):
+        """
+        Initialize worker pool
+
+        Args:
+            service: Supervisor VisionService that owns the MQTT/HTTP publishers
+            num_workers: Number of worker processes
+            restart_delay: Seconds to wait before restarting a crashed worker
+        """
+        self.service = service
+        self.restart_delay = restart_delay
+        self.context = mp.get_context('spawn')
+        self.update_queue = self.context.Queue(maxsize=10000)
+
+        self.shards = shard_cameras(service.config.get('cameras', []), num_workers)
+        self.workers: List = [None] * len(self.shards)
+        self.restart_at: List[float] = [0.0] * len(self.shards)
+        self.running = False
+
+        # Supervisor-side capture into shared memory (camera_id -> capture/ring)
+        self.shared_config = service.config['vision_settings'].get('shared_frames', {})
+        self.captures: Dict[str, LatestFrameCapture] = {}
+        self.rings: Dict[str, SharedFrameRing] = {}
+
+        # Statistics
+        self.restarts = 0
+        self.updates_published = 0
+        self.worker_stats: Dict[int, Dict] = {}
+
+    def start_shared_capture(self, camera_config: Dict):
+        """Decode a camera in this process and publish its frames through a shared ring"""
+        camera_id = camera_config['camera_id']
+        capture = LatestFrameCapture(camera_id, camera_config['stream_url'])
+        if not capture.start():
+            return
+
+        # Size the ring from the first decoded frame
+        frame, _ = capture.read(timeout=10.0)
+        if frame is None:
+            logger.error(f"No frame from camera {camera_id}, not sharing it")
+            capture.stop()
+            return
+
+        ring = SharedFrameRing.create(
+            f"parking_{camera_id}_{os.getpid()}",
+            frame.shape,
+            slots=self.shared_config.get('ring_slots', 4)
+        )
+        ring.write(frame)
+        capture.ring = ring
+        self.captures[camera_id] = capture
+        self.rings[camera_id] = ring
+        logger.info(f"Sharing {camera_id} frames {frame.shape} through a {ring.slots}-slot ring")
+
+    def spawn(self, index: int):
+        """Start (or restart) the worker for a shard"""
+        camera_ids = [camera['camera_id'] for camera in self.shards[index]]
+        ring_specs = {
+            camera_id: self.rings[camera_id].spec()
+            for camera_id in camera_ids if camera_id in self.rings
+        }
+        process = self.context.Process(
+            target=run_worker,
+            args=(self.service.config_path, camera_ids, self.update_queue, index, ring_specs),
+            name=f"vision-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self.workers[index] = process
+        logger.info(f"Worker {index} (pid {process.pid}) started for cameras {camera_ids}")
+
+    def supervise(self):
+        """Restart workers that exited while the pool is running"""
+        now = time.monotonic()
+        for index, process in enumerate(self.workers):
+            if process is None or process.is_alive():
+                continue
+
+            if not self.restart_at[index]:
+                logger.error(f"Worker {index} exited with code {process.exitcode}, "
+                             f"restarting in {self.restart_delay}s")
+                self.restart_at[index] = now + self.restart_delay
+            elif now >= self.restart_at[index]:
+                self.restart_at[index] = 0.0
+                self.restarts += 1
+                self.spawn(index)
+
+    def dispatch(self, message):
+        """Handle one message from a worker"""
+        kind = message[0]
+        if kind == 'slot_update':
+            _, camera_id, slot_id, is_occupied, confidence = message
+            self.service.publish_slot_update(camera_id, slot_id, is_occupied, confidence)
+            self.updates_published += 1
+            logger.info(f"{camera_id}/{slot_id}: {'OCCUPIED' if is_occupied else 'FREE'} ({confidence:.2f})")
+        elif kind == 'stats':
+            _, worker_id, stats = message
+            self.worker_stats[worker_id] = stats
+            for camera_id, camera_stats in stats.items():
+                if camera_id in self.rings:
+                    camera_stats['capture'] = self.captures[camera_id].get_stats()
+                    camera_stats['ring'] = self.rings[camera_id].get_stats()
+                logger.info(f"{camera_id} stats (worker {worker_id}): {camera_stats}")
+
+    def run(self):
+        """Start all workers and merge their updates until stopped"""
+        self.running = True
+        if self.shared_config.get('enabled', False):
+            for shard in self.shards:
+                for camera_config in shard:
+                    self.start_shared_capture(camera_config)
+
+        logger.info(f"Starting {len(self.shards)} vision worker process(es)...")
+        for index in range(len(self.shards)):
+            self.spawn(index)
+
+        while self.running and self.service.running:
+            try:
+                message = self.update_queue.get(timeout=1.0)
+            except queue.Empty:
+                message = None
+
+            if message is not None:
+                try:
+                    self.dispatch(message)
+                except Exception as e:
+                    logger.error(f"Failed to dispatch worker message: {e}")
+
+            self.supervise()
+
+    def stop(self):
+        """Stop all workers"""
+        self.running = False
+        for process in self.workers:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.workers:
+            if process is not None:
+                process.join(timeout=10)
+
+        # Workers have detached; free the shared frames
+        for capture in self.captures.values():
+            capture.stop()
+        for ring in self.rings.values():
+            ring.close()
+        self.captures.clear()
+        self.rings.clear()
+        logger.info(f"Worker pool stopped (restarts: {self.restarts}, "
+                    f"updates published: {self.updates_published})")
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        return {
+            'workers': len(self.shards),
+            'alive': sum(1 for p in self.workers if p is not None and p.is_alive()),
+            'restarts': self.restarts,
+            'updates_published': self.updates_published,
+            'cameras': {
+                camera_id: stats
+                for worker in self.worker_stats.values()
+                for camera_id, stats in worker.items()
+            }
+        }